@@ -0,0 +1,60 @@
+class MonthAggregates:
+    # Totais do mês mantidos por deltas O(1) a cada inclusão, edição ou exclusão
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        # Todos os valores em centavos inteiros
+        self.daily = {}  # ordinal do dia -> soma dos valores
+        self.day_counts = {}  # ordinal do dia -> quantidade de lançamentos
+        self.gross = 0  # Soma das entradas
+        self.expenses = 0  # Soma das saídas (negativa)
+
+    @property
+    def balance(self):
+        return self.gross + self.expenses
+
+    def rebuild(self, ordinals, values):
+        # Recalculo completo, usado somente ao carregar um mês
+        self.clear()
+        for ordinal, value in zip(ordinals, values):
+            self.add(ordinal, value)
+
+    def add(self, ordinal, value):
+        self.daily[ordinal] = self.daily.get(ordinal, 0) + value
+        self.day_counts[ordinal] = self.day_counts.get(ordinal, 0) + 1
+        if value > 0:
+            self.gross += value
+        elif value < 0:
+            self.expenses += value
+
+    def remove(self, ordinal, value):
+        count = self.day_counts[ordinal] - 1
+        if count:
+            self.day_counts[ordinal] = count
+            self.daily[ordinal] -= value
+        else:
+            del self.day_counts[ordinal]
+            del self.daily[ordinal]
+        if value > 0:
+            self.gross -= value
+        elif value < 0:
+            self.expenses -= value
+
+    def update(self, old_ordinal, old_value, new_ordinal, new_value):
+        self.remove(old_ordinal, old_value)
+        self.add(new_ordinal, new_value)
+
+    def merge(self, other):
+        # Soma os totais de outro mês (ex.: o mesmo mês em outro livro-caixa)
+        for ordinal, value in other.daily.items():
+            self.daily[ordinal] = self.daily.get(ordinal, 0) + value
+        for ordinal, count in other.day_counts.items():
+            self.day_counts[ordinal] = self.day_counts.get(ordinal, 0) + count
+        self.gross += other.gross
+        self.expenses += other.expenses
+
+    def daily_series(self):
+        # Lista de (ordinal, soma) em ordem de data
+        return sorted(self.daily.items())
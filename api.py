@@ -0,0 +1,392 @@
+import asyncio, json, queue, sqlite3, sys
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from urllib.parse import urlsplit
+from database import LedgerStore, month_bounds
+from ledger import LedgerError, parse_entry_date, parse_value, entry_type
+
+# API HTTP/JSON local sobre o mesmo banco da janela, para scripts e painéis (asyncio, só
+# biblioteca padrão, escutando apenas em 127.0.0.1):
+#
+#   GET    /months                    meses com lançamentos e seus totais
+#   GET    /months/<ano>/<mês>        lançamentos e os mesmos totais da janela (com ETag)
+#   GET    /entries/<id>
+#   POST   /entries                   {"date": "dd/mm/aaaa" ou "aaaa-mm-dd", "description", "value": "1.500,50" ou "cents"}
+#   PATCH  /entries/<id>              os mesmos campos, todos opcionais
+#   DELETE /entries/<id>
+#
+# Leituras usam um pool de conexões (em WAL elas não esperam as gravações) e rodam em threads;
+# gravações passam, uma de cada vez, por uma única conexão numa única thread. A resposta de um
+# mês fica em cache pela sua ETag (revisão do mês + saldo anterior + saldo total), validada a
+# cada pedido com duas consultas aos resumos; If-None-Match com a mesma ETag devolve 304.
+# A janela pode ficar aberta: ela percebe as gravações daqui (Ledger.changed_elsewhere)
+
+API_HOST = "127.0.0.1"
+API_PORT = 8765
+READERS = 4
+RESPONSE_CACHE_SIZE = 256
+MAX_BODY_SIZE = 64 * 1024
+MAX_HEADERS = 100
+MAX_CENTS = 2 ** 63 - 1  # INTEGER do SQLite (64 bits com sinal)
+BODY_METHODS = ('POST', 'PUT', 'PATCH')  # Exigem Content-Length (corpo em chunks não é aceito)
+
+REASONS = {200: "OK", 201: "Created", 204: "No Content", 304: "Not Modified", 400: "Bad Request",
+           404: "Not Found", 405: "Method Not Allowed", 411: "Length Required", 413: "Payload Too Large",
+           431: "Request Header Fields Too Large", 500: "Internal Server Error"}
+
+
+class ApiError(Exception):
+    # Erro com status HTTP; a mensagem vai para o cliente em {"error": ...}
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ReadPool:
+    # Uma conexão por thread do pool, somente leitura (query_only)
+    def __init__(self, path, size=READERS):
+        self.size = size
+        self.executor = ThreadPoolExecutor(size, thread_name_prefix="api-read")
+        self.connections = queue.SimpleQueue()
+        for _ in range(size):
+            conn = sqlite3.connect(path, check_same_thread=False)
+            conn.execute("PRAGMA query_only = ON")
+            self.connections.put(conn)
+
+    def call(self, function, args):
+        # Cada consulta roda numa transação de leitura: os números vêm de um mesmo instante do banco
+        conn = self.connections.get()
+        try:
+            conn.execute("BEGIN")
+            try:
+                return function(conn, *args)
+            finally:
+                conn.execute("COMMIT")
+        finally:
+            self.connections.put(conn)
+
+    async def run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, self.call, function, args)
+
+    def close(self):
+        self.executor.shutdown()
+        for _ in range(self.size):
+            self.connections.get().close()
+
+
+class Writer:
+    # Todas as gravações numa única thread e numa única conexão: ficam naturalmente em fila
+    def __init__(self, path):
+        self.executor = ThreadPoolExecutor(1, thread_name_prefix="api-write")
+        self.store = self.executor.submit(LedgerStore, path, False).result()
+
+    async def run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, self, *args)
+
+    def close(self):
+        self.executor.submit(self.store.close).result()
+        self.executor.shutdown()
+
+
+# Consultas (rodam no pool de leitura)
+
+def entry_document(entry_id, ordinal, description, cents):
+    return {'id': entry_id, 'date': date.fromordinal(ordinal).isoformat(), 'description': description,
+            'cents': cents, 'type': entry_type(cents)}
+
+
+def balances(conn, year, month):
+    # (saldo antes do mês, saldo de todos os meses)
+    return conn.execute(
+        "SELECT coalesce(sum(CASE WHEN year * 12 + month < ? THEN income + expenses ELSE 0 END), 0), "
+        "coalesce(sum(income + expenses), 0) FROM months", (year * 12 + month,)).fetchone()
+
+
+def month_etag(conn, year, month):
+    revision = conn.execute("SELECT revision FROM revisions WHERE year = ? AND month = ?", (year, month)).fetchone()
+    opening, total = balances(conn, year, month)
+    return f'"{year}-{month}-{revision[0] if revision else 0}-{opening}-{total}"'
+
+
+def month_document(conn, year, month):
+    # (ETag, corpo JSON): lançamentos do mês e os totais mostrados pela janela
+    etag = month_etag(conn, year, month)
+    first, last = month_bounds(year, month)
+    rows = conn.execute("SELECT id, ordinal, description, cents FROM entries WHERE ordinal BETWEEN ? AND ? "
+                        "ORDER BY ordinal, id", (first, last)).fetchall()
+    income = sum(cents for *_, cents in rows if cents > 0)
+    expenses = sum(cents for *_, cents in rows if cents < 0)
+    daily = {}
+    for _, ordinal, _, cents in rows:
+        daily[ordinal] = daily.get(ordinal, 0) + cents
+    opening, total = balances(conn, year, month)
+    document = {
+        'year': year, 'month': month,
+        'entries': [entry_document(*row) for row in rows],
+        'totals': {
+            'income': income, 'expenses': expenses, 'balance': income + expenses,
+            'opening_balance': opening, 'closing_balance': opening + income + expenses, 'total_balance': total,
+            'daily': [{'date': date.fromordinal(ordinal).isoformat(), 'cents': cents}
+                      for ordinal, cents in sorted(daily.items())],
+        },
+    }
+    return etag, json.dumps(document, ensure_ascii=False).encode('utf-8')
+
+
+def months_document(conn):
+    return [{'year': year, 'month': month, 'entries': entries, 'income': income, 'expenses': expenses,
+             'balance': income + expenses}
+            for year, month, entries, income, expenses in conn.execute(
+                "SELECT year, month, entries, income, expenses FROM months ORDER BY year, month")]
+
+
+def find_entry(conn, entry_id):
+    return conn.execute("SELECT id, ordinal, description, cents FROM entries WHERE id = ?", (entry_id,)).fetchone()
+
+
+# Gravações (rodam na thread do Writer)
+
+def add_entry(writer, ordinal, description, cents):
+    # O id vem do AUTOINCREMENT, sempre acima dos blocos que a janela reservou para o seu diário
+    return writer.store.add_entry(ordinal, description, cents), ordinal, description, cents
+
+
+def update_entry(writer, entry_id, fields):
+    row = find_entry(writer.store.conn, entry_id)
+    if row is None:
+        return None
+    _, ordinal, description, cents = row
+    ordinal = fields.get('ordinal', ordinal)
+    description = fields.get('description', description)
+    cents = fields.get('cents', cents)
+    writer.store.update_entry(entry_id, ordinal, description, cents)
+    return entry_id, ordinal, description, cents
+
+
+def delete_entry(writer, entry_id):
+    with writer.store.conn:
+        return writer.store.conn.execute("DELETE FROM entries WHERE id = ?", (entry_id,)).rowcount
+
+
+def entry_fields(body, required):
+    # Valida o corpo de POST/PATCH com as mesmas regras da tabela
+    if not isinstance(body, dict):
+        raise ApiError(400, "O corpo deve ser um objeto JSON.")
+    fields = {}
+    try:
+        if 'date' in body:
+            text = str(body['date'])
+            try:
+                fields['ordinal'] = date.fromisoformat(text).toordinal()
+            except ValueError:
+                fields['ordinal'] = parse_entry_date(text)
+        if 'description' in body:
+            fields['description'] = str(body['description']).strip()
+        if 'cents' in body:
+            if not isinstance(body['cents'], int) or isinstance(body['cents'], bool):
+                raise ApiError(400, "cents deve ser um número inteiro.")
+            fields['cents'] = body['cents']
+        elif 'value' in body:
+            fields['cents'] = parse_value(str(body['value']))
+    except LedgerError as error:
+        raise ApiError(400, str(error))
+    if 'cents' in fields and not -MAX_CENTS - 1 <= fields['cents'] <= MAX_CENTS:
+        raise ApiError(400, "Valor fora do intervalo aceito.")
+    if required and 'ordinal' not in fields:
+        raise ApiError(400, "Informe a data do lançamento.")
+    return fields
+
+
+class ApiServer:
+    def __init__(self, path=None, host=API_HOST, port=API_PORT, readers=READERS, cache_size=RESPONSE_CACHE_SIZE):
+        self.writer = Writer(path)  # Abre (e migra, se preciso) o banco antes das leituras
+        self.readers = ReadPool(self.writer.store.path, readers)
+        self.host = host
+        self.port = port
+        self.cache = OrderedDict()  # ETag -> corpo do mês
+        self.cache_size = cache_size
+        self.server = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]  # port=0 escolhe uma porta livre
+        return self
+
+    async def serve_forever(self):
+        await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        self.readers.close()
+        self.writer.close()
+
+    async def handle_connection(self, reader, writer):
+        # HTTP/1.1 com conexões persistentes: vários pedidos seguidos na mesma conexão
+        try:
+            while True:
+                try:
+                    request = await self.read_request(reader)
+                except ApiError as error:
+                    # Pedido malformado: responde e fecha (o corpo, se houver, não foi lido)
+                    writer.write(self.format_response(error.status, self.encode({'error': str(error)}), {}, False))
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, target, headers, body = request
+                status, payload, extra = await self.respond(method, target, headers, body)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                writer.write(self.format_response(status, payload, extra, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def read_request(self, reader):
+        # Linhas maiores que o limite do StreamReader (64 KiB) fazem readline levantar ValueError
+        try:
+            line = await reader.readline()
+        except ValueError:
+            raise ApiError(400, "Linha de pedido longa demais.")
+        if not line:
+            return None
+        try:
+            method, target, _ = line.decode('latin-1').split(' ', 2)
+        except ValueError:
+            raise ApiError(400, "Linha de pedido inválida.")
+        headers = {}
+        while True:
+            try:
+                line = await reader.readline()
+            except ValueError:
+                raise ApiError(431, "Cabeçalho longo demais.")
+            if line in (b'\r\n', b'\n', b''):
+                break
+            if len(headers) >= MAX_HEADERS:
+                raise ApiError(431, f"Mais de {MAX_HEADERS} cabeçalhos.")
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        method = method.upper()
+        length = headers.get('content-length')
+        if length is None:
+            if 'transfer-encoding' in headers or method in BODY_METHODS:
+                raise ApiError(411, "Informe Content-Length.")
+            length = 0
+        elif not length.isdigit():
+            raise ApiError(400, "Content-Length inválido.")
+        length = int(length)
+        if length > MAX_BODY_SIZE:
+            raise ApiError(413, f"Corpo maior que {MAX_BODY_SIZE} bytes.")
+        body = await reader.readexactly(length) if length else b''
+        return method, target, headers, body
+
+    def format_response(self, status, payload, extra, keep_alive):
+        lines = [f"HTTP/1.1 {status} {REASONS[status]}", f"Content-Length: {len(payload)}",
+                 f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        if payload:
+            lines.append("Content-Type: application/json; charset=utf-8")
+        lines += [f"{name}: {value}" for name, value in extra.items()]
+        return ("\r\n".join(lines) + "\r\n\r\n").encode('latin-1') + payload
+
+    async def respond(self, method, target, headers, body):
+        # (status, corpo, cabeçalhos extras)
+        try:
+            return await self.route(method, urlsplit(target).path.strip('/').split('/'), headers, body)
+        except ApiError as error:
+            return error.status, self.encode({'error': str(error)}), {}
+        except Exception as error:  # Um pedido com problema não derruba o servidor
+            print(f"api: {method} {target}: {error!r}", file=sys.stderr)
+            return 500, self.encode({'error': "Erro interno."}), {}
+
+    def encode(self, document):
+        return json.dumps(document, ensure_ascii=False).encode('utf-8')
+
+    def parse_body(self, body):
+        try:
+            return json.loads(body or b'{}')
+        except ValueError:
+            raise ApiError(400, "JSON inválido.")
+
+    async def route(self, method, parts, headers, body):
+        if parts == ['months']:
+            if method != 'GET':
+                raise ApiError(405, "Use GET.")
+            return 200, self.encode(await self.readers.run(months_document)), {}
+        if len(parts) == 3 and parts[0] == 'months':
+            if method != 'GET':
+                raise ApiError(405, "Use GET.")
+            year, month = self.parse_month(parts[1], parts[2])
+            return await self.get_month(year, month, headers)
+        if parts == ['entries']:
+            if method != 'POST':
+                raise ApiError(405, "Use POST.")
+            fields = entry_fields(self.parse_body(body), required=True)
+            row = await self.writer.run(add_entry, fields['ordinal'], fields.get('description', ""),
+                                        fields.get('cents', 0))
+            return 201, self.encode(entry_document(*row)), {'Location': f"/entries/{row[0]}"}
+        if len(parts) == 2 and parts[0] == 'entries':
+            entry_id = self.parse_id(parts[1])
+            if method == 'GET':
+                row = await self.readers.run(find_entry, entry_id)
+            elif method in ('PATCH', 'PUT'):
+                row = await self.writer.run(update_entry, entry_id, entry_fields(self.parse_body(body), required=False))
+            elif method == 'DELETE':
+                if not await self.writer.run(delete_entry, entry_id):
+                    raise ApiError(404, "Lançamento não encontrado.")
+                return 204, b'', {}
+            else:
+                raise ApiError(405, "Use GET, PATCH ou DELETE.")
+            if row is None:
+                raise ApiError(404, "Lançamento não encontrado.")
+            return 200, self.encode(entry_document(*row)), {}
+        raise ApiError(404, "Recurso não encontrado.")
+
+    async def get_month(self, year, month, headers):
+        etag = await self.readers.run(month_etag, year, month)
+        if headers.get('if-none-match') == etag:
+            return 304, b'', {'ETag': etag}
+        payload = self.cache.get(etag)
+        if payload is None:
+            etag, payload = await self.readers.run(month_document, year, month)
+            self.cache[etag] = payload
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        else:
+            self.cache.move_to_end(etag)
+        return 200, payload, {'ETag': etag, 'Cache-Control': 'no-cache'}
+
+    def parse_month(self, year, month):
+        try:
+            year, month = int(year), int(month)
+            month_bounds(year, month)
+        except ValueError:
+            raise ApiError(404, "Mês inválido.")
+        return year, month
+
+    def parse_id(self, text):
+        if not text.isdigit():
+            raise ApiError(404, "Lançamento não encontrado.")
+        return int(text)
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="API HTTP/JSON local do livro-caixa")
+    parser.add_argument('--db', help="banco de dados (padrão: o mesmo da janela)")
+    parser.add_argument('--port', type=int, default=API_PORT)
+    parser.add_argument('--readers', type=int, default=READERS, help="conexões de leitura")
+    args = parser.parse_args()
+    api = ApiServer(args.db, port=args.port, readers=args.readers)
+    print(f"API em http://{API_HOST}:{args.port}", file=sys.stderr)
+    try:
+        asyncio.run(api.serve_forever())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,88 @@
+class FenwickTree:
+    # Árvore de Fenwick (binary indexed tree): soma de prefixos e atualização pontual em O(log n)
+
+    def __init__(self, values):
+        # Construção em O(n)
+        self.tree = [0] + list(values)
+        size = len(self.tree)
+        for index in range(1, size):
+            parent = index + (index & -index)
+            if parent < size:
+                self.tree[parent] += self.tree[index]
+
+    def __len__(self):
+        return len(self.tree) - 1
+
+    def add(self, index, delta):
+        index += 1
+        size = len(self.tree)
+        while index < size:
+            self.tree[index] += delta
+            index += index & -index
+
+    def prefix(self, index):
+        # Soma das posições 0..index (inclusive)
+        index = min(index + 1, len(self.tree) - 1)
+        total = 0
+        while index > 0:
+            total += self.tree[index]
+            index -= index & -index
+        return total
+
+
+def month_key(year, month):
+    return year * 12 + month - 1
+
+
+class MonthlyBalances:
+    # Saldo líquido de cada mês (em centavos) indexado por mês numa árvore de Fenwick:
+    # uma edição em qualquer mês atualiza os saldos de todos os meses seguintes em O(log meses)
+
+    # Meses reservados além do intervalo atual para evitar reconstruções frequentes
+    MARGIN = 24
+
+    def __init__(self, summaries=()):
+        # summaries: (ano, mês, saldo líquido)
+        self.net = {}
+        for year, month, net in summaries:
+            if net:
+                self.net[month_key(year, month)] = net
+        self.rebuild()
+
+    def rebuild(self, first=None, last=None):
+        keys = list(self.net)
+        if first is None:
+            first = min(keys, default=0) - self.MARGIN
+        if last is None:
+            last = max(keys, default=0) + self.MARGIN
+        self.base = first
+        self.tree = FenwickTree(self.net.get(key, 0) for key in range(first, last + 1))
+
+    def add(self, year, month, delta):
+        if not delta:
+            return
+        key = month_key(year, month)
+        self.net[key] = self.net.get(key, 0) + delta
+        index = key - self.base
+        if index < 0 or index >= len(self.tree):
+            # Mês fora do intervalo reservado: reconstruir com mais folga
+            self.rebuild(min(key, self.base) - self.MARGIN, max(key, self.base + len(self.tree) - 1) + self.MARGIN)
+        else:
+            self.tree.add(index, delta)
+
+    def closing(self, year, month):
+        # Saldo acumulado de todo o histórico até o fim do mês
+        index = month_key(year, month) - self.base
+        if index < 0:
+            return 0
+        return self.tree.prefix(index)
+
+    def opening(self, year, month):
+        # Saldo acumulado até o fim do mês anterior
+        index = month_key(year, month) - 1 - self.base
+        if index < 0:
+            return 0
+        return self.tree.prefix(index)
+
+    def total(self):
+        return self.tree.prefix(len(self.tree) - 1)
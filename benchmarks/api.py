@@ -0,0 +1,105 @@
+import asyncio, http.client, json, os, random, sys, tempfile, threading, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from run import DEFAULT_CACHE, prepare_database, summarize
+
+# Carga na API local (api.py) com clientes HTTP em threads, conexões persistentes e uma mistura
+# de leituras de mês (metade revalidando a ETag) e inclusões
+
+
+def start_server(db_path, readers):
+    from api import ApiServer
+    server = ApiServer(db_path, port=0, readers=readers)
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+
+    def run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(server.start())
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True).start()
+    ready.wait()
+    return server, loop
+
+
+def get(port, path):
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    conn.request('GET', path)
+    body = conn.getresponse().read()
+    conn.close()
+    return body
+
+
+def client(port, months, requests, write_ratio, seed, samples, errors):
+    rng = random.Random(seed)
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    etags = {}
+    for _ in range(requests):
+        year, month = rng.choice(months)
+        start = time.perf_counter()
+        if rng.random() < write_ratio:
+            body = json.dumps({'date': f"{year:04d}-{month:02d}-01", 'description': "Carga", 'cents': -rng.randint(1, 9999)})
+            conn.request('POST', '/entries', body=body, headers={'Content-Type': 'application/json'})
+            kind = 'post_entry'
+        else:
+            headers = {'If-None-Match': etags[year, month]} if (year, month) in etags and rng.random() < 0.5 else {}
+            conn.request('GET', f"/months/{year}/{month}", headers=headers)
+            kind = 'get_month'
+        response = conn.getresponse()
+        response.read()
+        samples.setdefault(kind, []).append((time.perf_counter() - start) * 1000)
+        if response.status not in (200, 201, 304):
+            errors.append(response.status)
+        elif kind == 'get_month' and response.getheader('ETag'):
+            etags[year, month] = response.getheader('ETag')
+    conn.close()
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Carga na API HTTP local")
+    parser.add_argument('--entries', type=int, default=100000, help="lançamentos no banco sintético")
+    parser.add_argument('--years', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--clients', type=int, default=16, help="clientes simultâneos")
+    parser.add_argument('--requests', type=int, default=500, help="pedidos por cliente")
+    parser.add_argument('--readers', type=int, default=4, help="conexões de leitura do servidor")
+    parser.add_argument('--write-ratio', type=float, default=0.1, help="fração de inclusões")
+    parser.add_argument('--cache', default=DEFAULT_CACHE, help="pasta dos bancos gerados")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        db_path = prepare_database(args.entries, args.years, args.seed, args.cache, work_dir)
+        server, loop = start_server(db_path, args.readers)
+        months = [(month['year'], month['month']) for month in json.loads(get(server.port, "/months"))][-12:]
+        per_client = [{} for _ in range(args.clients)]  # Um dicionário de amostras por thread
+        errors = []
+        clients = [threading.Thread(target=client, args=(server.port, months, args.requests, args.write_ratio,
+                                                         args.seed + i, per_client[i], errors))
+                   for i in range(args.clients)]
+        start = time.perf_counter()
+        for thread in clients:
+            thread.start()
+        for thread in clients:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        asyncio.run_coroutine_threadsafe(server.stop(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+
+    samples = {}
+    for client_samples in per_client:
+        for kind, values in client_samples.items():
+            samples.setdefault(kind, []).extend(values)
+    total = sum(len(values) for values in samples.values())
+    print(f"{total} pedidos em {elapsed:.2f} s: {total / elapsed:.0f} pedidos/s, {len(errors)} erros")
+    for kind, values in sorted(samples.items()):
+        summary = summarize(values)
+        print(f"{kind:<12} mediana {summary['median_ms']:>8.2f} ms   p95 {summary['p95_ms']:>8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+import json, os, subprocess, sys, tempfile, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from run import DEFAULT_CACHE, prepare_database
+
+# Memória para carregar o histórico inteiro em colunas NumPy: ids e ordinais (int32), centavos
+# (int64) e o código da descrição (int32, columns.DescriptionPool), cerca de 20 bytes por
+# lançamento. O programa só mantém em memória os meses abertos; isto mede o pior caso.
+# Cada tamanho roda num processo novo para que o RSS medido seja só o da carga
+
+CHUNK_SIZE = 65536  # Linhas lidas do banco por vez
+
+DEFAULT_SIZES = (1000000, 10000000)
+
+
+def resident_memory():
+    # (RSS atual, pico de RSS) em bytes
+    try:
+        with open("/proc/self/status") as file:
+            fields = dict(line.split(":", 1) for line in file)
+        return int(fields['VmRSS'].split()[0]) * 1024, int(fields['VmHWM'].split()[0]) * 1024
+    except OSError:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak *= 1 if sys.platform == 'darwin' else 1024
+        return peak, peak
+
+
+def load_columns(store, chunk_size=CHUNK_SIZE):
+    # Lê o banco em blocos direto para arrays do tamanho final (sem lista de tuplas no meio)
+    import numpy as np
+    from columns import DescriptionPool
+    pool = DescriptionPool()
+    count, max_id = store.conn.execute("SELECT count(*), max(id) FROM entries").fetchone()
+    columns = {
+        'ids': np.empty(count, dtype=np.int32 if (max_id or 0) < 2 ** 31 else np.int64),
+        'ordinals': np.empty(count, dtype=np.int32),
+        'cents': np.empty(count, dtype=np.int64),
+        'codes': np.empty(count, dtype=np.int32),
+    }
+    cursor = store.conn.execute("SELECT id, ordinal, description, cents FROM entries ORDER BY ordinal, id")
+    position = 0
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        end = position + len(rows)
+        ids, ordinals, descriptions, cents = zip(*rows)
+        columns['ids'][position:end] = ids
+        columns['ordinals'][position:end] = ordinals
+        columns['cents'][position:end] = cents
+        columns['codes'][position:end] = [pool.code(description) for description in descriptions]
+        position = end
+    return {name: column[:position] for name, column in columns.items()}, pool
+
+
+def measure(db_path):
+    # Executado no processo filho
+    import numpy  # Conta a biblioteca antes da medição, não como parte da carga
+    from database import LedgerStore
+    store = LedgerStore(db_path)
+    before, _ = resident_memory()
+    start = time.perf_counter()
+    columns, pool = load_columns(store)
+    elapsed = time.perf_counter() - start
+    after, peak = resident_memory()
+    store.close()
+    return {
+        'entries': len(columns['ids']),
+        'load_s': round(elapsed, 3),
+        'columns_bytes': sum(column.nbytes for column in columns.values()),
+        'descriptions': len(pool),
+        'descriptions_bytes': sum(sys.getsizeof(text) for text in pool.strings),
+        'rss_delta_bytes': after - before,
+        'peak_rss_delta_bytes': peak - before,
+    }
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Memória do histórico carregado em colunas")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="quantidade de lançamentos")
+    parser.add_argument('--years', type=int, default=10, help="anos de histórico em cada livro-caixa")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--cache', default=DEFAULT_CACHE, help="pasta dos bancos gerados")
+    parser.add_argument('--output', help="grava os resultados neste arquivo JSON")
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child)))
+        return
+
+    results = {}
+    for entries in args.sizes:
+        with tempfile.TemporaryDirectory() as work_dir:
+            db_path = prepare_database(entries, args.years, args.seed, args.cache, work_dir)
+            process = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', db_path],
+                                     capture_output=True, text=True, check=True)
+        result = results[str(entries)] = json.loads(process.stdout)
+        mb = 1024 * 1024
+        print(f"{entries:>10} lançamentos  carga {result['load_s']:>7.2f} s   "
+              f"colunas {result['columns_bytes'] / mb:>8.1f} MB ({result['columns_bytes'] / max(entries, 1):.0f} B/lanç.)   "
+              f"RSS {result['rss_delta_bytes'] / mb:>8.1f} MB   pico {result['peak_rss_delta_bytes'] / mb:>8.1f} MB")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,240 @@
+import json, os, platform, re, shutil, statistics, subprocess, sys, tempfile, time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from synthetic import generate_ledger
+
+# Benchmarks da janela principal rodando sem tela (QT_QPA_PLATFORM=offscreen).
+# Cada operação é cronometrada até o gráfico do último pedido chegar à tela; "<operação>_ui"
+# é só o tempo em que a thread da interface ficou ocupada com o handler
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+DEFAULT_CACHE = os.path.join(tempfile.gettempdir(), "financial-management-bench")
+
+startup_line_pattern = re.compile(r"^(\w+): (\d+) ms$")
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    return {
+        'runs': len(samples),
+        'min_ms': round(samples[0], 3),
+        'median_ms': round(statistics.median(samples), 3),
+        'p95_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+        'mean_ms': round(statistics.fmean(samples), 3),
+    }
+
+
+def prepare_database(entries, years, seed, cache_dir, work_dir):
+    # Gera o banco uma vez por (tamanho, anos, semente) e trabalha sobre uma cópia
+    os.makedirs(cache_dir, exist_ok=True)
+    cached = os.path.join(cache_dir, f"ledger-{entries}-{years}-{seed}.db")
+    if not os.path.exists(cached):
+        generate_ledger(cached, entries, years, seed)
+    path = os.path.join(work_dir, f"ledger-{entries}.db")
+    shutil.copyfile(cached, path)
+    return path
+
+
+def measure_startup(db_path, runs):
+    # Abertura em processo novo: main.py --startup-time imprime os tempos em stderr
+    env = dict(os.environ, FINANCIAL_DB=db_path)
+    samples = {'first_paint': [], 'first_chart': []}
+    for _ in range(runs):
+        process = subprocess.run(
+            [sys.executable, os.path.join(ROOT, "main.py"), "--startup-time", "--startup-budget", "1e9"],
+            env=env, capture_output=True, text=True, timeout=300)
+        for line in process.stderr.splitlines():
+            match = startup_line_pattern.match(line.strip())
+            if match and match.group(1) in samples:
+                samples[match.group(1)].append(float(match.group(2)))
+    return {f"startup_{name}": summarize(values) for name, values in samples.items() if values}
+
+
+class WindowDriver:
+    # Dirige uma FinancialManager real; a confirmação de exclusão é respondida automaticamente
+
+    def __init__(self, app, db_path):
+        from PyQt5.QtWidgets import QMessageBox
+        os.environ["FINANCIAL_DB"] = db_path
+        import main
+        self.main = main
+        self.app = app
+        QMessageBox.question = staticmethod(lambda *args, **kwargs: QMessageBox.Yes)
+        self.window = main.FinancialManager()
+        self.window.model.errorOccurred.disconnect()
+        self.window.model.errorOccurred.connect(lambda message: print(f"erro: {message}", file=sys.stderr))
+        self.window.show()
+        chart = self.window.chart
+        chart.load_in_background()  # Sem esperar a primeira pintura
+        while not chart.ready:
+            self.app.processEvents()
+            time.sleep(0.001)
+        self.window.update_graphs()
+        self.settle()
+
+    def settle(self):
+        # Espera a thread do gráfico entregar a imagem do último pedido
+        self.app.processEvents()
+        while not self.window.chart.idle:
+            self.app.processEvents()
+            time.sleep(0.0002)
+
+    def timed(self, samples, name, action):
+        start = time.perf_counter()
+        action()
+        handled = time.perf_counter()
+        self.settle()
+        samples.setdefault(name, []).append((time.perf_counter() - start) * 1000)
+        samples.setdefault(f"{name}_ui", []).append((handled - start) * 1000)
+
+    def close(self):
+        self.window.close()
+        self.window.deleteLater()
+        self.app.processEvents()
+
+    def add_entry(self):
+        window = self.window
+        window.add_entry()
+        # add_entry deixa a descrição em edição: fecha o editor sem gravar
+        editor = window.table.indexWidget(window.table.currentIndex())
+        if editor is not None:
+            window.table.closeEditor(editor, 0)
+
+    def edit_value(self, row, cents):
+        from money import format_brl
+        model = self.window.model
+        model.setData(model.index(row, 2), format_brl(cents))
+
+    def switch_month(self, year, month):
+        from PyQt5.QtWidgets import QListWidgetItem
+        self.window.on_month_year_selected(QListWidgetItem(f"{month:02d}/{year} - {self.main.meses_pt[month]}"))
+
+
+def run_size(app, entries, years, seed, repeat, startup_runs, cache_dir):
+    import random
+    rng = random.Random(seed)
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        db_path = prepare_database(entries, years, seed, cache_dir, work_dir)
+        if startup_runs:
+            results.update(measure_startup(db_path, startup_runs))
+
+        driver = WindowDriver(app, db_path)
+        model = driver.window.model
+        samples = {}
+        for _ in range(repeat):
+            driver.timed(samples, 'add_entry', driver.add_entry)
+        for _ in range(repeat):
+            row = rng.randrange(model.rowCount())
+            cents = -rng.randint(100, 100000)
+            driver.timed(samples, 'edit_value', lambda: driver.edit_value(row, cents))
+        for _ in range(repeat):
+            driver.timed(samples, 'update_graphs', driver.window.update_graphs)
+        # Gráfico de cinco anos (agrupado por mês): deve custar o mesmo que o de um mês
+        driver.window.period_box.setCurrentIndex(driver.window.period_box.count() - 1)
+        driver.settle()
+        for _ in range(repeat):
+            driver.timed(samples, 'update_graphs_5y', driver.window.update_graphs)
+        driver.window.period_box.setCurrentIndex(0)
+        driver.settle()
+        for _ in range(repeat):
+            driver.timed(samples, 'sort_table_by_date', driver.window.sort_table_by_date)
+        for _ in range(min(repeat, model.rowCount())):
+            row = rng.randrange(model.rowCount())
+            driver.timed(samples, 'delete_entry', lambda: driver.window.confirm_and_delete_item(row))
+        months = driver.window.ledger.months()
+        for _ in range(repeat):
+            year, month = rng.choice(months)
+            driver.timed(samples, 'switch_month', lambda: driver.switch_month(year, month))
+        # Alternando entre os mesmos poucos meses (conferência): a partir da segunda volta,
+        # tabela e gráfico vêm do cache por mês
+        recent = months[-3:]
+        for i in range(repeat + len(recent)):
+            year, month = recent[i % len(recent)]
+            if i < len(recent):
+                driver.switch_month(year, month)
+                driver.settle()
+            else:
+                driver.timed(samples, 'switch_month_cached', lambda: driver.switch_month(year, month))
+        driver.close()
+
+    results.update({name: summarize(values) for name, values in samples.items() if values})
+    return results
+
+
+def environment():
+    from PyQt5.QtCore import QT_VERSION_STR
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'qt': QT_VERSION_STR,
+        'platform': platform.platform(),
+        'qpa': os.environ.get("QT_QPA_PLATFORM"),
+    }
+
+
+def compare(results, baseline, threshold):
+    # Compara as medianas com uma execução anterior; retorna a lista de regressões
+    regressions = []
+    for size, operations in results['sizes'].items():
+        for name, current in operations.items():
+            previous = baseline.get('sizes', {}).get(size, {}).get(name)
+            if not previous or not previous['median_ms']:
+                continue
+            ratio = current['median_ms'] / previous['median_ms']
+            flag = "REGRESSÃO" if ratio > 1 + threshold else ""
+            print(f"{size:>9} {name:<22} {previous['median_ms']:>10.2f} {current['median_ms']:>10.2f} {ratio:>6.2f}x {flag}")
+            if flag:
+                regressions.append((size, name, ratio))
+    return regressions
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Benchmarks da janela principal com livros-caixa sintéticos")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="quantidade de lançamentos")
+    parser.add_argument('--years', type=int, default=10, help="anos de histórico em cada livro-caixa")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=20, help="repetições de cada operação")
+    parser.add_argument('--startup-runs', type=int, default=3, help="aberturas medidas em processo novo (0 desliga)")
+    parser.add_argument('--cache', default=DEFAULT_CACHE, help="pasta dos bancos gerados")
+    parser.add_argument('--output', help="grava os resultados neste arquivo JSON")
+    parser.add_argument('--compare', help="JSON de uma execução anterior para detectar regressões")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="aumento relativo da mediana considerado regressão (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+
+    results = {'environment': environment(), 'years': args.years, 'seed': args.seed, 'sizes': {}}
+    for entries in args.sizes:
+        operations = run_size(app, entries, args.years, args.seed, args.repeat, args.startup_runs, args.cache)
+        results['sizes'][str(entries)] = operations
+        for name, summary in operations.items():
+            print(f"{entries:>9} {name:<22} mediana {summary['median_ms']:>10.2f} ms   p95 {summary['p95_ms']:>10.2f} ms")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2, ensure_ascii=False)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            baseline = json.load(file)
+        print(f"\n{'tamanho':>9} {'operação':<22} {'antes ms':>10} {'agora ms':>10}")
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+import os, random, sys
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import LedgerStore
+
+# Livros-caixa sintéticos para os benchmarks: mesma semente, mesmo banco
+
+DESCRIPTIONS = (
+    "Salário", "Aluguel", "Mercado", "Farmácia", "Combustível", "Restaurante", "Energia elétrica",
+    "Internet", "Transferência recebida", "Pix enviado", "Academia", "Streaming", "Padaria", "Uber",
+)
+
+BATCH_SIZE = 10000
+
+
+def synthetic_rows(entries, years, seed=0, today=None):
+    # Gera (ordinal, descrição, centavos) espalhados pelos últimos `years` anos até hoje,
+    # com cerca de 1 entrada para cada 4 saídas
+    today = today or date.today()
+    rng = random.Random(seed)
+    last = today.toordinal()
+    first = date(today.year - years, today.month, 1).toordinal() + 1
+    for _ in range(entries):
+        ordinal = rng.randint(first, last)
+        if rng.random() < 0.2:
+            cents = rng.randint(50000, 1500000)
+        else:
+            cents = -rng.randint(500, 300000)
+        yield ordinal, rng.choice(DESCRIPTIONS), cents
+
+
+def batched(rows, size=BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def generate_ledger(path, entries, years, seed=0, today=None):
+    # Cria (ou recria) o banco em `path`; retorna o número de lançamentos gravados
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    store = LedgerStore(path)
+    try:
+        return store.add_entries(batched(synthetic_rows(entries, years, seed, today)))
+    finally:
+        store.close()
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Gera um livro-caixa sintético")
+    parser.add_argument('path')
+    parser.add_argument('--entries', type=int, default=100000)
+    parser.add_argument('--years', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    print(generate_ledger(args.path, args.entries, args.years, args.seed))
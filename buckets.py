@@ -0,0 +1,96 @@
+from datetime import date
+
+# Agrupamento da série do gráfico conforme o período visível: dia até ~2 meses, semana até
+# um ano e mês acima disso. Se ainda houver mais barras do que cabem na largura, cada faixa
+# de pixels fica só com o maior e o menor valor (min/max), o que preserva os picos.
+# Sem PyQt nem matplotlib: roda na thread do gráfico e em scripts
+
+DAY, WEEK, MONTH = "day", "week", "month"
+
+DAY_LIMIT = 62  # Dias visíveis até os quais cada barra é um dia
+WEEK_LIMIT = 366  # ... e até os quais cada barra é uma semana
+
+MAX_BARS = 120  # Limite de barras desenhadas, qualquer que seja o período
+MIN_BAR_PX = 4  # Largura mínima de uma barra na tela
+VALUE_LABEL_PX = 52  # Largura de uma barra para caber o valor em cima dela
+TICK_LABEL_PX = 44  # Espaço para cada rótulo do eixo x
+
+MONTH_ABBREVIATIONS = ("jan", "fev", "mar", "abr", "mai", "jun", "jul", "ago", "set", "out", "nov", "dez")
+
+
+def choose_bucket(first, last):
+    days = last - first + 1
+    if days <= DAY_LIMIT:
+        return DAY
+    if days <= WEEK_LIMIT:
+        return WEEK
+    return MONTH
+
+
+def bucket_start(ordinal, bucket):
+    # Ordinal do primeiro dia do grupo (semanas começam na segunda-feira)
+    if bucket == DAY:
+        return ordinal
+    if bucket == WEEK:
+        return ordinal - date.fromordinal(ordinal).weekday()
+    return date.fromordinal(ordinal).replace(day=1).toordinal()
+
+
+def bucket_series(series, bucket):
+    # Soma os (ordinal, centavos) por grupo; retorna (início do grupo, soma) em ordem
+    if bucket == DAY and all(series[i][0] < series[i + 1][0] for i in range(len(series) - 1)):
+        return list(series)
+    totals = {}
+    for ordinal, value in series:
+        start = bucket_start(ordinal, bucket)
+        totals[start] = totals.get(start, 0) + value
+    return sorted(totals.items())
+
+
+def bar_slots(width):
+    return max(1, min(MAX_BARS, width // MIN_BAR_PX))
+
+
+def downsample(series, slots):
+    # Min/max por faixa: divide a série em slots // 2 faixas e guarda, na ordem original,
+    # o ponto de maior e o de menor valor de cada uma
+    if len(series) <= slots:
+        return list(series)
+    bands = max(1, slots // 2)
+    result = []
+    for band in range(bands):
+        points = series[band * len(series) // bands:(band + 1) * len(series) // bands]
+        if not points:
+            continue
+        low = min(range(len(points)), key=lambda i: points[i][1])
+        high = max(range(len(points)), key=lambda i: points[i][1])
+        result.extend(points[i] for i in sorted({low, high}))
+    return result
+
+
+def tick_label(ordinal, bucket, detailed=False):
+    # detailed: o período passa de um mês (dias) ou de um ano (meses), então o rótulo leva o mês ou o ano
+    day = date.fromordinal(ordinal)
+    if bucket == MONTH:
+        month = MONTH_ABBREVIATIONS[day.month - 1]
+        return f"{month}/{day.year % 100:02d}" if detailed else month
+    if bucket == WEEK or detailed:
+        return f"{day.day:02d}/{day.month:02d}"
+    return f"{day.day:02d}"
+
+
+def is_detailed(first, last, bucket):
+    first, last = date.fromordinal(first), date.fromordinal(last)
+    if bucket == MONTH:
+        return first.year != last.year
+    return (first.year, first.month) != (last.year, last.month)
+
+
+def tick_stride(count, width):
+    # De quantas em quantas barras mostrar um rótulo no eixo x para que não se sobreponham
+    fit = max(1, width // TICK_LABEL_PX)
+    return max(1, -(-count // fit))
+
+
+def value_labels_fit(count, width):
+    return count > 0 and width / count >= VALUE_LABEL_PX
@@ -0,0 +1,257 @@
+import threading
+from collections import OrderedDict
+from PyQt5.QtCore import Qt, QObject, pyqtSignal
+from PyQt5.QtGui import QImage, QPixmap
+from PyQt5.QtWidgets import QLabel, QSizePolicy
+from money import format_brl
+from instrumentation import tracer
+from buckets import (
+    DAY, WEEK, choose_bucket, bucket_series, bar_slots, downsample, tick_label, is_detailed, tick_stride,
+    value_labels_fit
+)
+
+COLOR_POSITIVE = '#90d4c4'
+COLOR_NEGATIVE = '#DC143C'
+
+# Imagens prontas guardadas para reexibir um mês sem redesenhar
+IMAGE_CACHE_SIZE = 12
+
+
+def import_matplotlib():
+    # Importações pesadas, feitas fora do caminho de abertura da janela
+    import matplotlib
+    import matplotlib.style
+    import matplotlib.figure
+    import matplotlib.backends.backend_agg
+
+
+class ChartView(QLabel):
+    # Mostra a imagem pronta do gráfico; avisa quando o tamanho muda para gerar outra
+    resized = pyqtSignal()
+
+    def __init__(self):
+        super().__init__("Carregando gráfico...")
+        self.setAlignment(Qt.AlignCenter)
+        self.setSizePolicy(QSizePolicy.Ignored, QSizePolicy.Ignored)
+        self.setMinimumSize(200, 150)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.resized.emit()
+
+
+class ChartRenderer(QObject):
+    # Desenha o gráfico numa thread própria com um canvas Agg e entrega a imagem pronta à
+    # thread da interface, que só troca o pixmap. Cada pedido recebe uma geração: enquanto
+    # um desenho está em andamento, novos pedidos substituem o pendente e imagens de
+    # gerações antigas são descartadas, então só o estado mais recente chega à tela.
+    # As barras e os rótulos são mantidos entre atualizações (só a thread de desenho os toca).
+    # O matplotlib só é carregado depois da primeira pintura da janela (load_in_background).
+    # Períodos longos são agrupados por semana ou mês e reduzidos a no máximo MAX_BARS barras
+    # (veja buckets.py); os valores sobre as barras e os rótulos do eixo só aparecem quando cabem,
+    # então o custo de desenhar cinco anos é o mesmo de um mês.
+    # Pedidos com cache_key guardam a imagem pronta num LRU (chave + tamanho da tela): um pedido
+    # repetido é exibido na hora, sem passar pela thread. A chave deve mudar quando os dados
+    # mudam (a janela usa o mês e sua versão em Ledger.version)
+
+    loaded = pyqtSignal()
+    rendered = pyqtSignal()
+    finished = pyqtSignal(int, QImage)  # (geração, imagem); emitido pela thread de desenho
+
+    def __init__(self, layout, cache_size=IMAGE_CACHE_SIZE):
+        super().__init__()
+        self.view = ChartView()
+        layout.addWidget(self.view)
+        self.view.resized.connect(self.on_resized)
+        self.finished.connect(self.present)
+        self.figure = None
+        self.ax = None
+        self.canvas = None
+        self.keys = []
+        self.labels = []
+        self.value_labels = False
+        self.stride = 1
+        self.bucket = None
+        self.bars = []
+        self.texts = []
+        self.baseline = None
+        self.title = None
+        self.condition = threading.Condition()
+        self.pending = None  # (geração, série, título, período, agrupar, largura, altura, escala)
+        self.last_request = None
+        self.images = OrderedDict()  # (cache_key, largura, altura, escala) -> QPixmap
+        self.cache_size = cache_size
+        self.image_key = None  # Chave da imagem do pedido mais recente
+        self.generation = 0
+        self.presented = 0
+        self.loading = False
+        self.ready = False
+        self.closed = False
+
+    @property
+    def idle(self):
+        # Nada pendente nem em andamento: a imagem na tela é a do último pedido
+        return self.presented == self.generation
+
+    def load_in_background(self):
+        if self.loading:
+            return
+        self.loading = True
+        threading.Thread(target=self.worker, daemon=True).start()
+
+    def close(self):
+        # Encerra a thread de desenho (para gráficos de janelas que são fechadas)
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+
+    def request_update(self, series, title, span=None, grouped=True, cache_key=None):
+        # series: lista de (ordinal do dia, valor em centavos) em ordem de data; deve ser uma cópia,
+        # pois é lida em outra thread. span: (primeiro, último ordinal) do período exibido, que define
+        # o agrupamento (padrão: as datas da série). grouped=False mantém uma barra por lançamento
+        # quando o período é curto o bastante para barras diárias
+        self.last_request = (series, title, span, grouped, cache_key)
+        width, height, scale = self.view.width(), self.view.height(), self.view.devicePixelRatioF()
+        self.image_key = None if cache_key is None or self.cache_size <= 0 else (cache_key, width, height, scale)
+        pixmap = self.images.get(self.image_key)
+        with self.condition:
+            self.generation += 1
+            if pixmap is not None:
+                self.pending = None  # O que estiver na fila ficou obsoleto
+            else:
+                self.pending = (self.generation, series, title, span, grouped, width, height, scale)
+                self.condition.notify()
+        if pixmap is not None:
+            self.images.move_to_end(self.image_key)
+            self.display(self.generation, pixmap)
+
+    def on_resized(self):
+        if self.last_request is not None:
+            self.request_update(*self.last_request)
+
+    def present(self, generation, image):
+        if generation != self.generation:
+            return  # Já existe um pedido mais novo a caminho
+        with tracer.span("chart.present"):
+            pixmap = QPixmap.fromImage(image)
+            pixmap.setDevicePixelRatio(self.view.devicePixelRatioF())
+            if self.image_key is not None:
+                self.images[self.image_key] = pixmap
+                if len(self.images) > self.cache_size:
+                    self.images.popitem(last=False)
+            self.display(generation, pixmap)
+
+    def display(self, generation, pixmap):
+        self.view.setPixmap(pixmap)
+        self.presented = generation
+        self.rendered.emit()
+
+    def worker(self):
+        import_matplotlib()
+        self.create_canvas()
+        self.ready = True
+        self.loaded.emit()
+        while True:
+            with self.condition:
+                while self.pending is None and not self.closed:
+                    self.condition.wait()
+                if self.closed:
+                    return
+                job, self.pending = self.pending, None
+            generation, series, title, span, grouped, width, height, scale = job
+            with tracer.span("chart.plot"):
+                self.resize(width, height, scale)
+                self.render(series, title, span, grouped, width)
+            if generation != self.generation:
+                continue  # Superado durante a montagem: não vale a pena rasterizar
+            with tracer.span("chart.draw"):
+                self.canvas.draw()
+                buffer = self.canvas.buffer_rgba()
+                image = QImage(bytes(buffer), buffer.shape[1], buffer.shape[0], QImage.Format_RGBA8888)
+            self.finished.emit(generation, image)  # Entregue na thread da interface (conexão enfileirada)
+
+    def create_canvas(self):
+        import matplotlib.style
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        # Aplicando o tema ao Matplotlib
+        matplotlib.style.use('dark_background')
+        self.figure = Figure()
+        self.ax = self.figure.add_subplot()
+        self.canvas = FigureCanvasAgg(self.figure)
+
+    def resize(self, width, height, scale):
+        dpi = self.figure.dpi
+        size = (max(width, 1) * scale / dpi, max(height, 1) * scale / dpi)
+        if tuple(self.figure.get_size_inches()) != size:
+            self.figure.set_size_inches(*size)
+
+    def render(self, series, title, span=None, grouped=True, width=0):
+        bucket = DAY
+        labels = []
+        if series:
+            first, last = span or (series[0][0], series[-1][0])
+            bucket = choose_bucket(first, last)
+            if grouped or bucket != DAY:
+                series = bucket_series(series, bucket)
+            series = downsample(series, bar_slots(width))
+            detailed = is_detailed(first, last, bucket)
+            labels = [tick_label(ordinal, bucket, detailed) for ordinal, _ in series]
+        keys = [ordinal for ordinal, _ in series]
+        cents = [value for _, value in series]
+        values = [value / 100 for value in cents]
+        show_values = value_labels_fit(len(series), width)
+        stride = tick_stride(len(series), width)
+
+        if not series:
+            self.clear_artists()
+            self.ax.set_xticks([])
+            self.keys = []
+        elif (keys, labels, show_values, stride) == (self.keys, self.labels, self.value_labels, self.stride):
+            # Mesmas barras: atualizar alturas, cores e rótulos no lugar
+            for i, (bar, value, amount) in enumerate(zip(self.bars, values, cents)):
+                if bar.get_height() != value:
+                    bar.set_height(value)
+                    bar.set_color(COLOR_POSITIVE if value >= 0 else COLOR_NEGATIVE)
+                    if show_values:
+                        self.texts[i].set_y(value)
+                        self.texts[i].set_text(format_brl(amount))
+        else:
+            self.rebuild(keys, labels, values, cents, show_values, stride)
+
+        if bucket != self.bucket:
+            self.bucket = bucket
+            self.ax.set_xlabel("Dia" if bucket == DAY else "Semana" if bucket == WEEK else "Mês")
+        if title != self.title:
+            self.title = title
+            self.ax.set_title(title)
+        self.ax.relim()
+        self.ax.autoscale_view()
+
+    def clear_artists(self):
+        for artist in self.bars + self.texts:
+            artist.remove()
+        self.bars = []
+        self.texts = []
+
+    def rebuild(self, keys, labels, values, cents, show_values, stride):
+        # As barras exibidas mudaram: recriar somente as barras e os rótulos
+        self.clear_artists()
+        positions = range(len(values))
+        colors = [COLOR_POSITIVE if value >= 0 else COLOR_NEGATIVE for value in values]
+        self.bars = list(self.ax.bar(positions, values, color=colors, width=0.5))
+        if show_values:
+            self.texts = [self.ax.text(i, value, format_brl(amount), ha='center', va='bottom', fontsize=8,
+                                       color='white') for i, value, amount in zip(positions, values, cents)]
+        self.ax.set_xticks(list(positions)[::stride])
+        self.ax.set_xticklabels(labels[::stride])
+        self.keys = keys
+        self.labels = labels
+        self.value_labels = show_values
+        self.stride = stride
+
+        if self.baseline is None:
+            self.ax.set_ylabel("Valor")
+            self.ax.tick_params(axis='x', rotation=0)
+            self.baseline = self.ax.axhline(0, color='white', linewidth=0.5, linestyle='--')
@@ -0,0 +1,24 @@
+# Descrições codificadas por dicionário. Elas se repetem muito (mercado, aluguel, pix...), então
+# cada texto é guardado uma vez só no DescriptionPool e as colunas dos meses abertos
+# (ledger.MonthEntries) guardam apenas o código (int32)
+
+
+class DescriptionPool:
+    # Dicionário de descrições: texto <-> código inteiro. Os códigos nunca mudam nem são
+    # reaproveitados, então podem ser guardados em qualquer coluna enquanto o pool existir
+    def __init__(self):
+        self.strings = []
+        self.codes = {}
+
+    def __len__(self):
+        return len(self.strings)
+
+    def __getitem__(self, code):
+        return self.strings[code]
+
+    def code(self, text):
+        code = self.codes.get(text)
+        if code is None:
+            code = self.codes[text] = len(self.strings)
+            self.strings.append(text)
+        return code
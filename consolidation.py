@@ -0,0 +1,99 @@
+import multiprocessing, os, sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from database import month_bounds
+from aggregates import MonthAggregates
+from balances import MonthlyBalances
+
+# Visão consolidada de vários livros-caixa (um banco por conta ou empresa).
+# Cada banco é lido e agregado num processo separado; o processo principal só soma
+# os totais por mês e por dia que voltam de cada um
+
+
+class LedgerSummary:
+    # Resultado de um livro-caixa: resumo de todos os meses e os totais diários do mês pedido
+    def __init__(self, path, months, aggregates):
+        self.path = path
+        self.name = os.path.splitext(os.path.basename(path))[0]
+        self.months = months  # (ano, mês, lançamentos, entradas, saídas)
+        self.aggregates = aggregates
+        self.total = sum(income + expenses for _, _, _, income, expenses in months)
+
+
+def month_summaries(conn, path):
+    # (ano, mês, lançamentos, entradas, saídas); bancos anteriores à versão 2 não têm a tabela months
+    tables = {name for name, in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(entries)")}
+    if 'cents' not in columns:
+        raise ValueError(f"{os.path.basename(path)} não é um livro-caixa (ou é de uma versão antiga: "
+                         "abra-o uma vez no programa para atualizá-lo)")
+    if 'months' in tables:
+        return conn.execute("SELECT year, month, entries, income, expenses FROM months ORDER BY year, month").fetchall()
+    return conn.execute("""
+        SELECT CAST(strftime('%Y', ordinal + 1721424.5) AS INTEGER) AS year,
+               CAST(strftime('%m', ordinal + 1721424.5) AS INTEGER) AS month,
+               count(*), sum(max(cents, 0)), sum(min(cents, 0))
+        FROM entries GROUP BY year, month ORDER BY year, month""").fetchall()
+
+
+def summarize_ledger(path, year, month):
+    # Executado nos processos do pool: tudo que volta é serializável.
+    # O banco é aberto só para leitura: sem reaplicar nem apagar o diário de edições de uma janela
+    # que o tenha aberto e sem criar tabelas em bancos que não são livros-caixa
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        months = month_summaries(conn, path)
+        first, last = month_bounds(year, month)
+        aggregates = MonthAggregates()
+        for ordinal, count, total, income, expenses in conn.execute(
+                "SELECT ordinal, count(*), sum(cents), sum(max(cents, 0)), sum(min(cents, 0)) FROM entries "
+                "WHERE ordinal BETWEEN ? AND ? GROUP BY ordinal", (first, last)):
+            aggregates.daily[ordinal] = total
+            aggregates.day_counts[ordinal] = count
+            aggregates.gross += income
+            aggregates.expenses += expenses
+        return LedgerSummary(path, months, aggregates)
+    finally:
+        conn.close()
+
+
+class Consolidation:
+    def __init__(self, year, month, ledgers):
+        self.year = year
+        self.month = month
+        self.ledgers = sorted(ledgers, key=lambda ledger: ledger.name)
+        self.aggregates = MonthAggregates()
+        net = {}
+        for ledger in self.ledgers:
+            self.aggregates.merge(ledger.aggregates)
+            for y, m, _, income, expenses in ledger.months:
+                net[y, m] = net.get((y, m), 0) + income + expenses
+        self.balances = MonthlyBalances((y, m, value) for (y, m), value in net.items())
+
+    def months(self):
+        # (ano, mês) com lançamentos em qualquer um dos livros-caixa
+        return sorted({(y, m) for ledger in self.ledgers for y, m, *_ in ledger.months})
+
+    def opening_balance(self):
+        return self.balances.opening(self.year, self.month)
+
+    def closing_balance(self):
+        return self.balances.closing(self.year, self.month)
+
+    def total_balance(self):
+        return self.balances.total()
+
+
+def process_pool(workers=None):
+    # "spawn": processos novos, sem herdar as threads do Qt e do gráfico por fork
+    return ProcessPoolExecutor(max_workers=workers or os.cpu_count(), mp_context=multiprocessing.get_context('spawn'))
+
+
+def consolidate(paths, year, month, workers=None, executor=None):
+    # workers=1 roda tudo neste processo (útil para comparar com a versão paralela).
+    # Um executor já aberto pode ser reaproveitado entre meses para não recriar os processos
+    if workers == 1 or len(paths) <= 1:
+        return Consolidation(year, month, [summarize_ledger(path, year, month) for path in paths])
+    if executor is not None:
+        return Consolidation(year, month, executor.map(summarize_ledger, paths, [year] * len(paths), [month] * len(paths)))
+    with process_pool(workers) as pool:
+        return Consolidation(year, month, pool.map(summarize_ledger, paths, [year] * len(paths), [month] * len(paths)))
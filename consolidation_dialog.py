@@ -0,0 +1,101 @@
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QTableWidget, QTableWidgetItem, QHeaderView
+)
+from chart import ChartRenderer
+from consolidation import consolidate, process_pool
+from money import format_brl
+from reports_dialog import MONTH_NAMES
+
+
+class ConsolidationDialog(QDialog):
+    # Vários livros-caixa somados: mesmo gráfico e mesmos saldos da janela principal,
+    # mais a parte de cada livro-caixa no mês escolhido.
+    # O pool de processos fica aberto enquanto o diálogo existir para trocar de mês sem recriá-lo
+
+    def __init__(self, paths, year, month, parent=None):
+        super().__init__(parent)
+        self.paths = paths
+        self.setWindowTitle(f"Consolidado - {len(paths)} livros-caixa")
+        self.resize(900, 650)
+        self.executor = process_pool()
+
+        self.month_box = QComboBox()
+        top = QHBoxLayout()
+        top.addWidget(QLabel("Mês"))
+        top.addWidget(self.month_box)
+        top.addStretch()
+
+        self.breakdown = QTableWidget(0, 5)
+        self.breakdown.setHorizontalHeaderLabels(["Livro-caixa", "Entradas", "Saídas", "Saldo do Mês", "Saldo Total"])
+        self.breakdown.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.breakdown.verticalHeader().setVisible(False)
+        self.breakdown.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+
+        chart_layout = QVBoxLayout()
+        self.chart = ChartRenderer(chart_layout)
+        self.chart.load_in_background()
+
+        self.total_expenses_label = QLabel()
+        self.current_month_balance_label = QLabel()
+        self.month_balances_label = QLabel()
+        self.total_balance_label = QLabel()
+        balance_layout = QHBoxLayout()
+        for label in (self.total_expenses_label, self.current_month_balance_label,
+                      self.month_balances_label, self.total_balance_label):
+            balance_layout.addWidget(label)
+
+        layout = QVBoxLayout()
+        layout.addLayout(top)
+        layout.addWidget(self.breakdown, 1)
+        layout.addLayout(chart_layout, 2)
+        layout.addLayout(balance_layout)
+        self.setLayout(layout)
+
+        try:
+            self.load(year, month)
+        except Exception:
+            # Banco ilegível ou que não é um livro-caixa: libera o pool e a thread do gráfico
+            self.chart.close()
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        for y, m in reversed(self.consolidation.months()):
+            self.month_box.addItem(f"{m:02d}/{y} - {MONTH_NAMES[m - 1]}", (y, m))
+        index = self.month_box.findData((year, month))
+        if index >= 0:
+            self.month_box.setCurrentIndex(index)
+        self.month_box.currentIndexChanged.connect(lambda index: self.load(*self.month_box.itemData(index)))
+
+    def load(self, year, month):
+        self.consolidation = consolidate(self.paths, year, month, executor=self.executor)
+        self.update_graphs()
+
+    def update_graphs(self):
+        consolidation = self.consolidation
+        aggregates = consolidation.aggregates
+        title = f"Receitas e Despesas - {MONTH_NAMES[consolidation.month - 1]} de {consolidation.year} (consolidado)"
+
+        self.total_expenses_label.setText(f"Total de Despesas do Mês: {format_brl(aggregates.expenses)}")
+        self.current_month_balance_label.setText(
+            f"Saldo Atual do Mês: {format_brl(aggregates.balance)}   -   Saldo Bruto: {format_brl(aggregates.gross)}")
+        self.month_balances_label.setText(
+            f"Saldo Inicial do Mês: {format_brl(consolidation.opening_balance())}   -   "
+            f"Saldo Final do Mês: {format_brl(consolidation.closing_balance())}")
+        self.total_balance_label.setText(
+            f"Saldo Total de Todos os Meses: {format_brl(consolidation.total_balance())}")
+        self.chart.request_update(aggregates.daily_series(), title)
+
+        self.breakdown.setRowCount(len(consolidation.ledgers))
+        for row, ledger in enumerate(consolidation.ledgers):
+            values = (ledger.name, format_brl(ledger.aggregates.gross), format_brl(ledger.aggregates.expenses),
+                      format_brl(ledger.aggregates.balance), format_brl(ledger.total))
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if column:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.breakdown.setItem(row, column, item)
+
+    def done(self, result):
+        self.chart.close()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        super().done(result)
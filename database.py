@@ -0,0 +1,443 @@
+import os, re, sqlite3
+from contextlib import contextmanager
+from datetime import date
+
+# Caminho padrão do banco (pode ser sobrescrito pela variável de ambiente FINANCIAL_DB)
+DEFAULT_DB_PATH = os.path.join(os.path.expanduser("~"), ".financial-management", "ledger.db")
+
+# Versão do esquema gravada em PRAGMA user_version
+SCHEMA_VERSION = 7
+
+# AUTOINCREMENT: ids nunca são reaproveitados e um INSERT sem id fica sempre acima de
+# sqlite_sequence, onde a janela reserva os blocos de ids do seu diário (veja reserve_ids)
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ordinal INTEGER NOT NULL,
+    description TEXT NOT NULL DEFAULT '',
+    cents INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS entries_ordinal ON entries (ordinal, id);
+
+-- Índice (ano, mês) com o resumo materializado de cada mês, mantido pelos triggers abaixo.
+-- ordinal + 1721424.5 converte o ordinal do Python (0001-01-01 = 1) em dia juliano do SQLite.
+CREATE TABLE IF NOT EXISTS months (
+    year INTEGER NOT NULL,
+    month INTEGER NOT NULL,
+    entries INTEGER NOT NULL DEFAULT 0,
+    income INTEGER NOT NULL DEFAULT 0,
+    expenses INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (year, month)
+) WITHOUT ROWID;
+
+-- Totais por (ano, mês, descrição) para os relatórios de maiores gastos, mantidos pelos mesmos triggers
+CREATE TABLE IF NOT EXISTS descriptions (
+    year INTEGER NOT NULL,
+    month INTEGER NOT NULL,
+    description TEXT NOT NULL,
+    entries INTEGER NOT NULL DEFAULT 0,
+    income INTEGER NOT NULL DEFAULT 0,
+    expenses INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (year, month, description)
+) WITHOUT ROWID;
+
+-- Revisão de cada mês: aumenta a cada inclusão, edição ou exclusão nele e nunca volta (a linha
+-- não é apagada quando o mês fica vazio). Serve de versão para caches fora do processo (api.py)
+CREATE TABLE IF NOT EXISTS revisions (
+    year INTEGER NOT NULL,
+    month INTEGER NOT NULL,
+    revision INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (year, month)
+) WITHOUT ROWID;
+
+-- Lançamentos recorrentes (aluguel, salário, assinaturas) usados na previsão (veja forecast.py).
+-- Uma ocorrência a cada `interval` dias, semanas, meses ou anos a partir de start_ordinal; nos
+-- mensais e anuais, no dia `day` do mês (ou no último dia, em meses mais curtos).
+-- posted_ordinal: até que dia as ocorrências já foram gravadas como lançamentos
+CREATE TABLE IF NOT EXISTS rules (
+    id INTEGER PRIMARY KEY,
+    description TEXT NOT NULL DEFAULT '',
+    cents INTEGER NOT NULL DEFAULT 0,
+    frequency TEXT NOT NULL DEFAULT 'monthly',
+    interval INTEGER NOT NULL DEFAULT 1,
+    day INTEGER NOT NULL DEFAULT 1,
+    start_ordinal INTEGER NOT NULL,
+    end_ordinal INTEGER,
+    posted_ordinal INTEGER
+);
+
+CREATE TRIGGER IF NOT EXISTS months_insert AFTER INSERT ON entries BEGIN
+    INSERT INTO months (year, month, entries, income, expenses)
+    VALUES (CAST(strftime('%Y', NEW.ordinal + 1721424.5) AS INTEGER),
+            CAST(strftime('%m', NEW.ordinal + 1721424.5) AS INTEGER), 1,
+            max(NEW.cents, 0), min(NEW.cents, 0))
+    ON CONFLICT (year, month) DO UPDATE SET
+        entries = entries + 1, income = income + excluded.income, expenses = expenses + excluded.expenses;
+    INSERT INTO descriptions (year, month, description, entries, income, expenses)
+    VALUES (CAST(strftime('%Y', NEW.ordinal + 1721424.5) AS INTEGER),
+            CAST(strftime('%m', NEW.ordinal + 1721424.5) AS INTEGER), NEW.description, 1,
+            max(NEW.cents, 0), min(NEW.cents, 0))
+    ON CONFLICT (year, month, description) DO UPDATE SET
+        entries = entries + 1, income = income + excluded.income, expenses = expenses + excluded.expenses;
+END;
+
+CREATE TRIGGER IF NOT EXISTS months_delete AFTER DELETE ON entries BEGIN
+    UPDATE months SET entries = entries - 1,
+        income = income - max(OLD.cents, 0), expenses = expenses - min(OLD.cents, 0)
+    WHERE year = CAST(strftime('%Y', OLD.ordinal + 1721424.5) AS INTEGER)
+      AND month = CAST(strftime('%m', OLD.ordinal + 1721424.5) AS INTEGER);
+    DELETE FROM months WHERE entries <= 0;
+    UPDATE descriptions SET entries = entries - 1,
+        income = income - max(OLD.cents, 0), expenses = expenses - min(OLD.cents, 0)
+    WHERE year = CAST(strftime('%Y', OLD.ordinal + 1721424.5) AS INTEGER)
+      AND month = CAST(strftime('%m', OLD.ordinal + 1721424.5) AS INTEGER) AND description = OLD.description;
+    DELETE FROM descriptions WHERE entries <= 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS months_update AFTER UPDATE OF ordinal, cents ON entries
+WHEN OLD.ordinal != NEW.ordinal OR OLD.cents != NEW.cents BEGIN
+    UPDATE months SET entries = entries - 1,
+        income = income - max(OLD.cents, 0), expenses = expenses - min(OLD.cents, 0)
+    WHERE year = CAST(strftime('%Y', OLD.ordinal + 1721424.5) AS INTEGER)
+      AND month = CAST(strftime('%m', OLD.ordinal + 1721424.5) AS INTEGER);
+    DELETE FROM months WHERE entries <= 0;
+    INSERT INTO months (year, month, entries, income, expenses)
+    VALUES (CAST(strftime('%Y', NEW.ordinal + 1721424.5) AS INTEGER),
+            CAST(strftime('%m', NEW.ordinal + 1721424.5) AS INTEGER), 1,
+            max(NEW.cents, 0), min(NEW.cents, 0))
+    ON CONFLICT (year, month) DO UPDATE SET
+        entries = entries + 1, income = income + excluded.income, expenses = expenses + excluded.expenses;
+END;
+
+CREATE TRIGGER IF NOT EXISTS descriptions_update AFTER UPDATE OF ordinal, cents, description ON entries
+WHEN OLD.ordinal != NEW.ordinal OR OLD.cents != NEW.cents OR OLD.description != NEW.description BEGIN
+    UPDATE descriptions SET entries = entries - 1,
+        income = income - max(OLD.cents, 0), expenses = expenses - min(OLD.cents, 0)
+    WHERE year = CAST(strftime('%Y', OLD.ordinal + 1721424.5) AS INTEGER)
+      AND month = CAST(strftime('%m', OLD.ordinal + 1721424.5) AS INTEGER) AND description = OLD.description;
+    DELETE FROM descriptions WHERE entries <= 0;
+    INSERT INTO descriptions (year, month, description, entries, income, expenses)
+    VALUES (CAST(strftime('%Y', NEW.ordinal + 1721424.5) AS INTEGER),
+            CAST(strftime('%m', NEW.ordinal + 1721424.5) AS INTEGER), NEW.description, 1,
+            max(NEW.cents, 0), min(NEW.cents, 0))
+    ON CONFLICT (year, month, description) DO UPDATE SET
+        entries = entries + 1, income = income + excluded.income, expenses = expenses + excluded.expenses;
+END;
+
+CREATE TRIGGER IF NOT EXISTS revisions_insert AFTER INSERT ON entries BEGIN
+    INSERT INTO revisions (year, month, revision)
+    VALUES (CAST(strftime('%Y', NEW.ordinal + 1721424.5) AS INTEGER),
+            CAST(strftime('%m', NEW.ordinal + 1721424.5) AS INTEGER), 1)
+    ON CONFLICT (year, month) DO UPDATE SET revision = revision + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS revisions_delete AFTER DELETE ON entries BEGIN
+    INSERT INTO revisions (year, month, revision)
+    VALUES (CAST(strftime('%Y', OLD.ordinal + 1721424.5) AS INTEGER),
+            CAST(strftime('%m', OLD.ordinal + 1721424.5) AS INTEGER), 1)
+    ON CONFLICT (year, month) DO UPDATE SET revision = revision + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS revisions_update AFTER UPDATE OF ordinal, cents, description ON entries
+WHEN OLD.ordinal != NEW.ordinal OR OLD.cents != NEW.cents OR OLD.description != NEW.description BEGIN
+    INSERT INTO revisions (year, month, revision)
+    VALUES (CAST(strftime('%Y', OLD.ordinal + 1721424.5) AS INTEGER),
+            CAST(strftime('%m', OLD.ordinal + 1721424.5) AS INTEGER), 1)
+    ON CONFLICT (year, month) DO UPDATE SET revision = revision + 1;
+    INSERT INTO revisions (year, month, revision)
+    VALUES (CAST(strftime('%Y', NEW.ordinal + 1721424.5) AS INTEGER),
+            CAST(strftime('%m', NEW.ordinal + 1721424.5) AS INTEGER), 1)
+    ON CONFLICT (year, month) DO UPDATE SET revision = revision + 1;
+END;
+"""
+
+# Índice de texto das descrições (FTS5, sem acentos e sem diferenciar maiúsculas), guardado fora
+# do SCHEMA porque algumas compilações do SQLite não têm FTS5: nesse caso a busca usa LIKE
+# Trigger de inclusão separado para que as importações em massa possam desligá-lo (veja add_entries)
+SEARCH_INSERT_TRIGGER = """
+CREATE TRIGGER IF NOT EXISTS entries_search_insert AFTER INSERT ON entries BEGIN
+    INSERT INTO entries_search (rowid, description) VALUES (NEW.id, NEW.description);
+END;
+"""
+
+SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_search USING fts5(
+    description, content='entries', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+""" + SEARCH_INSERT_TRIGGER + """
+
+CREATE TRIGGER IF NOT EXISTS entries_search_delete AFTER DELETE ON entries BEGIN
+    INSERT INTO entries_search (entries_search, rowid, description) VALUES ('delete', OLD.id, OLD.description);
+END;
+
+CREATE TRIGGER IF NOT EXISTS entries_search_update AFTER UPDATE OF description ON entries
+WHEN OLD.description != NEW.description BEGIN
+    INSERT INTO entries_search (entries_search, rowid, description) VALUES ('delete', OLD.id, OLD.description);
+    INSERT INTO entries_search (rowid, description) VALUES (NEW.id, NEW.description);
+END;
+"""
+
+# Resultados de busca devolvidos de uma vez
+SEARCH_LIMIT = 200
+
+search_token_pattern = re.compile(r"\w+")
+
+
+def search_query(text):
+    # "alug sp" -> "alug"* AND "sp"* (prefixo de cada palavra)
+    return " AND ".join(f'"{token}"*' for token in search_token_pattern.findall(text))
+
+
+def month_bounds(year, month):
+    # Primeiro e último ordinal do mês
+    first = date(year, month, 1).toordinal()
+    if month == 12:
+        last = date(year + 1, 1, 1).toordinal() - 1
+    else:
+        last = date(year, month + 1, 1).toordinal() - 1
+    return first, last
+
+
+@contextmanager
+def full_sync(conn):
+    # Transações que precisam estar no disco quando terminam (o banco usa synchronous=NORMAL):
+    # o commit de dentro do bloco é gravado com synchronous=FULL
+    synchronous = conn.execute("PRAGMA synchronous").fetchone()[0]
+    conn.execute("PRAGMA synchronous=FULL")
+    try:
+        yield
+    finally:
+        conn.execute(f"PRAGMA synchronous={synchronous}")
+
+
+class LedgerStore:
+    def __init__(self, path=None, replay=True):
+        if path is None:
+            path = os.environ.get("FINANCIAL_DB", DEFAULT_DB_PATH)
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.migrate()
+        self.conn.executescript(SCHEMA)
+        self.has_search = self.create_search_index()
+        self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        # Edições de uma sessão interrompida antes de serem gravadas (veja journal.py).
+        # replay=False para quem abre o banco ao lado da janela (api.py): o diário é dela
+        if replay:
+            from journal import replay_journal
+            replay_journal(self)
+
+    def migrate(self):
+        # Ajusta bancos criados por versões anteriores antes de aplicar o SCHEMA
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        exists = self.conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'entries'").fetchone()
+        if not exists or version >= SCHEMA_VERSION:
+            return
+        if version < 1:
+            # Versão 1: valores em centavos inteiros no lugar de REAL
+            columns = [row[1] for row in self.conn.execute("PRAGMA table_info(entries)")]
+            if 'value' in columns:
+                with self.conn:
+                    self.conn.execute("ALTER TABLE entries ADD COLUMN cents INTEGER NOT NULL DEFAULT 0")
+                    self.conn.execute("UPDATE entries SET cents = CAST(round(value * 100) AS INTEGER)")
+                    self.conn.execute("ALTER TABLE entries DROP COLUMN value")
+        if version < 2:
+            # Versão 2: totais de entradas e saídas materializados em months (triggers recriados pelo SCHEMA)
+            with self.conn:
+                for trigger in ('months_insert', 'months_delete', 'months_update'):
+                    self.conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+                self.conn.execute("DROP TABLE IF EXISTS months")
+                self.conn.executescript(SCHEMA.split("CREATE TRIGGER", 1)[0])
+                self.conn.execute("""
+                    INSERT INTO months (year, month, entries, income, expenses)
+                    SELECT CAST(strftime('%Y', ordinal + 1721424.5) AS INTEGER) AS year,
+                           CAST(strftime('%m', ordinal + 1721424.5) AS INTEGER) AS month,
+                           count(*), total(max(cents, 0)), total(min(cents, 0))
+                    FROM entries GROUP BY year, month""")
+        if version < 3:
+            # Versão 3: totais por descrição para os relatórios (triggers recriados pelo SCHEMA)
+            with self.conn:
+                for trigger in ('months_insert', 'months_delete', 'months_update'):
+                    self.conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+                self.conn.executescript(SCHEMA.split("CREATE TRIGGER", 1)[0])
+                self.conn.execute("DELETE FROM descriptions")
+                self.conn.execute("""
+                    INSERT INTO descriptions (year, month, description, entries, income, expenses)
+                    SELECT CAST(strftime('%Y', ordinal + 1721424.5) AS INTEGER) AS year,
+                           CAST(strftime('%m', ordinal + 1721424.5) AS INTEGER) AS month,
+                           description, count(*), total(max(cents, 0)), total(min(cents, 0))
+                    FROM entries GROUP BY year, month, description""")
+        # Versão 4: índice de texto entries_search, criado e preenchido por create_search_index
+        # Versão 5: tabela revisions, criada vazia pelo SCHEMA (revisão 0 para os meses existentes)
+        # Versão 6: tabela rules, criada vazia pelo SCHEMA
+        if version < 7:
+            # Versão 7: entries com AUTOINCREMENT (tabela recriada com os mesmos ids, então o índice de
+            # texto continua valendo; índice e triggers recriados pelo SCHEMA e por create_search_index)
+            sql = self.conn.execute("SELECT sql FROM sqlite_master WHERE name = 'entries'").fetchone()[0]
+            if 'AUTOINCREMENT' not in sql.upper():
+                with self.conn:
+                    for (trigger,) in self.conn.execute(
+                            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'entries'").fetchall():
+                        self.conn.execute(f"DROP TRIGGER {trigger}")
+                    self.conn.execute(SCHEMA.split(";", 1)[0].replace("IF NOT EXISTS entries", "entries_autoincrement"))
+                    self.conn.execute("INSERT INTO entries_autoincrement (id, ordinal, description, cents) "
+                                      "SELECT id, ordinal, description, cents FROM entries")
+                    self.conn.execute("DROP TABLE entries")
+                    self.conn.execute("ALTER TABLE entries_autoincrement RENAME TO entries")
+
+    def create_search_index(self):
+        # Cria o índice de texto (e o preenche na primeira vez); False se não houver FTS5
+        exists = self.conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'entries_search'").fetchone()
+        try:
+            self.conn.executescript(SEARCH_SCHEMA)
+        except sqlite3.OperationalError:
+            return False
+        if not exists:
+            with self.conn:
+                self.conn.execute("INSERT INTO entries_search (entries_search) VALUES ('rebuild')")
+        return True
+
+    def close(self):
+        self.conn.close()
+
+    def data_version(self):
+        # Muda quando outra conexão (outro processo, como api.py) grava no banco
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def month_entries(self, year, month):
+        # Consulta por intervalo no índice de ordinais: retorna somente as linhas do mês
+        first, last = month_bounds(year, month)
+        return self.conn.execute(
+            "SELECT id, ordinal, description, cents FROM entries "
+            "WHERE ordinal BETWEEN ? AND ? ORDER BY ordinal, id", (first, last)).fetchall()
+
+    def months(self):
+        # Lista de (ano, mês) com lançamentos, vinda do índice e não das linhas
+        return self.conn.execute("SELECT year, month FROM months ORDER BY year, month").fetchall()
+
+    def month_summaries(self):
+        # Resumo materializado: (ano, mês, lançamentos, entradas, saídas) em centavos
+        return self.conn.execute(
+            "SELECT year, month, entries, income, expenses FROM months ORDER BY year, month").fetchall()
+
+    def search(self, text, limit=SEARCH_LIMIT):
+        # Lançamentos cuja descrição tem palavras começando com cada palavra de `text`,
+        # mais recentes primeiro: (id, ordinal, descrição, centavos)
+        query = search_query(text)
+        if not query:
+            return []
+        if self.has_search:
+            return self.conn.execute(
+                "SELECT entries.id, ordinal, entries.description, cents FROM entries_search "
+                "JOIN entries ON entries.id = entries_search.rowid WHERE entries_search MATCH ? "
+                "ORDER BY ordinal DESC, entries.id DESC LIMIT ?", (query, limit)).fetchall()
+        words = search_token_pattern.findall(text)
+        return self.conn.execute(
+            "SELECT id, ordinal, description, cents FROM entries WHERE "
+            + " AND ".join("description LIKE ?" for _ in words) + " ORDER BY ordinal DESC, id DESC LIMIT ?",
+            [f"%{word}%" for word in words] + [limit]).fetchall()
+
+    def has_month(self, year, month):
+        return self.conn.execute(
+            "SELECT 1 FROM months WHERE year = ? AND month = ?", (year, month)).fetchone() is not None
+
+    def add_entry(self, ordinal, description="", cents=0):
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO entries (ordinal, description, cents) VALUES (?, ?, ?)",
+                (ordinal, description, cents))
+        return cursor.lastrowid
+
+    def reserve_ids(self, count):
+        # Reserva `count` ids seguidos para inclusões com id escolhido fora do banco (o diário da
+        # janela, journal.py) e retorna o primeiro. A sequência do AUTOINCREMENT passa para o fim do
+        # bloco, então nenhum outro INSERT, desta ou de outra conexão (api.py), recebe um desses ids.
+        # Gravada com synchronous=FULL: uma queda não devolve o bloco já usado no diário
+        with full_sync(self.conn), self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            sequence = self.conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'entries'").fetchone()
+            highest = self.conn.execute("SELECT max(id) FROM entries").fetchone()[0] or 0
+            first = max(sequence[0] if sequence else 0, highest) + 1
+            if sequence:
+                self.conn.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = 'entries'", (first + count - 1,))
+            else:
+                self.conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('entries', ?)", (first + count - 1,))
+        return first
+
+    def add_entries(self, batches):
+        # Insere blocos de (ordinal, descrição, centavos) numa única transação;
+        # qualquer exceção durante a iteração desfaz a importação inteira (e religa o trigger).
+        # O índice de texto é preenchido uma vez no fim, sem o trigger de inclusão linha a linha
+        count = 0
+        with self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            if self.has_search:
+                first_id = (self.conn.execute("SELECT max(id) FROM entries").fetchone()[0] or 0) + 1
+                self.conn.execute("DROP TRIGGER IF EXISTS entries_search_insert")
+            for rows in batches:
+                cursor = self.conn.executemany(
+                    "INSERT INTO entries (ordinal, description, cents) VALUES (?, ?, ?)", rows)
+                count += cursor.rowcount
+            if self.has_search:
+                self.conn.execute("INSERT INTO entries_search (rowid, description) "
+                                  "SELECT id, description FROM entries WHERE id >= ?", (first_id,))
+                self.conn.execute(SEARCH_INSERT_TRIGGER)
+        return count
+
+    def add_entry_rows(self, rows):
+        # Várias inclusões de (ordinal, descrição, centavos) numa transação; retorna os ids
+        with self.conn:
+            return [self.conn.execute(
+                "INSERT INTO entries (ordinal, description, cents) VALUES (?, ?, ?)", row).lastrowid for row in rows]
+
+    def update_entries(self, rows):
+        # Várias linhas (id, ordinal, descrição, centavos) numa transação
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE entries SET ordinal = ?, description = ?, cents = ? WHERE id = ?",
+                [(ordinal, description, cents, entry_id) for entry_id, ordinal, description, cents in rows])
+
+    def delete_entries(self, entry_ids):
+        with self.conn:
+            self.conn.executemany("DELETE FROM entries WHERE id = ?", [(entry_id,) for entry_id in entry_ids])
+
+    def rules(self):
+        # Regras de recorrência: (id, descrição, centavos, frequência, intervalo, dia, início, fim, gravado até)
+        return self.conn.execute(
+            "SELECT id, description, cents, frequency, interval, day, start_ordinal, end_ordinal, posted_ordinal "
+            "FROM rules ORDER BY id").fetchall()
+
+    def save_rule(self, rule_id, description, cents, frequency, interval, day, start, end, posted):
+        # Inclui (rule_id None) ou substitui uma regra; retorna o id
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT OR REPLACE INTO rules (id, description, cents, frequency, interval, day, start_ordinal, "
+                "end_ordinal, posted_ordinal) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (rule_id, description, cents, frequency, interval, day, start, end, posted))
+        return cursor.lastrowid if rule_id is None else rule_id
+
+    def delete_rule(self, rule_id):
+        with self.conn:
+            self.conn.execute("DELETE FROM rules WHERE id = ?", (rule_id,))
+
+    def post_rules(self, rows, posted):
+        # Ocorrências de recorrências (ordinal, descrição, centavos) e o novo "gravado até" de cada
+        # regra (id, ordinal) numa única transação: uma queda não deixa regra marcada sem os lançamentos
+        with self.conn:
+            self.conn.executemany("INSERT INTO entries (ordinal, description, cents) VALUES (?, ?, ?)", rows)
+            self.conn.executemany("UPDATE rules SET posted_ordinal = ? WHERE id = ?",
+                                  [(ordinal, rule_id) for rule_id, ordinal in posted])
+        return len(rows)
+
+    def update_entry(self, entry_id, ordinal, description, cents):
+        with self.conn:
+            self.conn.execute(
+                "UPDATE entries SET ordinal = ?, description = ?, cents = ? WHERE id = ?",
+                (ordinal, description, cents, entry_id))
+
+    def delete_entry(self, entry_id):
+        with self.conn:
+            self.conn.execute("DELETE FROM entries WHERE id = ?", (entry_id,))
@@ -0,0 +1,61 @@
+import re
+from datetime import date
+
+# Datas são guardadas como ordinais inteiros (date.toordinal()).
+# Na digitação o formato é "dd/mm/aaaa"; na importação também é aceito "aaaa-mm-dd"
+
+date_pattern = re.compile(r"^\d{2}/\d{2}/\d{4}$")
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def parse_date(text):
+    # Converte "dd/mm/aaaa" em ordinal; lança ValueError com a mensagem para o usuário
+    text = text.strip()
+    if not date_pattern.match(text):
+        raise ValueError("Formato de data inválido. Use dd/mm/aaaa.")
+    try:
+        return date(int(text[6:]), int(text[3:5]), int(text[:2])).toordinal()
+    except ValueError:
+        raise ValueError("Esta data não existe.")
+
+
+def format_date(ordinal):
+    return date.fromordinal(ordinal).strftime("%d/%m/%Y")
+
+
+def parse_date_array(texts):
+    # Versão vetorizada: valida e converte uma coluna inteira de uma vez.
+    # Retorna (ordinais int64, máscara de válidos); datas inválidas ficam com 0
+    import numpy as np
+    texts = np.char.strip(np.asarray(texts, dtype=str))
+    if texts.size == 0:
+        return np.zeros(0, dtype=np.int64), np.ones(0, dtype=bool)
+    valid = np.char.str_len(texts) == 10
+    codes = texts.astype('U10').view(np.uint32).reshape(-1, 10).astype(np.int64)
+    digits = (codes >= 48) & (codes <= 57)
+    codes = codes - 48
+
+    brazilian = (codes[:, 2] == ord('/') - 48) & (codes[:, 5] == ord('/') - 48) \
+        & digits[:, [0, 1, 3, 4, 6, 7, 8, 9]].all(axis=1)
+    iso = (codes[:, 4] == ord('-') - 48) & (codes[:, 7] == ord('-') - 48) \
+        & digits[:, [0, 1, 2, 3, 5, 6, 8, 9]].all(axis=1)
+    valid &= brazilian | iso
+
+    day = np.where(brazilian, codes[:, 0] * 10 + codes[:, 1], codes[:, 8] * 10 + codes[:, 9])
+    month = np.where(brazilian, codes[:, 3] * 10 + codes[:, 4], codes[:, 5] * 10 + codes[:, 6])
+    year = np.where(brazilian,
+                    codes[:, 6] * 1000 + codes[:, 7] * 100 + codes[:, 8] * 10 + codes[:, 9],
+                    codes[:, 0] * 1000 + codes[:, 1] * 100 + codes[:, 2] * 10 + codes[:, 3])
+    valid &= (month >= 1) & (month <= 12) & (year >= 1) & (day >= 1)
+
+    # Valores seguros nas linhas inválidas antes da aritmética de datas
+    year = np.where(valid, year, 1970)
+    month = np.where(valid, month, 1)
+    day = np.where(valid, day, 1)
+    month_start = ((year - 1970) * 12 + month - 1).astype('datetime64[M]')
+    days_in_month = ((month_start + 1).astype('datetime64[D]') - month_start.astype('datetime64[D]')).astype(np.int64)
+    valid &= day <= days_in_month
+
+    ordinals = (month_start.astype('datetime64[D]').astype(np.int64) + day - 1 + EPOCH_ORDINAL)
+    return np.where(valid, ordinals, 0), valid
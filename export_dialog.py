@@ -0,0 +1,55 @@
+import calendar
+from datetime import date
+from PyQt5.QtCore import QDate
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QDateEdit, QDialogButtonBox
+
+# Períodos oferecidos: o mês aberto, o ano do mês aberto ou datas escolhidas
+PERIOD_MONTH, PERIOD_YEAR, PERIOD_CUSTOM = range(3)
+
+
+class ExportDialog(QDialog):
+    # Escolha do intervalo a exportar; o arquivo (e com ele o formato) é escolhido depois
+
+    def __init__(self, year, month, parent=None):
+        super().__init__(parent)
+        self.year, self.month = year, month
+        self.setWindowTitle("Exportar")
+
+        self.period_box = QComboBox()
+        self.period_box.addItems([f"Mês aberto ({month:02d}/{year})", f"Ano de {year}", "Outro período"])
+        self.first_date = QDateEdit(QDate(year, month, 1))
+        self.last_date = QDateEdit(QDate(year, month, calendar.monthrange(year, month)[1]))
+        for edit in (self.first_date, self.last_date):
+            edit.setDisplayFormat("dd/MM/yyyy")
+            edit.setCalendarPopup(True)
+            edit.setEnabled(False)
+        self.period_box.currentIndexChanged.connect(
+            lambda index: [edit.setEnabled(index == PERIOD_CUSTOM) for edit in (self.first_date, self.last_date)])
+
+        dates = QHBoxLayout()
+        dates.addWidget(QLabel("De"))
+        dates.addWidget(self.first_date)
+        dates.addWidget(QLabel("até"))
+        dates.addWidget(self.last_date)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+
+        layout = QVBoxLayout()
+        layout.addWidget(self.period_box)
+        layout.addLayout(dates)
+        layout.addWidget(buttons)
+        self.setLayout(layout)
+
+    def date_range(self):
+        # (primeiro, último ordinal) do período escolhido, em ordem
+        period = self.period_box.currentIndex()
+        if period == PERIOD_MONTH:
+            first = date(self.year, self.month, 1)
+            last = date(self.year, self.month, calendar.monthrange(self.year, self.month)[1])
+        elif period == PERIOD_YEAR:
+            first, last = date(self.year, 1, 1), date(self.year, 12, 31)
+        else:
+            first, last = self.first_date.date().toPyDate(), self.last_date.date().toPyDate()
+        return tuple(sorted((first.toordinal(), last.toordinal())))
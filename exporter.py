@@ -0,0 +1,178 @@
+import csv, os
+from datetime import date
+from database import month_bounds
+from dates import EPOCH_ORDINAL, format_date
+from money import format_brl
+from ledger import entry_type
+
+# Exportação de um intervalo de datas para CSV, Parquet ou XLSX lida do banco em blocos:
+# a memória usada é limitada pelo tamanho do bloco (no Parquet, pelo maior mês) e não pelo
+# tamanho do intervalo. Cada linha leva o tipo (Entrada/Saída) e o saldo acumulado, que parte
+# do saldo de tudo o que veio antes do início do intervalo.
+# pyarrow (Parquet) e openpyxl (XLSX) só são importados quando esses formatos são usados
+CHUNK_SIZE = 5000
+
+CSV, PARQUET, XLSX = "csv", "parquet", "xlsx"
+FORMATS = {".csv": CSV, ".parquet": PARQUET, ".xlsx": XLSX}
+
+HEADER = ("Data", "Descrição", "Valor", "Tipo", "Saldo")
+XLSX_MAX_ROWS = 1048576  # Limite de linhas de uma planilha do Excel (com o cabeçalho)
+XLSX_MONEY_FORMAT = '#,##0.00'
+XLSX_DATE_FORMAT = 'DD/MM/YYYY'
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+class ExportResult:
+    def __init__(self):
+        self.exported = 0
+        self.cancelled = False
+
+
+class SemicolonDialect(csv.excel):
+    # Separador usado pelo Excel em português (a vírgula é o separador decimal)
+    delimiter = ';'
+
+
+def export_format(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FORMATS:
+        raise ValueError(f"Formato não suportado: {extension or path}. Use .csv, .parquet ou .xlsx.")
+    return FORMATS[extension]
+
+
+def opening_balance(conn, first):
+    # Saldo antes do dia `first`: meses anteriores pelo resumo materializado + dias anteriores do mesmo mês
+    day = date.fromordinal(first)
+    months = conn.execute("SELECT coalesce(sum(income + expenses), 0) FROM months WHERE year * 12 + month < ?",
+                          (day.year * 12 + day.month,)).fetchone()[0]
+    days = conn.execute("SELECT coalesce(sum(cents), 0) FROM entries WHERE ordinal BETWEEN ? AND ?",
+                        (day.replace(day=1).toordinal(), first - 1)).fetchone()[0]
+    return months + days
+
+
+def read_chunks(conn, first, last, chunk_size=CHUNK_SIZE):
+    # Blocos de (ordinais, descrições, centavos, saldos) em ordem de data
+    balance = opening_balance(conn, first)
+    cursor = conn.execute("SELECT ordinal, description, cents FROM entries WHERE ordinal BETWEEN ? AND ? "
+                          "ORDER BY ordinal, id", (first, last))
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        ordinals, descriptions, values = (list(column) for column in zip(*rows))
+        balances = []
+        for value in values:
+            balance += value
+            balances.append(balance)
+        yield ordinals, descriptions, values, balances
+
+
+def write_csv(path, chunks):
+    with open(path, 'w', newline='', encoding='utf-8-sig') as file:
+        writer = csv.writer(file, SemicolonDialect)
+        writer.writerow(HEADER)
+        for ordinals, descriptions, values, balances in chunks:
+            writer.writerows((format_date(ordinal), description, format_brl(value), entry_type(value),
+                              format_brl(balance))
+                             for ordinal, description, value, balance in zip(ordinals, descriptions, values, balances))
+            yield len(ordinals)
+
+
+def write_parquet(path, chunks):
+    # Um row group por mês: leitores que filtram por data pulam os meses fora do filtro.
+    # Valores e saldos em centavos (int64), sem arredondamento
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    schema = pa.schema([('data', pa.date32()), ('descricao', pa.string()), ('valor_centavos', pa.int64()),
+                        ('tipo', pa.string()), ('saldo_centavos', pa.int64())])
+    month_end = None  # Último dia do mês em montagem
+    buffered = ([], [], [], [])
+
+    def flush(writer):
+        ordinals, descriptions, values, balances = buffered
+        days = pa.array([ordinal - EPOCH_ORDINAL for ordinal in ordinals], pa.int32()).cast(pa.date32())
+        writer.write_table(pa.table([days, pa.array(descriptions, pa.string()), pa.array(values, pa.int64()),
+                                     pa.array([entry_type(value) for value in values], pa.string()),
+                                     pa.array(balances, pa.int64())], schema=schema),
+                           row_group_size=max(len(ordinals), 1))
+        for column in buffered:
+            column.clear()
+
+    with pq.ParquetWriter(path, schema) as writer:
+        for chunk in chunks:
+            start = 0
+            ordinals = chunk[0]
+            for index, ordinal in enumerate(ordinals):
+                if month_end is None or ordinal > month_end:
+                    for column, values in zip(buffered, chunk):
+                        column.extend(values[start:index])
+                    if buffered[0]:
+                        flush(writer)
+                    day = date.fromordinal(ordinal)
+                    month_end, start = month_bounds(day.year, day.month)[1], index
+            for column, values in zip(buffered, chunk):
+                column.extend(values[start:])
+            yield len(ordinals)
+        if buffered[0]:
+            flush(writer)
+
+
+def write_xlsx(path, chunks):
+    # Modo write-only do openpyxl: as linhas vão para o arquivo sem ficar na memória.
+    # Passando do limite do Excel, continua numa nova planilha
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    workbook = Workbook(write_only=True)
+    sheet = None
+    rows = XLSX_MAX_ROWS
+
+    def cell(value, number_format):
+        written = WriteOnlyCell(sheet, value=value)
+        written.number_format = number_format
+        return written
+
+    for ordinals, descriptions, values, balances in chunks:
+        for ordinal, description, value, balance in zip(ordinals, descriptions, values, balances):
+            if rows == XLSX_MAX_ROWS:
+                sheet = workbook.create_sheet(f"Lançamentos {len(workbook.worksheets) + 1}")
+                sheet.append(HEADER)
+                rows = 1
+            sheet.append([cell(date.fromordinal(ordinal), XLSX_DATE_FORMAT), description,
+                          cell(value / 100, XLSX_MONEY_FORMAT), entry_type(value),
+                          cell(balance / 100, XLSX_MONEY_FORMAT)])
+            rows += 1
+        yield len(ordinals)
+    if sheet is None:
+        workbook.create_sheet("Lançamentos 1").append(HEADER)
+    workbook.save(path)
+
+
+WRITERS = {CSV: write_csv, PARQUET: write_parquet, XLSX: write_xlsx}
+
+
+def export_range(conn, path, first, last, chunk_size=CHUNK_SIZE, progress=None, cancelled=None):
+    # Exporta os lançamentos de `first` a `last` (ordinais, inclusive); o formato vem da extensão.
+    # progress(linhas_gravadas, linhas_totais) é chamado a cada bloco; se cancelled() retornar
+    # True o arquivo incompleto é apagado
+    writer = WRITERS[export_format(path)]
+    total = conn.execute("SELECT count(*) FROM entries WHERE ordinal BETWEEN ? AND ?", (first, last)).fetchone()[0]
+    result = ExportResult()
+    written = writer(path, read_chunks(conn, first, last, chunk_size))
+    try:
+        for count in written:
+            if cancelled is not None and cancelled():
+                raise ExportCancelled()
+            result.exported += count
+            if progress is not None:
+                progress(result.exported, total)
+    except ExportCancelled:
+        result.cancelled = True
+        result.exported = 0
+    finally:
+        written.close()  # Fecha o arquivo também quando interrompido
+    if result.cancelled and os.path.exists(path):
+        os.remove(path)
+    return result
@@ -0,0 +1,129 @@
+import numpy as np
+from datetime import date
+from dates import EPOCH_ORDINAL
+
+# Lançamentos recorrentes e previsão de saldo. As ocorrências de cada regra são geradas com
+# aritmética de datas do NumPy (datetime64) em vez de laços, e viram um vetor de valores por mês
+# do horizonte. A previsão guarda o vetor de cada regra: mudar uma regra só subtrai o vetor
+# antigo e soma o novo. O saldo parte do fechamento real de cada mês (árvore de Fenwick do
+# Ledger), então edições em meses passados entram na previsão sem recalcular as regras
+
+DAILY, WEEKLY, MONTHLY, YEARLY = "daily", "weekly", "monthly", "yearly"
+FREQUENCY_NAMES = {DAILY: "Diária", WEEKLY: "Semanal", MONTHLY: "Mensal", YEARLY: "Anual"}
+
+HORIZON_MONTHS = 12
+MAX_HORIZON = 60
+
+# Passo de cada frequência: em dias (diária, semanal) ou em meses (mensal, anual)
+DAY_STEPS = {DAILY: 1, WEEKLY: 7}
+MONTH_STEPS = {MONTHLY: 1, YEARLY: 12}
+
+
+def month_index(ordinals):
+    # Meses desde 1970-01 de cada ordinal
+    return (np.asarray(ordinals, dtype=np.int64) - EPOCH_ORDINAL).astype('datetime64[D]') \
+        .astype('datetime64[M]').astype(np.int64)
+
+
+class Rule:
+    # Regra de recorrência: `cents` a cada `interval` dias, semanas, meses ou anos a partir de `start`
+    # (ordinal) até `end` (ordinal ou None). Nas mensais e anuais a data é o dia `day` do mês, ou o
+    # último dia nos meses mais curtos. `posted`: último dia já gravado como lançamento
+    def __init__(self, description, cents, frequency=MONTHLY, interval=1, day=None, start=None, end=None,
+                 posted=None, rule_id=None):
+        if frequency not in FREQUENCY_NAMES:
+            raise ValueError(f"Frequência desconhecida: {frequency}")
+        self.id = rule_id
+        self.description = description
+        self.cents = cents
+        self.frequency = frequency
+        self.interval = max(int(interval), 1)
+        self.start = start if start is not None else date.today().toordinal()
+        self.day = day or date.fromordinal(self.start).day
+        self.end = end
+        self.posted = posted
+
+    @classmethod
+    def from_row(cls, row):
+        rule_id, description, cents, frequency, interval, day, start, end, posted = row
+        return cls(description, cents, frequency, interval, day, start, end, posted, rule_id)
+
+    def row(self):
+        return (self.id, self.description, self.cents, self.frequency, self.interval, self.day,
+                self.start, self.end, self.posted)
+
+    def next_ordinal(self):
+        # Primeiro dia ainda não gravado
+        return self.start if self.posted is None else max(self.start, self.posted + 1)
+
+    def occurrences(self, first, last):
+        # Ordinais (int64, em ordem) das ocorrências entre `first` e `last`, inclusive
+        first = max(first, self.start)
+        if self.end is not None:
+            last = min(last, self.end)
+        if first > last:
+            return np.zeros(0, dtype=np.int64)
+        if self.frequency in DAY_STEPS:
+            step = DAY_STEPS[self.frequency] * self.interval
+            k = np.arange(-(-(first - self.start) // step), (last - self.start) // step + 1, dtype=np.int64)
+            return self.start + k * step
+        step = MONTH_STEPS[self.frequency] * self.interval
+        start_month = int(month_index(self.start))
+        k = np.arange(max((int(month_index(first)) - start_month) // step, 0),
+                      (int(month_index(last)) - start_month) // step + 1, dtype=np.int64)
+        months = (start_month + k * step).astype('datetime64[M]')
+        month_start = months.astype('datetime64[D]')
+        days_in_month = ((months + 1).astype('datetime64[D]') - month_start).astype(np.int64)
+        ordinals = month_start.astype(np.int64) + np.minimum(self.day, days_in_month) - 1 + EPOCH_ORDINAL
+        return ordinals[(ordinals >= first) & (ordinals <= last)]
+
+
+class Forecast:
+    # Entradas e saídas recorrentes ainda não gravadas em cada mês de `months` meses a partir do mês
+    # de `today`. Ocorrências atrasadas (dias já passados e ainda não gravados) contam no primeiro mês
+    def __init__(self, rules, today, months=HORIZON_MONTHS):
+        self.today = today.toordinal()
+        self.months = min(max(months, 1), MAX_HORIZON)
+        self.first_month = int(month_index(self.today))
+        self.last = int((np.datetime64(self.first_month + self.months, 'M').astype('datetime64[D]')
+                         .astype(np.int64)) - 1 + EPOCH_ORDINAL)
+        self.income = np.zeros(self.months, dtype=np.int64)
+        self.expenses = np.zeros(self.months, dtype=np.int64)
+        self.vectors = {}  # id da regra -> valores por mês
+        for rule in rules:
+            self.set_rule(rule)
+
+    def rule_vector(self, rule):
+        ordinals = rule.occurrences(rule.next_ordinal(), self.last)
+        index = np.maximum(month_index(ordinals) - self.first_month, 0)
+        return np.bincount(index, minlength=self.months).astype(np.int64) * rule.cents
+
+    def apply(self, vector, sign):
+        self.income += sign * np.maximum(vector, 0)
+        self.expenses += sign * np.minimum(vector, 0)
+
+    def set_rule(self, rule):
+        # Regra incluída ou alterada (também quando ocorrências são gravadas)
+        self.remove_rule(rule.id)
+        vector = self.rule_vector(rule)
+        self.vectors[rule.id] = vector
+        self.apply(vector, 1)
+
+    def remove_rule(self, rule_id):
+        vector = self.vectors.pop(rule_id, None)
+        if vector is not None:
+            self.apply(vector, -1)
+
+    def month_keys(self):
+        # (ano, mês de 0 a 11) de cada mês do horizonte
+        first = self.first_month + 1970 * 12
+        return [divmod(key, 12) for key in range(first, first + self.months)]
+
+    def rows(self, balances):
+        # (ano, mês, entradas previstas, saídas previstas, saldo previsto): o saldo é o fechamento real
+        # do mês (lançamentos já gravados, inclusive datas futuras) mais as recorrências acumuladas
+        closings = np.array([balances.closing(year, month + 1) for year, month in self.month_keys()], dtype=np.int64)
+        projected = closings + np.cumsum(self.income + self.expenses)
+        return [(year, month + 1, int(income), int(expenses), int(balance))
+                for (year, month), income, expenses, balance
+                in zip(self.month_keys(), self.income, self.expenses, projected)]
@@ -0,0 +1,161 @@
+from datetime import date
+from PyQt5.QtCore import Qt, QDate
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QSpinBox, QTabWidget, QTableWidget, QTableWidgetItem, QHeaderView,
+    QWidget, QLineEdit, QComboBox, QDateEdit, QCheckBox, QPushButton, QMessageBox, QAbstractItemView
+)
+from forecast import Rule, MONTHLY, FREQUENCY_NAMES, HORIZON_MONTHS, MAX_HORIZON
+from ledger import LedgerError, parse_value
+from money import format_brl
+from dates import format_date
+from reports_dialog import MONTH_NAMES
+
+
+class ForecastDialog(QDialog):
+    # Lançamentos recorrentes e saldo previsto; cada regra incluída ou removida atualiza a previsão
+    # só com o vetor dela (veja forecast.py)
+
+    def __init__(self, ledger, parent=None):
+        super().__init__(parent)
+        self.ledger = ledger
+        self.setWindowTitle("Previsão")
+        self.resize(760, 500)
+
+        self.tabs = QTabWidget()
+
+        # Recorrências: tabela das regras e formulário de inclusão
+        self.rules = QTableWidget(0, 6)
+        self.rules.setHorizontalHeaderLabels(["Descrição", "Valor", "Frequência", "A cada", "Início", "Fim"])
+        self.rules.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.rules.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.rules.verticalHeader().setVisible(False)
+        self.rules.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+
+        self.description = QLineEdit()
+        self.description.setPlaceholderText("Descrição (aluguel, salário...)")
+        self.value = QLineEdit()
+        self.value.setPlaceholderText("Valor (ex.: -1500,00)")
+        self.frequency = QComboBox()
+        for frequency, name in FREQUENCY_NAMES.items():
+            self.frequency.addItem(name, frequency)
+        self.frequency.setCurrentIndex(list(FREQUENCY_NAMES).index(MONTHLY))
+        self.interval = QSpinBox()
+        self.interval.setRange(1, 365)
+        self.start_date = QDateEdit(QDate.currentDate())
+        self.end_date = QDateEdit(QDate.currentDate().addYears(1))
+        for edit in (self.start_date, self.end_date):
+            edit.setDisplayFormat("dd/MM/yyyy")
+            edit.setCalendarPopup(True)
+        self.has_end = QCheckBox("Até")
+        self.end_date.setEnabled(False)
+        self.has_end.toggled.connect(self.end_date.setEnabled)
+
+        form = QHBoxLayout()
+        form.addWidget(self.description, 2)
+        form.addWidget(self.value, 1)
+        form.addWidget(self.frequency)
+        form.addWidget(QLabel("a cada"))
+        form.addWidget(self.interval)
+        form.addWidget(QLabel("desde"))
+        form.addWidget(self.start_date)
+        form.addWidget(self.has_end)
+        form.addWidget(self.end_date)
+
+        add_button = QPushButton("Adicionar")
+        remove_button = QPushButton("Remover selecionadas")
+        add_button.clicked.connect(self.add_rule)
+        remove_button.clicked.connect(self.remove_rules)
+        buttons = QHBoxLayout()
+        buttons.addStretch()
+        buttons.addWidget(add_button)
+        buttons.addWidget(remove_button)
+
+        rules_page = QWidget()
+        rules_layout = QVBoxLayout()
+        rules_layout.addWidget(self.rules)
+        rules_layout.addLayout(form)
+        rules_layout.addLayout(buttons)
+        rules_page.setLayout(rules_layout)
+        self.tabs.addTab(rules_page, "Recorrências")
+
+        # Previsão mês a mês
+        self.horizon = QSpinBox()
+        self.horizon.setRange(HORIZON_MONTHS, MAX_HORIZON)
+        self.horizon.setSuffix(" meses")
+        self.projection = QTableWidget(0, 4)
+        self.projection.setHorizontalHeaderLabels(["Mês", "Entradas previstas", "Saídas previstas", "Saldo previsto"])
+        self.projection.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.projection.verticalHeader().setVisible(False)
+        self.projection.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+
+        horizon = QHBoxLayout()
+        horizon.addWidget(QLabel("Horizonte"))
+        horizon.addWidget(self.horizon)
+        horizon.addStretch()
+        projection_page = QWidget()
+        projection_layout = QVBoxLayout()
+        projection_layout.addLayout(horizon)
+        projection_layout.addWidget(self.projection)
+        projection_page.setLayout(projection_layout)
+        self.tabs.addTab(projection_page, "Saldo previsto")
+
+        layout = QVBoxLayout()
+        layout.addWidget(self.tabs)
+        self.setLayout(layout)
+        self.fill_rules()
+        self.refresh()
+        self.horizon.valueChanged.connect(self.refresh)
+
+    def fill_rules(self):
+        self.rule_ids = []
+        rules = self.ledger.rules()
+        self.rules.setRowCount(len(rules))
+        for row, rule in enumerate(rules):
+            self.rule_ids.append(rule.id)
+            values = (rule.description, format_brl(rule.cents), FREQUENCY_NAMES[rule.frequency], str(rule.interval),
+                      format_date(rule.start), "-" if rule.end is None else format_date(rule.end))
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if column in (1, 3):
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.rules.setItem(row, column, item)
+
+    def refresh(self):
+        rows = self.ledger.forecast(self.horizon.value())
+        self.projection.setRowCount(len(rows))
+        for row, (year, month, income, expenses, balance) in enumerate(rows):
+            values = (f"{MONTH_NAMES[month - 1]} de {year}", format_brl(income), format_brl(expenses), format_brl(balance))
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if column:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                if column == 3 and balance < 0:
+                    item.setForeground(Qt.red)
+                self.projection.setItem(row, column, item)
+
+    def add_rule(self):
+        try:
+            cents = parse_value(self.value.text())
+        except LedgerError as error:
+            QMessageBox.warning(self, "Previsão", str(error))
+            return
+        start = self.start_date.date().toPyDate().toordinal()
+        end = self.end_date.date().toPyDate().toordinal() if self.has_end.isChecked() else None
+        if end is not None and end < start:
+            QMessageBox.warning(self, "Previsão", "O fim da recorrência é anterior ao início.")
+            return
+        self.ledger.save_rule(Rule(self.description.text().strip(), cents, self.frequency.currentData(),
+                                   self.interval.value(), date.fromordinal(start).day, start, end))
+        self.description.clear()
+        self.value.clear()
+        self.fill_rules()
+        self.refresh()
+
+    def remove_rules(self):
+        rows = sorted({index.row() for index in self.rules.selectionModel().selectedRows()})
+        if not rows:
+            return
+        for row in rows:
+            self.ledger.delete_rule(self.rule_ids[row])
+        self.fill_rules()
+        self.refresh()
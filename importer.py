@@ -0,0 +1,257 @@
+import codecs, csv, os, re, unicodedata
+import numpy as np
+from money import parse_brl_array
+from dates import parse_date_array
+
+# Importação de extratos (CSV/OFX) lida em blocos: a memória usada é limitada
+# pelo tamanho do bloco e não pelo tamanho do arquivo
+CHUNK_SIZE = 5000
+READ_BLOCK_SIZE = 64 * 1024
+MAX_REPORTED_ERRORS = 100
+
+decimal_point_pattern = re.compile(r"^[+-]?\d+(\.\d+)?$")
+ofx_tag_pattern = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<]*)")
+
+# Nomes de colunas reconhecidos no cabeçalho do CSV (sem acentos, minúsculos)
+CSV_COLUMNS = {
+    'date': ('data', 'date', 'dt', 'data lancamento', 'data do lancamento'),
+    'description': ('descricao', 'description', 'historico', 'lancamento', 'memo', 'detalhes'),
+    'value': ('valor', 'value', 'amount', 'quantia', 'valor (r$)'),
+}
+
+_match_decimal_point = np.frompyfunc(lambda text: decimal_point_pattern.match(text) is not None, 1, 1)
+
+
+class SemicolonDialect(csv.excel):
+    delimiter = ';'
+
+
+class TabDialect(csv.excel):
+    delimiter = '\t'
+
+
+# Em ordem de preferência no empate: em pt-BR a vírgula é o separador decimal dos valores
+CSV_DIALECTS = (SemicolonDialect, TabDialect, csv.excel)
+
+
+class ImportCancelled(Exception):
+    pass
+
+
+class ImportResult:
+    def __init__(self):
+        self.imported = 0
+        self.rejected = 0
+        self.errors = []  # (linha, motivo), limitado a MAX_REPORTED_ERRORS
+        self.cancelled = False
+
+    def reject(self, line, reason):
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, reason))
+
+
+def normalize(text):
+    text = unicodedata.normalize('NFKD', text.strip().lower())
+    return ''.join(char for char in text if not unicodedata.combining(char))
+
+
+def detect_encoding(sample):
+    # Extratos de bancos brasileiros costumam vir em UTF-8 ou Windows-1252
+    try:
+        sample.decode('utf-8-sig')
+    except UnicodeDecodeError as error:
+        # Um caractere multibyte cortado no fim da amostra não conta
+        if error.start < len(sample) - 3:
+            return 'cp1252'
+    return 'utf-8-sig'
+
+
+def parse_amount_array(texts):
+    # Valores pt-BR ("1.234,56") e, como alternativa, ponto decimal sem milhares ("-1234.56")
+    texts = np.char.strip(np.asarray(texts, dtype=str))
+    cents, valid = parse_brl_array(texts)
+    if texts.size and not valid.all():
+        decimal = ~valid & _match_decimal_point(texts).astype(bool)
+        if decimal.any():
+            cents[decimal] = decimal_cents(texts[decimal])
+            valid |= decimal
+    return cents, valid
+
+
+def parse_decimal_array(texts):
+    # Valores do OFX: sempre com ponto decimal e sem separador de milhares ("-1.500" é -1,50)
+    texts = np.char.strip(np.asarray(texts, dtype=str))
+    valid = _match_decimal_point(texts).astype(bool) if texts.size else np.ones(0, dtype=bool)
+    cents = np.zeros(texts.size, dtype=np.int64)
+    cents[valid] = decimal_cents(texts[valid])
+    return cents, valid
+
+
+def decimal_cents(texts):
+    amounts = texts.astype(np.float64)
+    return (np.sign(amounts) * np.floor(np.abs(amounts) * 100 + 0.5)).astype(np.int64)
+
+
+def header_columns(row):
+    # Colunas de um cabeçalho reconhecido pelos nomes (CSV_COLUMNS); None se a linha não é cabeçalho
+    names = [normalize(cell) for cell in row]
+    columns = {}
+    for key, synonyms in CSV_COLUMNS.items():
+        for index, name in enumerate(names):
+            if name in synonyms:
+                columns[key] = index
+                break
+    return columns or None
+
+
+def detect_dialect(text, complete=True):
+    # O separador que, nas linhas da amostra, dá uma data válida na coluna da data e ao menos
+    # três colunas. O Sniffer sozinho escolhe a vírgula em "01/05/2024;Mercado;-1.234,56"
+    lines = text.splitlines()
+    if not complete and len(lines) > 1:
+        lines = lines[:-1]  # Amostra do começo do arquivo: a última linha pode estar cortada
+    lines = lines[:200]
+    best, best_score = None, 0
+    for dialect in CSV_DIALECTS:
+        rows = [row for row in csv.reader(lines, dialect) if row and ''.join(row).strip()]
+        if not rows:
+            continue
+        columns = header_columns(rows[0])
+        date_column = columns.get('date', 0) if columns else 0
+        body = rows[1:] if columns else rows
+        dates = [row[date_column] if len(row) > date_column else '' for row in body if len(row) >= 3]
+        score = int(parse_date_array(dates)[1].sum()) if dates else 0
+        if score > best_score:
+            best, best_score = dialect, score
+    if best is not None:
+        return best
+    try:
+        return csv.Sniffer().sniff(text[:4096], delimiters=';,\t')
+    except csv.Error:
+        return SemicolonDialect
+
+
+def read_csv_chunks(path, chunk_size=CHUNK_SIZE):
+    # Gera (linhas, datas, descrições, valores, posição em bytes) a cada chunk_size linhas
+    with open(path, 'rb') as file:
+        sample = file.read(READ_BLOCK_SIZE)
+        file.seek(0)
+        encoding = detect_encoding(sample)
+        dialect = detect_dialect(sample.decode(encoding, errors='replace'), len(sample) < READ_BLOCK_SIZE)
+
+        position = 0
+
+        def lines():
+            nonlocal position
+            for line in file:
+                position += len(line)
+                yield line.decode(encoding, errors='replace')
+
+        reader = csv.reader(lines(), dialect)
+        columns = {'date': 0, 'description': 1, 'value': 2}
+        numbers, rows = [], []
+        for line_number, row in enumerate(reader, start=1):
+            if not row or not ''.join(row).strip():
+                continue
+            if line_number == 1:
+                # Cabeçalho só quando os nomes das colunas são reconhecidos; senão é a primeira linha de dados
+                header = header_columns(row)
+                if header is not None:
+                    columns.update(header)
+                    continue
+            numbers.append(line_number)
+            rows.append(row)
+            if len(rows) >= chunk_size:
+                yield split_columns(numbers, rows, columns) + (position,)
+                numbers, rows = [], []
+        if rows:
+            yield split_columns(numbers, rows, columns) + (position,)
+
+
+def split_columns(numbers, rows, columns):
+    # Transforma as linhas do bloco em colunas (linhas curtas ficam com '')
+    width = max(columns.values()) + 1
+    rows = [row if len(row) >= width else row + [''] * (width - len(row)) for row in rows]
+    return (numbers,
+            [row[columns['date']] for row in rows],
+            [row[columns['description']].strip() for row in rows],
+            [row[columns['value']] for row in rows])
+
+
+def read_ofx_chunks(path, chunk_size=CHUNK_SIZE):
+    # OFX (SGML ou XML): cada <STMTTRN> vira um lançamento; o arquivo é lido em blocos
+    with open(path, 'rb') as file:
+        encoding = detect_encoding(file.read(READ_BLOCK_SIZE))
+        file.seek(0)
+        position = 0
+        buffer = ''
+        decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        transaction = None
+        count = 0
+        chunk = ([], [], [], [])
+        while True:
+            block = file.read(READ_BLOCK_SIZE)
+            position += len(block)
+            if block:
+                buffer += decoder.decode(block)
+                # Processar somente até o último '<' (a tag seguinte pode estar incompleta)
+                cut = buffer.rfind('<')
+                text, buffer = buffer[:cut], buffer[cut:]
+            else:
+                text, buffer = buffer, ''
+            for closing, tag, value in ofx_tag_pattern.findall(text):
+                tag = tag.upper()
+                if tag == 'STMTTRN':
+                    if closing and transaction is not None:
+                        count += 1
+                        posted = transaction.get('DTPOSTED', '')[:8]
+                        chunk[0].append(count)
+                        chunk[1].append(f"{posted[:4]}-{posted[4:6]}-{posted[6:8]}")
+                        chunk[2].append(transaction.get('MEMO') or transaction.get('NAME', ''))
+                        chunk[3].append(transaction.get('TRNAMT', '').replace(',', '.'))
+                        transaction = None
+                        if len(chunk[0]) >= chunk_size:
+                            yield chunk + (position,)
+                            chunk = ([], [], [], [])
+                    elif not closing:
+                        transaction = {}
+                elif transaction is not None and not closing:
+                    transaction[tag] = value.strip()
+            if not block:
+                break
+        if chunk[0]:
+            yield chunk + (position,)
+
+
+def import_statement(store, path, chunk_size=CHUNK_SIZE, progress=None, cancelled=None):
+    # Valida cada bloco de uma vez e grava tudo numa única transação.
+    # progress(bytes_lidos, bytes_totais) é chamado a cada bloco; se cancelled() retornar
+    # True a transação é desfeita e nada é importado
+    total = os.path.getsize(path)
+    ofx = path.lower().endswith('.ofx')
+    reader = read_ofx_chunks if ofx else read_csv_chunks
+    parse_amounts = parse_decimal_array if ofx else parse_amount_array
+    result = ImportResult()
+
+    def batches():
+        for line_numbers, dates, descriptions, values, position in reader(path, chunk_size):
+            if cancelled is not None and cancelled():
+                raise ImportCancelled()
+            ordinals, dates_ok = parse_date_array(dates)
+            cents, values_ok = parse_amounts(values)
+            ok = dates_ok & values_ok
+            for index in np.flatnonzero(~ok):
+                reason = "data inválida" if not dates_ok[index] else "valor inválido"
+                result.reject(line_numbers[index], reason)
+            rows = zip(ordinals[ok].tolist(), np.asarray(descriptions, dtype=object)[ok].tolist(), cents[ok].tolist())
+            yield rows
+            if progress is not None:
+                progress(position, total)
+
+    try:
+        result.imported = store.add_entries(batches())
+    except ImportCancelled:
+        result.cancelled = True
+        result.imported = 0
+    return result
@@ -0,0 +1,172 @@
+import functools, json, os, threading, time
+from collections import deque
+
+# Instrumentação opcional dos caminhos quentes (desligada por padrão).
+# Ativada por --trace ARQUIVO ou pela variável de ambiente FINANCIAL_TRACE=ARQUIVO:
+# conta chamadas, monta histogramas de latência e guarda spans aninhados que podem ser
+# exportados no formato de trace do Chrome (chrome://tracing ou https://ui.perfetto.dev)
+
+# Limites superiores dos baldes do histograma, em ms (o último balde é "acima de 1000 ms")
+HISTOGRAM_BOUNDS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+# Spans guardados para exportação (os mais antigos são descartados)
+MAX_SPANS = 200000
+
+
+class SpanStats:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0  # ms
+        self.max = 0.0
+        self.last = 0.0
+        self.histogram = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+
+    def add(self, duration):
+        self.count += 1
+        self.total += duration
+        self.last = duration
+        self.max = max(self.max, duration)
+        bucket = 0
+        while bucket < len(HISTOGRAM_BOUNDS) and duration > HISTOGRAM_BOUNDS[bucket]:
+            bucket += 1
+        self.histogram[bucket] += 1
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, fraction):
+        # Estimativa pelo limite superior do balde (o último balde usa o máximo observado)
+        target = fraction * self.count
+        seen = 0
+        for bucket, amount in enumerate(self.histogram):
+            seen += amount
+            if amount and seen >= target:
+                return min(HISTOGRAM_BOUNDS[bucket], self.max) if bucket < len(HISTOGRAM_BOUNDS) else self.max
+        return 0.0
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'total_ms': round(self.total, 3),
+            'mean_ms': round(self.mean, 3),
+            'max_ms': round(self.max, 3),
+            'p95_ms': self.percentile(0.95),
+            'histogram': dict(zip([f"<={bound}" for bound in HISTOGRAM_BOUNDS] + [f">{HISTOGRAM_BOUNDS[-1]}"],
+                                  self.histogram)),
+        }
+
+
+class Tracer:
+    def __init__(self):
+        self.enabled = False
+        self.origin = time.perf_counter_ns()
+        self.stats = {}
+        self.spans = deque(maxlen=MAX_SPANS)  # (nome, início ns, duração ns, thread, profundidade)
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+
+    def reset(self):
+        with self.lock:
+            self.stats.clear()
+            self.spans.clear()
+
+    def span(self, name):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def record(self, name, start, end, depth):
+        duration = (end - start) / 1e6
+        with self.lock:
+            stats = self.stats.get(name)
+            if stats is None:
+                stats = self.stats[name] = SpanStats()
+            stats.add(duration)
+            self.spans.append((name, start, end - start, threading.get_ident(), depth))
+
+    def summary(self):
+        with self.lock:
+            return {name: stats.as_dict() for name, stats in self.stats.items()}
+
+    def format_summary(self):
+        lines = [f"{'span':<32} {'chamadas':>8} {'média ms':>9} {'p95 ms':>8} {'máx ms':>9}"]
+        with self.lock:
+            ordered = sorted(self.stats.items(), key=lambda item: item[1].total, reverse=True)
+            for name, stats in ordered:
+                lines.append(f"{name:<32} {stats.count:>8} {stats.mean:>9.2f} {stats.percentile(0.95):>8.2f} {stats.max:>9.2f}")
+        return "\n".join(lines)
+
+    def chrome_trace(self):
+        # Eventos "X" (duração completa); os aninhados são desenhados pela sobreposição de tempo
+        pid = os.getpid()
+        with self.lock:
+            spans = list(self.spans)
+            summary = {name: stats.as_dict() for name, stats in self.stats.items()}
+        events = [{
+            'name': name,
+            'cat': name.split('.', 1)[0],
+            'ph': 'X',
+            'ts': (start - self.origin) / 1000,
+            'dur': duration / 1000,
+            'pid': pid,
+            'tid': thread,
+            'args': {'depth': depth},
+        } for name, start, duration, thread, depth in spans]
+        return {'traceEvents': events, 'displayTimeUnit': 'ms', 'otherData': {'summary': summary}}
+
+    def export_chrome_trace(self, path):
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.chrome_trace(), file)
+
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'start', 'depth')
+
+    def __init__(self, tracer, name):
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self):
+        local = self.tracer.local
+        self.depth = getattr(local, 'depth', 0)
+        local.depth = self.depth + 1
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        end = time.perf_counter_ns()
+        self.tracer.local.depth = self.depth
+        self.tracer.record(self.name, self.start, end, self.depth)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+tracer = Tracer()
+
+
+def traced(name):
+    # Decorador: com a instrumentação desligada o custo é um único teste de atributo
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return function(*args, **kwargs)
+            with _Span(tracer, name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
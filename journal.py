@@ -0,0 +1,231 @@
+import json, os
+from database import full_sync
+
+# Gravação adiada (write-behind) das edições da janela.
+# Cada inclusão/edição/exclusão é acrescentada a um diário ao lado do banco (uma linha JSON,
+# gravada em disco com fdatasync antes de a edição ser confirmada) e aplicada ao SQLite
+# depois, em lote, numa única transação: após uma pausa nas edições (flush chamado pela
+# janela), quando o lote atinge BATCH_SIZE, antes de qualquer leitura e ao fechar.
+# Essa transação é gravada com synchronous=FULL (o banco usa NORMAL): o diário só é esvaziado
+# depois que ela está no disco, então nem uma queda de energia perde uma edição confirmada.
+# Se o programa cair antes disso, o diário é reaplicado na próxima abertura do banco.
+# Os ids das inclusões vêm de blocos reservados no banco (LedgerStore.reserve_ids): nenhum outro
+# processo (api.py) recebe esses ids, então uma inclusão nunca encontra a linha de outro.
+# Nenhuma operação sobrescreve uma linha que o diário não criou: inclusões são INSERT (na
+# reaplicação, um id que já existe é de um lote gravado pouco antes da queda e fica como está)
+# e edições são UPDATE (uma linha excluída por outro processo não volta)
+
+JOURNAL_SUFFIX = "-edits"
+BATCH_SIZE = 200
+ID_BLOCK = 1024  # Ids reservados de cada vez para as inclusões da janela
+
+INSERT = "INSERT INTO entries (id, ordinal, description, cents) VALUES (?, ?, ?, ?)"
+INSERT_MISSING = INSERT + " ON CONFLICT (id) DO NOTHING"
+UPDATE = "UPDATE entries SET ordinal = ?, description = ?, cents = ? WHERE id = ?"
+
+
+# fdatasync não existe no macOS nem no Windows
+sync_file = getattr(os, 'fdatasync', os.fsync)
+
+
+def journal_path(db_path):
+    return None if db_path == ":memory:" else db_path + JOURNAL_SUFFIX
+
+
+def sync_directory(path):
+    # Grava no disco a entrada do diário recém-criado na pasta (não há como no Windows)
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def read_journal(path):
+    # Operações na ordem em que foram feitas; uma última linha cortada pela queda é ignorada
+    operations = []
+    if path is None or not os.path.exists(path):
+        return operations
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            try:
+                operations.append(json.loads(line))
+            except ValueError:
+                break
+    return operations
+
+
+def apply_operations(conn, operations, replay=False):
+    # Mantém só o estado final de cada id e grava tudo numa transação, que chega ao disco antes de
+    # o diário ser esvaziado. Na reaplicação (replay) o lote pode ter sido gravado pouco antes da queda
+    final = {}
+    added = set()  # Ids incluídos neste lote
+    for operation in operations:
+        if operation['op'] == 'add':
+            added.add(operation['id'])
+        final[operation['id']] = operation
+    rows = {entry_id: (operation['ordinal'], operation['description'], operation['cents'])
+            for entry_id, operation in final.items() if operation['op'] != 'delete'}
+    with full_sync(conn), conn:
+        conn.executemany(INSERT_MISSING if replay else INSERT,
+                         [(entry_id,) + row for entry_id, row in rows.items() if entry_id in added])
+        conn.executemany(UPDATE, [row + (entry_id,) for entry_id, row in rows.items() if entry_id not in added])
+        conn.executemany("DELETE FROM entries WHERE id = ?",
+                         [(entry_id,) for entry_id, operation in final.items()
+                          if operation['op'] == 'delete' and entry_id not in added])
+    return len(final)
+
+
+def replay_journal(store):
+    # Chamado ao abrir o banco: aplica um diário deixado por uma sessão interrompida
+    path = journal_path(store.path)
+    operations = read_journal(path)
+    if operations:
+        apply_operations(store.conn, operations, replay=True)
+    if path is not None and os.path.exists(path):
+        os.remove(path)
+    return len(operations)
+
+
+class WriteBehindStore:
+    # Mesma interface do LedgerStore; as escritas vão para o diário e os ids são
+    # alocados aqui, de um bloco reservado no banco, para que add_entry não precise esperar o flush.
+    # schedule() é chamado a cada edição para a janela reiniciar seu temporizador de flush
+
+    def __init__(self, store, batch_size=BATCH_SIZE, schedule=None):
+        self.store = store
+        self.batch_size = batch_size
+        self.schedule = schedule
+        self.path = journal_path(store.path)
+        self.pending = []
+        self.next_id = self.block_end = 0  # Ids reservados e ainda livres: next_id até block_end - 1
+        self.fd = None
+
+    def allocate(self, count):
+        # `count` ids seguidos; reserva outro bloco quando o atual não basta (o resto dele fica sem uso)
+        if self.next_id + count > self.block_end:
+            size = max(ID_BLOCK, count)
+            self.next_id = self.store.reserve_ids(size)
+            self.block_end = self.next_id + size
+        first = self.next_id
+        self.next_id += count
+        return list(range(first, first + count))
+
+    def append(self, operation):
+        self.extend([operation])
+
+    def extend(self, operations):
+        # Operações em lote (colar, excluir várias linhas) vão ao diário numa única escrita
+        self.pending.extend(operations)
+        if self.path is not None:
+            if self.fd is None:
+                self.fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+                sync_directory(self.path)
+            lines = "".join(json.dumps(operation, ensure_ascii=False) + "\n" for operation in operations)
+            data = memoryview(lines.encode('utf-8'))
+            while data:
+                data = data[os.write(self.fd, data):]
+            sync_file(self.fd)  # Uma sincronização por operação ou lote, antes de confirmar a edição
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+        elif self.schedule is not None:
+            self.schedule()
+
+    def flush(self):
+        # Aplica as edições pendentes numa transação e esvazia o diário
+        if not self.pending:
+            return 0
+        count = apply_operations(self.store.conn, self.pending)
+        self.pending = []
+        if self.fd is not None:
+            os.ftruncate(self.fd, 0)
+        return count
+
+    def close(self):
+        self.flush()
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+            os.remove(self.path)
+        self.store.close()
+
+    @property
+    def conn(self):
+        self.flush()
+        return self.store.conn
+
+    def add_entry(self, ordinal, description="", cents=0):
+        entry_id, = self.allocate(1)
+        self.append({'op': 'add', 'id': entry_id, 'ordinal': ordinal, 'description': description, 'cents': cents})
+        return entry_id
+
+    def update_entry(self, entry_id, ordinal, description, cents):
+        self.append({'op': 'put', 'id': entry_id, 'ordinal': ordinal, 'description': description, 'cents': cents})
+
+    def delete_entry(self, entry_id):
+        self.append({'op': 'delete', 'id': entry_id})
+
+    def add_entry_rows(self, rows):
+        ids = self.allocate(len(rows))
+        self.extend([{'op': 'add', 'id': entry_id, 'ordinal': ordinal, 'description': description, 'cents': cents}
+                     for entry_id, (ordinal, description, cents) in zip(ids, rows)])
+        return ids
+
+    def update_entries(self, rows):
+        self.extend([{'op': 'put', 'id': entry_id, 'ordinal': ordinal, 'description': description, 'cents': cents}
+                     for entry_id, ordinal, description, cents in rows])
+
+    def delete_entries(self, entry_ids):
+        self.extend([{'op': 'delete', 'id': entry_id} for entry_id in entry_ids])
+
+    def add_entries(self, batches):
+        # Importações em massa já são uma transação só: vão direto ao banco
+        self.flush()
+        return self.store.add_entries(batches)
+
+    # Leituras: primeiro aplicar o que estiver pendente
+
+    def month_entries(self, year, month):
+        self.flush()
+        return self.store.month_entries(year, month)
+
+    def months(self):
+        self.flush()
+        return self.store.months()
+
+    def month_summaries(self):
+        self.flush()
+        return self.store.month_summaries()
+
+    def search(self, text, *args):
+        self.flush()
+        return self.store.search(text, *args)
+
+    def has_month(self, year, month):
+        self.flush()
+        return self.store.has_month(year, month)
+
+    # Regras de recorrência não passam pelo diário (são poucas e mudam raramente)
+
+    def rules(self):
+        return self.store.rules()
+
+    def save_rule(self, *rule):
+        return self.store.save_rule(*rule)
+
+    def delete_rule(self, rule_id):
+        self.store.delete_rule(rule_id)
+
+    def post_rules(self, rows, posted):
+        # Lançamentos e regras na mesma transação, direto no banco (como as importações)
+        self.flush()
+        return self.store.post_rules(rows, posted)
+
+    def data_version(self):
+        # As próprias gravações não mudam data_version: não é preciso aplicar o diário antes
+        return self.store.data_version()
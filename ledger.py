@@ -0,0 +1,566 @@
+import calendar
+from array import array
+from collections import OrderedDict
+from bisect import bisect_left, bisect_right
+from datetime import date
+from database import LedgerStore, month_bounds
+from aggregates import MonthAggregates
+from balances import MonthlyBalances, month_key
+from reports import Reports
+from columns import DescriptionPool
+from money import parse_brl, parse_brl_array, format_brl
+from dates import parse_date, parse_date_array, format_date
+
+# Motor do livro-caixa sem dependência de PyQt ou matplotlib: a janela é só um cliente dele
+# e os mesmos cálculos podem rodar em scripts e rotinas em lote
+
+COLUMN_DATE, COLUMN_DESCRIPTION, COLUMN_VALUE = 0, 1, 2
+
+PLACEHOLDER_DESCRIPTION = "# Sua descrição aqui"
+
+# Meses já abertos mantidos em memória para voltar a eles sem consultar o banco
+MONTH_CACHE_SIZE = 12
+
+INVALID_DATE_MESSAGE = "Formato de data inválido. Use dd/mm/aaaa."
+INVALID_VALUE_MESSAGE = "Formato inválido. Use, por exemplo: 1500,50."
+
+
+class LedgerError(ValueError):
+    # Erro de validação; a mensagem é mostrada diretamente ao usuário
+    pass
+
+
+def parse_value(text):
+    try:
+        return parse_brl(text)
+    except ValueError:
+        raise LedgerError(INVALID_VALUE_MESSAGE)
+
+
+def parse_entry_date(text):
+    try:
+        return parse_date(text)
+    except ValueError as error:
+        raise LedgerError(str(error))
+
+
+def entry_type(cents):
+    return "Entrada" if cents > 0 else "***" if cents == 0 else "Saída"
+
+
+class BulkResult:
+    # Resultado de uma operação em várias linhas (colar, preencher, excluir)
+    def __init__(self):
+        self.changed = 0
+        self.added = 0
+        self.removed = 0  # Linhas que saíram do mês aberto (excluídas ou com data em outro mês)
+        self.errors = []  # (linha, coluna, mensagem); as células inválidas não são aplicadas
+
+    def report(self, limit=20):
+        # Um único texto com todos os problemas (até `limit` linhas)
+        lines = [f"Linha {row + 1}, coluna {column + 1}: {message}" for row, column, message in self.errors[:limit]]
+        if len(self.errors) > limit:
+            lines.append(f"... e mais {len(self.errors) - limit} células inválidas.")
+        return "\n".join(lines)
+
+
+class MonthEntries:
+    # Lançamentos do mês aberto guardados por colunas, com os totais mantidos junto.
+    # As linhas ficam sempre ordenadas por (ordinal, id): inclusões e mudanças de data
+    # vão direto para a posição certa por busca binária. As descrições ficam no DescriptionPool
+    # (compartilhado entre os meses do Ledger) e cada linha guarda só o código
+
+    def __init__(self, pool=None):
+        self.pool = pool if pool is not None else DescriptionPool()
+        self.clear()
+
+    def clear(self):
+        self.ids = array('q')
+        self.ordinals = array('i')
+        self.codes = array('i')  # Código da descrição no pool
+        self.values = array('q')  # Centavos
+        self.aggregates = MonthAggregates()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def load(self, entries):
+        self.clear()
+        code = self.pool.code
+        for entry_id, ordinal, description, value in entries:
+            self.ids.append(entry_id)
+            self.ordinals.append(ordinal)
+            self.codes.append(code(description))
+            self.values.append(value)
+        self.aggregates.rebuild(self.ordinals, self.values)
+
+    def entry(self, row):
+        return self.ids[row], self.ordinals[row], self.pool[self.codes[row]], self.values[row]
+
+    def description(self, row):
+        return self.pool[self.codes[row]]
+
+    def set_description(self, row, text):
+        self.codes[row] = self.pool.code(text)
+
+    def position_for(self, ordinal, entry_id=None, exclude_row=None):
+        # Linha onde (ordinal, id) deve ficar; sem id, depois dos lançamentos do mesmo dia.
+        # Com exclude_row, a posição é calculada como se essa linha já tivesse sido removida
+        if entry_id is None:
+            position = bisect_right(self.ordinals, ordinal)
+        else:
+            first = bisect_left(self.ordinals, ordinal)
+            last = bisect_right(self.ordinals, ordinal, first)
+            position = bisect_left(self.ids, entry_id, first, last)
+        if exclude_row is not None and exclude_row < position:
+            position -= 1
+        return position
+
+    def insert(self, row, entry_id, ordinal, description, value):
+        self.ids.insert(row, entry_id)
+        self.ordinals.insert(row, ordinal)
+        self.codes.insert(row, self.pool.code(description))
+        self.values.insert(row, value)
+        self.aggregates.add(ordinal, value)
+
+    def remove(self, row):
+        self.aggregates.remove(self.ordinals[row], self.values[row])
+        del self.ids[row]
+        del self.ordinals[row]
+        del self.codes[row]
+        del self.values[row]
+
+    def move(self, row, ordinal):
+        # Muda a data de uma linha mantendo a ordenação; retorna a nova linha
+        entry_id, _, description, value = self.entry(row)
+        target = self.position_for(ordinal, entry_id, exclude_row=row)
+        self.remove(row)
+        self.insert(target, entry_id, ordinal, description, value)
+        return target
+
+    def set_value(self, row, value):
+        self.aggregates.update(self.ordinals[row], self.values[row], self.ordinals[row], value)
+        self.values[row] = value
+
+    def rows(self):
+        strings = self.pool.strings
+        return zip(self.ids, self.ordinals, (strings[code] for code in self.codes), self.values)
+
+    def is_sorted(self, first, last):
+        ordinals, ids = self.ordinals, self.ids
+        if ordinals and (ordinals[0] < first or ordinals[-1] > last):
+            return False
+        return all((ordinals[row], ids[row]) < (ordinals[row + 1], ids[row + 1]) for row in range(len(ids) - 1))
+
+    def sort_by_date(self, first, last):
+        # Reindexação completa: só é necessária se a ordenação foi quebrada por fora.
+        # Ordena por (ordinal, id) e descarta linhas que não pertencem ao intervalo
+        if self.is_sorted(first, last):
+            return False
+        order = sorted((row for row in range(len(self.ids)) if first <= self.ordinals[row] <= last),
+                       key=lambda row: (self.ordinals[row], self.ids[row]))
+        dropped = len(order) != len(self.ids)
+        self.ids = array('q', (self.ids[row] for row in order))
+        self.ordinals = array('i', (self.ordinals[row] for row in order))
+        self.codes = array('i', (self.codes[row] for row in order))
+        self.values = array('q', (self.values[row] for row in order))
+        if dropped:
+            self.aggregates.rebuild(self.ordinals, self.values)
+        return True
+
+
+class MonthSnapshots:
+    # LRU dos meses já carregados (MonthEntries com linhas e totais), cada um guardado com a
+    # versão do mês naquele momento; uma versão diferente na consulta descarta o retrato
+    def __init__(self, size=MONTH_CACHE_SIZE):
+        self.size = size
+        self.months = OrderedDict()  # (ano, mês) -> (versão, MonthEntries)
+
+    def put(self, year, month, version, entries):
+        if self.size <= 0:
+            return
+        self.months[year, month] = (version, entries)
+        self.months.move_to_end((year, month))
+        if len(self.months) > self.size:
+            self.months.popitem(last=False)
+
+    def take(self, year, month, version):
+        # O retrato sai do cache: enquanto o mês estiver aberto, as edições o alteram no lugar
+        cached = self.months.pop((year, month), None)
+        if cached is None or cached[0] != version:
+            return None
+        return cached[1]
+
+    def clear(self):
+        self.months.clear()
+
+
+class Ledger:
+    def __init__(self, store=None, month_cache_size=MONTH_CACHE_SIZE):
+        self.store = store if store is not None else LedgerStore()
+        self.pool = DescriptionPool()  # Descrições de todos os meses carregados, uma cópia de cada
+        self.entries = MonthEntries(self.pool)
+        self.year = None
+        self.month = None
+        self.reports = Reports(self.store)
+        self.snapshots = MonthSnapshots(month_cache_size)
+        self.versions = {}  # month_key -> edições no mês; muda a cada touch
+        self.epoch = 0  # Muda quando o banco é alterado por fora das edições (importação, outro processo)
+        self.data_version = self.store.data_version()
+        self.projection = None  # Previsão das recorrências (forecast.Forecast), montada na primeira consulta
+        self.load_balances()
+
+    def load_balances(self):
+        # Saldo líquido de cada mês a partir do resumo materializado no banco (sem ler os lançamentos)
+        self.balances = MonthlyBalances(
+            (year, month, income + expenses) for year, month, _, income, expenses in self.store.month_summaries())
+
+    def touch(self, ordinal, delta=0):
+        # Um lançamento do mês de `ordinal` mudou: ajusta os saldos e descarta os relatórios desse mês
+        day = date.fromordinal(ordinal)
+        self.balances.add(day.year, day.month, delta)
+        self.reports.invalidate(day.year, day.month)
+        key = month_key(day.year, day.month)
+        self.versions[key] = self.versions.get(key, 0) + 1
+
+    def version(self, year=None, month=None):
+        # Versão do mês (padrão: mês aberto) para caches de imagens e retratos: muda a cada edição nele
+        year, month = year or self.year, month or self.month
+        return self.epoch, self.versions.get(month_key(year, month), 0)
+
+    def close(self):
+        self.store.close()
+
+    def months(self):
+        return self.store.months()
+
+    def has_month(self, year, month):
+        return self.store.has_month(year, month)
+
+    def month_entries(self, year, month):
+        return self.store.month_entries(year, month)
+
+    def search(self, text):
+        # Busca nas descrições de todos os meses: (id, ordinal, descrição, centavos)
+        return self.store.search(text)
+
+    def row_of(self, entry_id, ordinal):
+        # Linha de um lançamento no mês aberto (None se não estiver nele)
+        if not self.in_month(ordinal):
+            return None
+        row = self.entries.position_for(ordinal, entry_id)
+        if row < len(self.entries) and self.entries.ids[row] == entry_id:
+            return row
+        return None
+
+    def month_totals(self, year, month):
+        if (year, month) == (self.year, self.month):
+            return self.entries.aggregates
+        aggregates = MonthAggregates()
+        for _, ordinal, _, value in self.store.month_entries(year, month):
+            aggregates.add(ordinal, value)
+        return aggregates
+
+    def opening_balance(self, year=None, month=None):
+        # Saldo acumulado de todos os meses anteriores (padrão: mês aberto)
+        return self.balances.opening(year or self.year, month or self.month)
+
+    def closing_balance(self, year=None, month=None):
+        return self.balances.closing(year or self.year, month or self.month)
+
+    def total_balance(self):
+        return self.balances.total()
+
+    @property
+    def aggregates(self):
+        return self.entries.aggregates
+
+    def open_month(self, year, month, cached=True):
+        # O mês que sai vai para o cache; o que entra vem dele se não foi editado desde então
+        if self.year is not None and (year, month) != (self.year, self.month):
+            self.snapshots.put(self.year, self.month, self.version(), self.entries)
+        entries = self.snapshots.take(year, month, self.version(year, month)) if cached else None
+        if entries is None:
+            entries = MonthEntries(self.pool)
+            entries.load(self.store.month_entries(year, month))
+        self.year, self.month = year, month
+        self.entries = entries
+
+    def reload(self):
+        self.open_month(self.year, self.month, cached=False)
+
+    def start_month(self, today=None):
+        # Se o mês ainda não tem lançamentos, cria a linha inicial
+        today = today or date.today()
+        if not self.store.has_month(today.year, today.month):
+            self.store.add_entry(today.toordinal(), PLACEHOLDER_DESCRIPTION, 0)
+            self.touch(today.toordinal())
+
+    def rules(self):
+        from forecast import Rule  # NumPy só é carregado quando há recorrências
+        return [Rule.from_row(row) for row in self.store.rules()]
+
+    def forecast(self, months=None, today=None):
+        # Saldo previsto mês a mês (veja forecast.py): a previsão é refeita só quando muda o dia ou o
+        # horizonte; regras alteradas e lançamentos novos a atualizam sem recalcular as outras regras
+        from forecast import Forecast, HORIZON_MONTHS
+        today = today or date.today()
+        months = months or HORIZON_MONTHS
+        if self.projection is None or (self.projection.today, self.projection.months) != (today.toordinal(), months):
+            self.projection = Forecast(self.rules(), today, months)
+        return self.projection.rows(self.balances)
+
+    def save_rule(self, rule, today=None):
+        # Regras novas não gravam ocorrências anteriores a hoje (já estão no livro ou não interessam)
+        if rule.id is None and rule.posted is None:
+            today = (today or date.today()).toordinal()
+            if rule.start < today:
+                rule.posted = today - 1
+        rule.id = self.store.save_rule(*rule.row())
+        if self.projection is not None:
+            self.projection.set_rule(rule)
+        return rule.id
+
+    def delete_rule(self, rule_id):
+        self.store.delete_rule(rule_id)
+        if self.projection is not None:
+            self.projection.remove_rule(rule_id)
+
+    def post_recurring(self, today=None):
+        # Grava como lançamentos as ocorrências vencidas até hoje; retorna quantas foram gravadas
+        if not self.store.rules():
+            return 0  # Sem regras, sem carregar o NumPy na abertura
+        today = (today or date.today()).toordinal()
+        rows = []
+        posted = []
+        for rule in self.rules():
+            ordinals = rule.occurrences(rule.next_ordinal(), today)
+            if not len(ordinals):
+                continue
+            rows.extend((int(ordinal), rule.description, rule.cents) for ordinal in ordinals)
+            rule.posted = today
+            posted.append(rule)
+        if not rows:
+            return 0
+        # Lançamentos e "gravado até" das regras numa única transação
+        self.store.post_rules(rows, [(rule.id, rule.posted) for rule in posted])
+        if self.projection is not None:
+            for rule in posted:
+                self.projection.set_rule(rule)
+        for ordinal, _, value in rows:
+            self.touch(ordinal, value)
+        if self.year is not None and any(self.in_month(ordinal) for ordinal, _, _ in rows):
+            self.reload()
+        return len(rows)
+
+    def default_entry_date(self, today=None):
+        # Data atual no mês corrente; em meses anteriores, o último dia do mês aberto
+        today = today or date.today()
+        if (today.year, today.month) == (self.year, self.month):
+            return today.toordinal()
+        return date(self.year, self.month, calendar.monthrange(self.year, self.month)[1]).toordinal()
+
+    def in_month(self, ordinal):
+        first, last = month_bounds(self.year, self.month)
+        return first <= ordinal <= last
+
+    def add_entry(self, ordinal, description=PLACEHOLDER_DESCRIPTION, value=0):
+        # Retorna a linha no mês aberto, já na posição ordenada (ou None se a data for de outro mês)
+        entry_id = self.store.add_entry(ordinal, description, value)
+        self.touch(ordinal, value)
+        if not self.in_month(ordinal):
+            return None
+        row = self.entries.position_for(ordinal)
+        self.entries.insert(row, entry_id, ordinal, description, value)
+        return row
+
+    def date_target(self, row, ordinal):
+        # Linha que o lançamento ocupará com a nova data (None se sair do mês aberto)
+        if not self.in_month(ordinal):
+            return None
+        if ordinal == self.entries.ordinals[row]:
+            return row
+        return self.entries.position_for(ordinal, self.entries.ids[row], exclude_row=row)
+
+    def set_cell(self, row, column, text):
+        # Valida e grava uma célula; retorna False se nada mudou e lança LedgerError se for inválida.
+        # Uma mudança de data move a linha para sua posição (ou a tira do mês aberto): veja date_target
+        entries = self.entries
+        if column == COLUMN_DATE:
+            ordinal = parse_entry_date(text)
+            if ordinal == entries.ordinals[row]:
+                return False
+            entry_id, _, description, value = entries.entry(row)
+            self.store.update_entry(entry_id, ordinal, description, value)
+            self.touch(entries.ordinals[row], -value)
+            self.touch(ordinal, value)
+            if self.in_month(ordinal):
+                entries.move(row, ordinal)
+            else:
+                entries.remove(row)
+            return True
+        elif column == COLUMN_DESCRIPTION:
+            text = text.strip()
+            if text == entries.description(row):
+                return False
+            entries.set_description(row, text)
+            self.touch(entries.ordinals[row])
+        elif column == COLUMN_VALUE:
+            value = parse_value(text)
+            if value == entries.values[row]:
+                return False
+            self.touch(entries.ordinals[row], value - entries.values[row])
+            entries.set_value(row, value)
+        else:
+            raise LedgerError("Esta coluna não pode ser editada.")
+        self.store.update_entry(*entries.entry(row))
+        return True
+
+    def delete_row(self, row):
+        self.store.delete_entry(self.entries.ids[row])
+        self.touch(self.entries.ordinals[row], -self.entries.values[row])
+        self.entries.remove(row)
+
+    def cell_text(self, row, column):
+        # Texto da célula como aparece na tabela
+        if column == COLUMN_DATE:
+            return format_date(self.entries.ordinals[row])
+        if column == COLUMN_DESCRIPTION:
+            return self.entries.description(row)
+        return format_brl(self.entries.values[row])
+
+    def set_cells(self, cells, new_rows=0):
+        # Edição em lote: cells é uma lista de (linha, coluna, texto); linhas a partir de
+        # len(entries) são `new_rows` lançamentos novos. Datas e valores são validados de uma vez
+        # (vetorizado); células inválidas vão para BulkResult.errors e as demais são aplicadas.
+        # Linhas novas sem nenhuma célula válida e preenchida não são criadas.
+        # O mês aberto é remontado uma única vez no fim
+        entries = self.entries
+        count = len(entries)
+        result = BulkResult()
+        state = {}
+        filled = set()  # Linhas novas com alguma célula aplicada
+        for row in range(count, count + new_rows):
+            state[row] = [None, self.default_entry_date(), PLACEHOLDER_DESCRIPTION, 0]
+
+        def current(row):
+            if row not in state:
+                state[row] = list(entries.entry(row))
+            return state[row]
+
+        dates = [(row, text.strip()) for row, column, text in cells if column == COLUMN_DATE and text.strip()]
+        values = [(row, text) for row, column, text in cells if column == COLUMN_VALUE]
+        for row, column, text in cells:
+            if column == COLUMN_DESCRIPTION:
+                current(row)[2] = text.strip()
+                if text.strip():
+                    filled.add(row)
+            elif column not in (COLUMN_DATE, COLUMN_VALUE):
+                result.errors.append((row, column, "Esta coluna não pode ser editada."))
+        if dates:
+            ordinals, valid = parse_date_array([text for _, text in dates])
+            for (row, _), ordinal, ok in zip(dates, ordinals.tolist(), valid.tolist()):
+                if ok:
+                    current(row)[1] = ordinal
+                    filled.add(row)
+                else:
+                    result.errors.append((row, COLUMN_DATE, INVALID_DATE_MESSAGE))
+        if values:
+            cents, valid = parse_brl_array([text for _, text in values])
+            for (row, text), value, ok in zip(values, cents.tolist(), valid.tolist()):
+                if ok:
+                    current(row)[3] = value
+                    if text.strip():
+                        filled.add(row)
+                else:
+                    result.errors.append((row, COLUMN_VALUE, INVALID_VALUE_MESSAGE))
+        result.errors.sort()
+
+        updates = []
+        for row, (entry_id, ordinal, description, value) in state.items():
+            if row >= count:
+                continue
+            old = entries.entry(row)
+            if (ordinal, description, value) == old[1:]:
+                continue
+            updates.append((entry_id, ordinal, description, value))
+            self.touch(old[1], -old[3])
+            self.touch(ordinal, value)
+        added = [state[row][1:] for row in range(count, count + new_rows) if row in filled]
+        ids = self.store.add_entry_rows(added) if added else []
+        for (ordinal, _, value) in added:
+            self.touch(ordinal, value)
+        if updates:
+            self.store.update_entries(updates)
+
+        changed = {entry_id: (entry_id, ordinal, description, value) for entry_id, ordinal, description, value in updates}
+        rows = [changed.get(entry[0], entry) for entry in entries.rows()]
+        rows += [(entry_id,) + tuple(row) for entry_id, row in zip(ids, added)]
+        kept = sorted((row for row in rows if self.in_month(row[1])), key=lambda row: (row[1], row[0]))
+        entries.load(kept)
+        result.changed = len(updates)
+        result.added = len(added)
+        result.removed = len(rows) - len(kept)
+        return result
+
+    def fill_down(self, rows, column):
+        # Copia a célula da primeira linha selecionada para as demais (Ctrl+D)
+        rows = sorted(set(rows))
+        if len(rows) < 2:
+            return BulkResult()
+        text = self.cell_text(rows[0], column)
+        return self.set_cells([(row, column, text) for row in rows[1:]])
+
+    def paste(self, top, left, block):
+        # Cola uma grade de textos (linhas x colunas) a partir de (top, left); o que passar do
+        # fim da tabela vira lançamentos novos. A coluna "Tipo" é calculada e é ignorada
+        count = len(self.entries)
+        new_rows = max(0, top + len(block) - count)
+        cells = [(top + i, left + j, text) for i, line in enumerate(block)
+                 for j, text in enumerate(line) if left + j <= COLUMN_VALUE]
+        return self.set_cells(cells, new_rows)
+
+    def delete_rows(self, rows):
+        rows = set(rows)
+        entries = self.entries
+        removed = [entries.entry(row) for row in sorted(rows)]
+        self.store.delete_entries([entry[0] for entry in removed])
+        for _, ordinal, _, value in removed:
+            self.touch(ordinal, -value)
+        entries.load([entry for row, entry in enumerate(entries.rows()) if row not in rows])
+        result = BulkResult()
+        result.removed = len(removed)
+        return result
+
+    def sort_month(self):
+        # Retorna False quando as linhas já estavam ordenadas (caso normal)
+        return self.entries.sort_by_date(*month_bounds(self.year, self.month))
+
+    def export(self, path, first, last, progress=None, cancelled=None):
+        # Lançamentos de `first` a `last` (ordinais) em CSV, Parquet ou XLSX, conforme a extensão
+        from exporter import export_range
+        return export_range(self.store.conn, path, first, last, progress=progress, cancelled=cancelled)
+
+    def import_statement(self, path, progress=None, cancelled=None):
+        from importer import import_statement  # NumPy só é carregado quando há importação
+        result = import_statement(self.store, path, progress=progress, cancelled=cancelled)
+        if not result.cancelled:
+            self.refresh()
+        return result
+
+    def refresh(self):
+        # O banco mudou sem passar pelas edições deste Ledger: saldos, relatórios e meses em cache são refeitos
+        self.load_balances()
+        self.reports.clear()
+        self.snapshots.clear()
+        self.projection = None
+        self.epoch += 1
+        if self.year is not None:
+            self.reload()
+
+    def changed_elsewhere(self):
+        # True se outro processo (api.py, outra janela) gravou no banco desde a última consulta
+        version = self.store.data_version()
+        changed = version != self.data_version
+        self.data_version = version
+        return changed
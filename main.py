@@ -1,17 +1,37 @@
-import sys, re
+import os, sqlite3, sys, time
+
+# Marca o início do processo para medir o tempo até a primeira pintura (--startup-time)
+STARTUP_CLOCK = time.perf_counter()
+
 from PyQt5.QtWidgets import (
-    QApplication, QMainWindow, QTableWidget, QTableWidgetItem, QVBoxLayout, 
+    QApplication, QMainWindow, QTableView, QVBoxLayout, 
     QWidget, QPushButton, QHBoxLayout, QLabel, QHeaderView, QDialog, QListWidget, QStyledItemDelegate,
-    QGroupBox, QScrollArea, QFrame, QMessageBox
+    QGroupBox, QScrollArea, QFrame, QMessageBox, QFileDialog, QProgressDialog, QLineEdit, QListWidgetItem,
+    QComboBox, QAbstractItemView
 )
-from PyQt5.QtGui import QColor, QPalette
-from PyQt5.QtCore import Qt
-import pandas as pd
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from datetime import datetime, timedelta
-
-date_pattern = re.compile(r"^\d{2}/\d{2}/\d{4}$")
+from PyQt5.QtGui import QColor, QPalette, QKeySequence
+from PyQt5.QtCore import Qt, QTimer, pyqtSlot
+from datetime import datetime, date
+from ledger import Ledger, MONTH_CACHE_SIZE
+from database import LedgerStore, month_bounds
+from journal import WriteBehindStore
+from table_model import LedgerTableModel
+from chart import ChartRenderer
+from money import format_brl
+from dates import format_date
+from instrumentation import tracer, traced
+
+# Pausa nas edições depois da qual o diário é gravado no banco
+FLUSH_DELAY_MS = 500
+
+# Intervalo para verificar gravações de outros processos no banco (api.py)
+EXTERNAL_CHECK_MS = 1000
+
+# Pausa na digitação da busca antes de consultar o índice
+SEARCH_DELAY_MS = 150
+
+# Períodos do gráfico: (nome, quantidade de meses terminando no mês aberto)
+CHART_PERIODS = (("Mês", 1), ("Trimestre", 3), ("Ano", 12), ("5 anos", 60))
 
 meses_pt = {1: 'Janeiro', 2: 'Fevereiro', 3: 'Março', 4: 'Abril', 5: 'Maio', 6: 'Junho',
             7: 'Julho', 8: 'Agosto', 9: 'Setembro', 10: 'Outubro', 11: 'Novembro', 12: 'Dezembro'}
@@ -25,28 +45,60 @@ class CustomDelegate(QStyledItemDelegate):
 
 
 class FinancialManager(QMainWindow):
-    def __init__(self):
+    def __init__(self, month_cache_size=MONTH_CACHE_SIZE):
         super().__init__()
         self.graphs_mode = 'united'
         self.setWindowTitle("Gestão Financeira")
         self.setGeometry(100, 100, 1000, 700)
         self.current_date = datetime.now()
         self.current_date = datetime.strftime(self.current_date, "%m/%Y")
+
+        # Livro-caixa (banco de dados local + mês aberto); as edições passam por um diário
+        # e chegam ao banco em lote quando a digitação pausa
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.setInterval(FLUSH_DELAY_MS)
+        self.ledger = Ledger(WriteBehindStore(LedgerStore(), schedule=self.flush_timer.start),
+                             month_cache_size=month_cache_size)
+        self.flush_timer.timeout.connect(self.ledger.store.flush)
+        self.external_timer = QTimer(self)
+        self.external_timer.setInterval(EXTERNAL_CHECK_MS)
+        self.external_timer.timeout.connect(self.check_external_changes)
+        self.external_timer.start()
         
         # Setup midnight theme
         self.set_midnight_theme()
 
         self.layout = QVBoxLayout()
 
-        # Tabela de gestão financeira
-        self.table = QTableWidget(0, 4)
+        # Busca nas descrições de todos os meses (índice de texto do banco)
+        self.search_box = QLineEdit()
+        self.search_box.setPlaceholderText("Buscar descrição em todos os meses...")
+        self.search_box.setClearButtonEnabled(True)
+        self.search_results = QListWidget()
+        self.search_results.setMaximumHeight(150)
+        self.search_results.setVisible(False)
+        self.search_results.setStyleSheet("QListWidget { background-color: #131313; color: white; }")
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DELAY_MS)
+        self.search_timer.timeout.connect(self.run_search)
+        self.search_box.textChanged.connect(self.search_timer.start)
+        self.search_results.itemActivated.connect(self.on_search_result)
+        self.search_results.itemClicked.connect(self.on_search_result)
+        self.layout.addWidget(self.search_box)
+        self.layout.addWidget(self.search_results)
+
+        # Tabela de gestão financeira (modelo/visão: só as linhas visíveis são desenhadas)
+        self.model = LedgerTableModel(self.ledger)
+        self.table = QTableView()
+        self.table.setModel(self.model)
         self.table.setStyleSheet("background-color: rgb(13, 13, 13)")
-        self.table.setHorizontalHeaderLabels(["Data", "Descrição", "Valor", "Tipo"])
         self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)  # Faz a coluna "Descrição" ser maior
         self.layout.addWidget(self.table)
         self.table.keyPressEvent = self.handle_key_press
 
-        # Aplicar CustomDelegate ao QTableWidget
+        # Aplicar CustomDelegate ao QTableView
         self.table.setItemDelegate(CustomDelegate())
 
         # Botões para ações
@@ -54,26 +106,50 @@ class FinancialManager(QMainWindow):
         self.add_button = QPushButton("Adicionar Entrada/Saída")
         self.update_button = QPushButton("Ordenar datas")
         self.navigate_button = QPushButton("Selecionar Mês")
+        self.import_button = QPushButton("Importar Extrato")
+        self.export_button = QPushButton("Exportar")
+        self.reports_button = QPushButton("Relatórios")
+        self.consolidate_button = QPushButton("Consolidar")
+        self.forecast_button = QPushButton("Previsão")
         self.add_button.clicked.connect(self.add_entry)
         self.update_button.clicked.connect(self.sort_table_by_date)
         self.navigate_button.clicked.connect(self.navigate_data)
+        self.import_button.clicked.connect(self.import_statement_file)
+        self.export_button.clicked.connect(self.export_file)
+        self.reports_button.clicked.connect(self.show_reports)
+        self.consolidate_button.clicked.connect(self.show_consolidation)
+        self.forecast_button.clicked.connect(self.show_forecast)
         self.button_layout.addWidget(self.add_button)
         self.button_layout.addWidget(self.update_button)
         self.button_layout.addWidget(self.navigate_button)
+        self.button_layout.addWidget(self.import_button)
+        self.button_layout.addWidget(self.export_button)
+        self.button_layout.addWidget(self.reports_button)
+        self.button_layout.addWidget(self.consolidate_button)
+        self.button_layout.addWidget(self.forecast_button)
+        self.period_box = QComboBox()
+        for name, months in CHART_PERIODS:
+            self.period_box.addItem(name, months)
+        self.period_box.currentIndexChanged.connect(lambda _: self.update_graphs())
+        self.button_layout.addWidget(self.period_box)
         self.layout.addLayout(self.button_layout)
 
-        # Gráfico
-        self.figure, self.ax = plt.subplots()
-        self.canvas = FigureCanvas(self.figure)
-        self.layout.addWidget(self.canvas)
+        # Gráfico (o matplotlib é carregado depois da primeira pintura da janela)
+        self.chart_layout = QVBoxLayout()
+        self.layout.addLayout(self.chart_layout, 1)
+        self.chart = ChartRenderer(self.chart_layout, cache_size=month_cache_size)
+        self.first_paint_done = False
+        self.startup_times = {}
 
         # Labels para saldo na parte inferior
         self.balance_layout = QHBoxLayout()
         self.current_month_balance_label = QLabel("Saldo Atual do Mês: 0")
         self.total_expenses_label = QLabel("Total de Despesas do Mês: 0")
         self.total_balance_label = QLabel("Saldo Total de Todos os Meses: 0")
+        self.month_balances_label = QLabel("Saldo Inicial do Mês: 0   -   Saldo Final do Mês: 0")
         self.balance_layout.addWidget(self.total_expenses_label)
         self.balance_layout.addWidget(self.current_month_balance_label)
+        self.balance_layout.addWidget(self.month_balances_label)
         self.balance_layout.addWidget(self.total_balance_label)
         self.layout.addLayout(self.balance_layout)
 
@@ -83,7 +159,8 @@ class FinancialManager(QMainWindow):
         self.setCentralWidget(container)
         
         # Connect signals
-        self.table.cellChanged.connect(self.on_cell_changed)
+        self.model.cellChanged.connect(self.on_cell_changed)
+        self.model.errorOccurred.connect(self.show_error_message)
 
         # Check if a new month has started
         self.check_new_month()
@@ -107,9 +184,6 @@ class FinancialManager(QMainWindow):
         palette.setColor(QPalette.Highlight, QColor(142, 45, 197).lighter())
         palette.setColor(QPalette.HighlightedText, Qt.black)
         self.setPalette(palette)
-
-        # Aplicando o tema ao Matplotlib
-        plt.style.use('dark_background')
         
         # Ajuste de estilo dos botões e cabeçalhos
         self.setStyleSheet("""
@@ -125,7 +199,7 @@ class FinancialManager(QMainWindow):
                 background-color: #232323;
                 color: white;
             }
-            QTableWidget {
+            QTableView {
                 background-color: #131313;
                 color: white;
             }
@@ -137,126 +211,60 @@ class FinancialManager(QMainWindow):
             }
         """)
 
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.first_paint_done:
+            # A tabela já está na tela: agora carregar o gráfico em segundo plano
+            self.first_paint_done = True
+            self.startup_times['first_paint'] = time.perf_counter() - STARTUP_CLOCK
+            self.chart.rendered.connect(self.on_first_chart)
+            QTimer.singleShot(0, self.chart.load_in_background)
+
+    def on_first_chart(self):
+        self.chart.rendered.disconnect(self.on_first_chart)
+        self.startup_times['first_chart'] = time.perf_counter() - STARTUP_CLOCK
+
     def check_new_month(self):
-        self.table.setRowCount(0)
-        row_position = self.table.rowCount()
-        data = datetime.now().strftime("%d/%m/%Y")
-        descricao = "# Sua descrição aqui"
-
-
-        # Colocar ID na tabela
-        item = QTableWidgetItem(data)
-        item_desc = QTableWidgetItem(descricao)
-        item.setData(Qt.UserRole, 1)
-        self.table.setItem(row_position, 0, item)
-        self.table.setItem(row_position, 1, item_desc)
-        self.update_graphs()
+        # Grava as recorrências vencidas; se o mês atual ainda não tem lançamentos, cria a linha inicial no banco
+        self.ledger.post_recurring()
+        self.ledger.start_month()
 
+    def check_external_changes(self):
+        # Outro processo gravou no banco: recarrega saldos e o mês aberto (esperando o fim de uma edição na tabela)
+        if self.table.state() == QAbstractItemView.EditingState:
+            return
+        if self.ledger.changed_elsewhere():
+            self.model.refresh()
+            self.update_graphs()
 
+    def closeEvent(self, event):
+        self.flush_timer.stop()
+        self.external_timer.stop()
+        self.ledger.close()  # Grava o que ainda estiver no diário
+        super().closeEvent(event)
+
+    @pyqtSlot()
+    @traced("add_entry")
     def add_entry(self):
-        row_position = self.table.rowCount()
-        self.table.insertRow(row_position)
-        
-        # Verificar se a entrada é no mês atual
-        data = datetime.now().strftime("%m/%Y")
-        if data == self.current_date:
-            # Adiciona a data atual
-            data = datetime.now().strftime("%d/%m/%Y")
-        else:
-            # Se for em meses anteriores, pegar o último dia do mês em exibição para adicionar a entrada
-            month = int(data.split('/')[0])
-            year = int(data.split('/')[1])
-            next_month = datetime(year, month + 1, 1)
-            data = next_month - timedelta(days=1)
-            data = str(data.day) + '/' + self.current_date
-        descricao = "# Sua descrição aqui"
-        valor = 0
-        
-        self.table.setItem(row_position, 0, QTableWidgetItem(data))
-        self.table.setItem(row_position, 1, QTableWidgetItem(descricao))
-        self.table.setItem(row_position, 2, QTableWidgetItem(f"{valor:.2f}".replace(".", ",")))
-        
-        # Determinação do tipo (entrada/saída) e coloração
-        self.update_entry_type(row_position)
+        # Data atual no mês corrente ou o último dia do mês em exibição
+        row_position = self.model.add_entry()
 
         # Adicionar input para descrição
-        self.table.scrollToItem(self.table.item(row_position, 0))
-        self.table.setCurrentCell(row_position, 1)
-        self.table.editItem(self.table.item(row_position, 1))
+        index = self.model.index(row_position, 1)
+        self.table.scrollTo(index)
+        self.table.setCurrentIndex(index)
+        self.table.edit(index)
 
-        
-        # Colocar o ID na tabela
-        item = QTableWidgetItem(data)
-        item.setData(Qt.UserRole, 2)
-        self.table.setItem(row_position, 0, item)
         self.update_graphs()
 
-    def update_entry_type(self, row):
-        try:
-            valor = float(self.table.item(row, 2).text().replace('.', '').replace(',', '.'))
-        except ValueError:
-            valor = 0
-    
-        tipo_item = QTableWidgetItem("Entrada" if valor > 0 else "***" if valor == 0 else "Saída")
-        tipo_item.setFlags(tipo_item.flags() & ~Qt.ItemIsEditable)  # Faz o item não ser editável
-        if valor > 0:
-            tipo_item.setForeground(QColor(0, 255, 0))  # Verde para entrada
-        elif valor == 0:
-            tipo_item.setForeground(QColor(255, 255, 0))  # Amarelo para neutro
-        else:
-            tipo_item.setForeground(QColor(255, 0, 0))  # Vermelho para saída
-        
-        self.table.setItem(row, 3, tipo_item)
-
+    @traced("on_cell_changed")
     def on_cell_changed(self, row, column):
-        id = self.table.item(row, 0).data(Qt.UserRole)
-        if id == None:
-            return
-        date_item = self.table.item(row, 0)
-        description_item = self.table.item(row, 1)
-        value_item = self.table.item(row, 2)
-
-        # Verifica e valida o formato da data
-        if column == 0 and date_item is not None:
-            old_date = "01/01/2001"
-            date_text = date_item.text()
-            if not date_pattern.match(date_text):
-                self.show_error_message("Formato de data inválido. Use dd/mm/aaaa.")
-                self.table.blockSignals(True)
-                date_item.setText(old_date)
-                self.table.blockSignals(False)
-                return
-
-
-        date = date_item.text() if date_item is not None else ""
-        try:
-            date_obj = datetime.strptime(date, '%d/%m/%Y')
-        except ValueError:
-            self.show_error_message("Esta data não existe.")
-            self.table.blockSignals(True)
-            date_item.setText(old_date)
-            self.table.blockSignals(False)
-            return
-        description = description_item.text() if description_item is not None else ""
-        try:
-            value = float(value_item.text().replace('.', '').replace(',', '.')) if value_item is not None else 0.0
-        except ValueError:
-            old_value = 0.0
-            value = old_value
-            self.show_error_message("Formato inválido. Use, por exemplo: 1500,50.")
-            self.table.blockSignals(True)
-            value_item.setText(f"{old_value:.2f}".replace(".", ","))
-            self.table.blockSignals(False)
-            return
-
-
+        # A validação e a gravação acontecem no Ledger (via setData); aqui só atualizamos a tela
         if column == 0:  # Se a coluna modificada for a de datas
             self.update_graphs()
         elif column == 1:  # Se a coluna modificada for a de descrições
             pass
         elif column == 2:  # Se a coluna modificada for a de valores
-            self.update_entry_type(row)
-            self.format_value(row, column)
             self.update_graphs()
 
     def show_error_message(self, message):
@@ -269,104 +277,262 @@ class FinancialManager(QMainWindow):
 
     def handle_key_press(self, event):
         if event.key() == Qt.Key_Delete:
-            current_row = self.table.currentRow()
-            if current_row >= 0:
-                self.confirm_and_delete_item(current_row)
+            rows = self.selected_rows()
+            if len(rows) > 1:
+                self.confirm_and_delete_items(rows)
+            elif rows:
+                self.confirm_and_delete_item(rows[0])
+        elif event.matches(QKeySequence.Paste):
+            self.paste_clipboard()
+        elif event.key() == Qt.Key_D and event.modifiers() == Qt.ControlModifier:
+            self.fill_down()
         else:
             # Chama o evento original se não for a tecla Delete
-            super(QTableWidget, self.table).keyPressEvent(event)
+            QTableView.keyPressEvent(self.table, event)
 
     def confirm_and_delete_item(self, row):
         reply = QMessageBox.question(self.table, 'Confirmação', 
                                      'Tem certeza que deseja deletar o item selecionado?', 
                                      QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
         if reply == QMessageBox.Yes:
-            self.table.removeRow(row)
+            with tracer.span("delete_entry"):
+                self.model.remove_row(row)
+                self.update_graphs()
+
+    def selected_rows(self):
+        rows = {index.row() for index in self.table.selectionModel().selectedIndexes()}
+        if not rows and self.table.currentIndex().isValid():
+            rows.add(self.table.currentIndex().row())
+        return sorted(rows)
+
+    def confirm_and_delete_items(self, rows):
+        reply = QMessageBox.question(self.table, 'Confirmação',
+                                     f'Tem certeza que deseja deletar os {len(rows)} itens selecionados?',
+                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply == QMessageBox.Yes:
+            with tracer.span("delete_entries"):
+                self.model.remove_rows(rows)
+                self.update_graphs()
+
+    def paste_clipboard(self):
+        # Texto copiado de planilhas: linhas separadas por quebra de linha e células por tabulação
+        text = QApplication.clipboard().text()
+        block = [line.split('\t') for line in text.splitlines()]
+        index = self.table.currentIndex()
+        if not block or not index.isValid():
+            return
+        with tracer.span("paste"):
+            result = self.model.paste(index.row(), index.column(), block)
             self.update_graphs()
+        self.show_bulk_errors(result)
 
+    def fill_down(self):
+        index = self.table.currentIndex()
+        if not index.isValid():
+            return
+        with tracer.span("fill_down"):
+            result = self.model.fill_down(self.selected_rows(), index.column())
+            self.update_graphs()
+        self.show_bulk_errors(result)
 
-    def format_value(self, row, column):
-        item = self.table.item(row, column)
-        try:
-            value = float(item.text().replace('.', '').replace(',', '.'))
-            formatted_value = f"{value:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-            item.setText(formatted_value)
-        except ValueError:
-            item.setText("0,00")
+    def show_bulk_errors(self, result):
+        # Um único aviso com todas as células recusadas
+        if result.errors:
+            QMessageBox.warning(self, "Células inválidas", result.report())
 
-    def update_graphs(self):
-        data = []
-        for row in range(self.table.rowCount()):
-            date_item = self.table.item(row, 0)
-            description_item = self.table.item(row, 1)
-            value_item = self.table.item(row, 2)
-            
-            if date_item and value_item:
-                # Obtém o dia (exclui o mês e ano)
-                date = date_item.text().split('/')[0]
-                description = description_item.text() if description_item is not None else ""
-                try:
-                    value = float(value_item.text().replace('.', '').replace(',', '.'))
-                except ValueError:
-                    value = 0.0  # Em caso de erro na conversão, define o valor como 0.0
-                data.append({"Data": date, "Descrição": description, "Valor": value})
-
-        if not data:
-            self.current_month_balance_label.setText("Saldo Atual do Mês: 0,00")
-            self.total_expenses_label.setText("Total de Despesas do Mês: 0,00")
-            self.total_balance_label.setText("Saldo Total de Todos os Meses: 0,00")
-            self.ax.clear()
-            self.canvas.draw()
+    def import_statement_file(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Importar Extrato", "", "Extratos (*.csv *.ofx);;Todos os arquivos (*)")
+        if not path:
             return
 
-        df = pd.DataFrame(data)
+        progress = QProgressDialog("Importando extrato...", "Cancelar", 0, 1000, self)
+        progress.setWindowTitle("Importar Extrato")
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(0)
 
-        # Calcular total de despesas antes de agrupar os dados
-        total_expenses = df[df['Valor'] < 0]['Valor'].sum()
-        total_gross = df[df['Valor'] > 0]['Valor'].sum()
+        def on_progress(done, total):
+            progress.setValue(int(done * 1000 / total) if total else 1000)
+            QApplication.processEvents()
 
-        if self.graphs_mode == "united":
-            # Agrupar valores pelo dia
-            df = df.groupby('Data', as_index=False).sum()
+        # Os dados vão direto para o banco; tabela, totais e gráfico são atualizados uma única vez no fim
+        result = self.model.import_statement(path, progress=on_progress, cancelled=progress.wasCanceled)
+        progress.close()
 
-        # Atualizar o saldo total atual do mês
-        current_month_balance = df['Valor'].sum()
-        self.current_month_balance_label.setText(
-            f"Saldo Atual do Mês: {current_month_balance:,.2f}   -   Saldo Bruto: {total_gross:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."))
-        self.current_month_balance_label.setAlignment(Qt.AlignCenter)
-        self.total_expenses_label.setText(
-            f"Total de Despesas do Mês: {total_expenses:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."))
-        self.total_expenses_label.setAlignment(Qt.AlignLeft)
+        if result.cancelled:
+            return
+        self.update_graphs()
 
-        # Atualizar o saldo total de todos os meses (Versão atual sem banco de dados - Pegando somente o mês atual)
-        total_balance = current_month_balance
-        total_balance = total_balance if total_balance is not None else 0.0
-        self.total_balance_label.setText(
-            f"Saldo Total de Todos os Meses: {total_balance:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."))
-        self.total_balance_label.setAlignment(Qt.AlignRight)
+        message = f"{result.imported} lançamentos importados."
+        if result.rejected:
+            lines = "\n".join(f"Linha {line}: {reason}" for line, reason in result.errors)
+            message += f"\n{result.rejected} linhas ignoradas:\n{lines}"
+        QMessageBox.information(self, "Importar Extrato", message)
+
+    @pyqtSlot()
+    @traced("export")
+    def export_file(self):
+        # Período -> arquivo (o formato vem da extensão) -> gravação em blocos com progresso
+        from export_dialog import ExportDialog
+        dialog = ExportDialog(self.ledger.year, self.ledger.month, self)
+        if dialog.exec_() != QDialog.Accepted:
+            return
+        first, last = dialog.date_range()
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Exportar", f"lancamentos-{format_date(first).replace('/', '-')}.csv",
+            "CSV (*.csv);;Parquet (*.parquet);;Excel (*.xlsx)")
+        if not path:
+            return
 
+        progress = QProgressDialog("Exportando lançamentos...", "Cancelar", 0, 1000, self)
+        progress.setWindowTitle("Exportar")
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(0)
 
-        self.ax.clear()
+        def on_progress(done, total):
+            progress.setValue(int(done * 1000 / total) if total else 1000)
+            QApplication.processEvents()
 
-        # Plotting
-        colors = ['#90d4c4' if value >= 0 else '#DC143C' for value in df['Valor']]
-        df.set_index('Data', inplace=True)
-        df['Valor'].plot(ax=self.ax, kind='bar', color=colors)
+        try:
+            result = self.ledger.export(path, first, last, progress=on_progress, cancelled=progress.wasCanceled)
+        except (ValueError, ImportError, OSError) as error:
+            progress.close()
+            QMessageBox.warning(self, "Exportar", f"Não foi possível exportar: {error}")
+            return
+        progress.close()
+        if not result.cancelled:
+            QMessageBox.information(self, "Exportar", f"{result.exported} lançamentos exportados.")
 
-        title_month = meses_pt[int(self.current_date.split('/')[0])]
-        self.ax.set_title(f"Receitas e Despesas - {title_month} de {self.current_date.split('/')[1]}")
-        self.ax.set_ylabel("Valor")
-        self.ax.set_xlabel("Dia")
-        self.ax.tick_params(axis='x', rotation=0)
+    @traced("update_graphs")
+    def update_graphs(self):
+        # Totais mantidos incrementalmente pelo Ledger (sem percorrer as linhas).
+        # Com --trace: spans collect/balances/aggregate/labels aqui e chart.plot/chart.draw na thread do gráfico
+        with tracer.span("update_graphs.collect"):
+            entries = self.ledger.entries
+            aggregates = entries.aggregates
+            title_month = meses_pt[int(self.current_date.split('/')[0])]
+            title = f"Receitas e Despesas - {title_month} de {self.current_date.split('/')[1]}"
+
+        with tracer.span("update_graphs.balances"):
+            self.update_balances()
+        if self.period_box.currentData() > 1:
+            self.update_period_graph()
+        if not aggregates.daily:
+            self.current_month_balance_label.setText("Saldo Atual do Mês: 0,00")
+            self.total_expenses_label.setText("Total de Despesas do Mês: 0,00")
+            if self.period_box.currentData() == 1:
+                self.chart.request_update([], title)
+            return
 
-        for i, (date, value) in enumerate(df['Valor'].items()):
-            self.ax.text(i, value, f'{value:,.2f}', ha='center', va='bottom', fontsize=8, color='white')
+        with tracer.span("update_graphs.aggregate"):
+            total_expenses = aggregates.expenses
+            total_gross = aggregates.gross
 
-        self.ax.axhline(0, color='white', linewidth=0.5, linestyle='--')
-        self.canvas.draw()
+            # Cópia dos valores para a thread do gráfico (rótulos e barras são montados lá)
+            if self.graphs_mode == "united":
+                # Valores agrupados pelo dia
+                series = aggregates.daily_series()
+            else:
+                series = list(zip(entries.ordinals, entries.values))
+
+        with tracer.span("update_graphs.labels"):
+            # Atualizar o saldo total atual do mês
+            current_month_balance = aggregates.balance
+            self.current_month_balance_label.setText(
+                f"Saldo Atual do Mês: {format_brl(current_month_balance)}   -   Saldo Bruto: {format_brl(total_gross)}")
+            self.current_month_balance_label.setAlignment(Qt.AlignCenter)
+            self.total_expenses_label.setText(
+                f"Total de Despesas do Mês: {format_brl(total_expenses)}")
+            self.total_expenses_label.setAlignment(Qt.AlignLeft)
+
+        # O gráfico é desenhado fora da thread da interface; pedidos seguidos substituem os anteriores.
+        # A imagem de cada mês fica guardada até a próxima edição nele (versão do mês na chave)
+        if self.period_box.currentData() == 1:
+            cache_key = (self.ledger.year, self.ledger.month, self.ledger.version(), self.graphs_mode, title)
+            self.chart.request_update(series, title, month_bounds(self.ledger.year, self.ledger.month),
+                                      grouped=self.graphs_mode == "united", cache_key=cache_key)
+
+    def update_period_graph(self):
+        # Vários meses terminando no mês aberto; o gráfico agrupa por semana ou mês conforme o período
+        with tracer.span("update_graphs.period"):
+            months = self.period_box.currentData()
+            key = self.ledger.year * 12 + self.ledger.month - 1
+            first_year, first_month = divmod(key - months + 1, 12)
+            span, series = self.ledger.reports.chart_series(first_year, first_month + 1, self.ledger.year, self.ledger.month)
+            title = (f"Receitas e Despesas - {meses_pt[first_month + 1]} de {first_year} "
+                     f"a {meses_pt[self.ledger.month]} de {self.ledger.year}")
+        self.chart.request_update(series, title, span)
+
+    @traced("run_search")
+    def run_search(self):
+        text = self.search_box.text()
+        self.search_results.clear()
+        results = self.ledger.search(text) if text.strip() else []
+        for entry_id, ordinal, description, cents in results:
+            item = QListWidgetItem(f"{format_date(ordinal)}   {description}   {format_brl(cents)}")
+            item.setData(Qt.UserRole, (entry_id, ordinal))
+            self.search_results.addItem(item)
+        self.search_results.setVisible(bool(results))
+
+    def on_search_result(self, item):
+        # Abre o mês do lançamento encontrado e seleciona a linha
+        entry_id, ordinal = item.data(Qt.UserRole)
+        day = date.fromordinal(ordinal)
+        if (day.year, day.month) != (self.ledger.year, self.ledger.month):
+            self.model.open_month(day.year, day.month)
+            self.current_date = f"{day.month:02d}/{day.year}"
+            self.update_graphs()
+        row = self.ledger.row_of(entry_id, ordinal)
+        if row is not None:
+            index = self.model.index(row, 1)
+            self.table.scrollTo(index)
+            self.table.setCurrentIndex(index)
+            self.table.setFocus()
+
+    def update_balances(self):
+        # Saldos acumulados vindos das somas de prefixo por mês (um lançamento antigo não exige reler o histórico)
+        self.month_balances_label.setText(
+            f"Saldo Inicial do Mês: {format_brl(self.ledger.opening_balance())}   -   "
+            f"Saldo Final do Mês: {format_brl(self.ledger.closing_balance())}")
+        self.month_balances_label.setAlignment(Qt.AlignCenter)
+        self.total_balance_label.setText(
+            f"Saldo Total de Todos os Meses: {format_brl(self.ledger.total_balance())}")
+        self.total_balance_label.setAlignment(Qt.AlignRight)
 
+    @pyqtSlot()
+    @traced("show_reports")
+    def show_reports(self):
+        # Relatórios anuais e de vários anos a partir dos resumos materializados
+        from reports_dialog import ReportsDialog
+        ReportsDialog(self.ledger, self).exec_()
+
+    @pyqtSlot()
+    @traced("show_consolidation")
+    def show_consolidation(self):
+        # Soma vários livros-caixa (um banco por conta ou empresa), agregados em paralelo
+        paths, _ = QFileDialog.getOpenFileNames(self, "Consolidar Livros-caixa", "", "Bancos (*.db);;Todos os arquivos (*)")
+        if not paths:
+            return
+        self.ledger.store.flush()  # O banco aberto pode estar entre os escolhidos
+        from consolidation_dialog import ConsolidationDialog
+        try:
+            dialog = ConsolidationDialog(paths, self.ledger.year, self.ledger.month, self)
+        except (ValueError, sqlite3.Error) as error:
+            QMessageBox.warning(self, "Consolidar", f"Não foi possível ler os livros-caixa: {error}")
+            return
+        dialog.exec_()
 
+    @pyqtSlot()
+    @traced("show_forecast")
+    def show_forecast(self):
+        # Recorrências e saldo previsto; regras que vencem hoje já são gravadas ao fechar
+        from forecast_dialog import ForecastDialog
+        ForecastDialog(self.ledger, self).exec_()
+        if self.ledger.post_recurring():
+            self.model.refresh()
+            self.update_graphs()
 
+    @pyqtSlot()
+    @traced("navigate_data")
     def navigate_data(self):
         # Janela de navegação dos meses
         dialog = QDialog(self)
@@ -386,31 +552,10 @@ class FinancialManager(QMainWindow):
 
         main_layout = QVBoxLayout()
 
-        # Linha adicionada para funcionar esta versão
-        self.current_date_navigate = datetime.now()
-        self.current_date_navigate = datetime.strftime(self.current_date_navigate, "%d/%m/%Y")
-
-        # Consultando banco de dados (Versão atual sem banco de dados)
-        data = [(1, self.current_date_navigate, "", 0.0)]
+        # Consultando o índice (ano, mês) do banco de dados
         dates_by_year = {}
-
-        # Adicionar meses/anos únicos ao dicionário
-        for row_data in data:
-            try:
-                date_value = datetime.strptime(row_data[1], "%d/%m/%Y")
-            except ValueError:
-                try:
-                    date_value = datetime.strptime(row_data[1], "%Y-%m-%d")
-                except ValueError:
-                    # Pular se o formato não for reconhecido
-                    continue
-
-            year = date_value.strftime("%Y")
-            month_year = date_value.strftime("%m/%Y")
-
-            if year not in dates_by_year:
-                dates_by_year[year] = set()
-            dates_by_year[year].add(month_year)
+        for year, month in self.ledger.months():
+            dates_by_year.setdefault(str(year), set()).add(f"{month:02d}/{year}")
 
         # Organizar os anos e adicionar eles ao layout com QGroupBox
         sorted_years = sorted(dates_by_year.keys(), reverse=True)
@@ -452,170 +597,84 @@ class FinancialManager(QMainWindow):
         # Mostrar diálogo
         dialog.exec_()
 
+    @traced("on_month_year_selected")
     def on_month_year_selected(self, item):
         # Obtenha o mês/ano selecionado
         selected_month_year = item.text()
         month = int(selected_month_year.split("/")[0])
         year = int(selected_month_year.split("/")[1].split(' - ')[0])
 
-        # Criar tabela
-        self.table.setRowCount(0)
-
-        # Linha adicionada para funcionar esta versão
-        self.current_date_navigate = datetime.now()
-        self.current_date_navigate = datetime.strftime(self.current_date_navigate, "%d/%m/%Y")
-
-        # Consultando banco de dados (Versão atual sem banco de dados)
-        data = [(1, self.current_date_navigate, "", 0.0)]
-
-        # Adicionar dados à tabela
-        for row_data in data:
-            try:
-                date_value = datetime.strptime(row_data[1], "%d/%m/%Y")
-            except ValueError:
-                try:
-                    date_value = datetime.strptime(row_data[1], "%Y-%m-%d")
-                except ValueError:
-                    # Ignore esta linha se o formato da data não for reconhecido
-                    continue
-
-            if date_value.month == month and date_value.year == year:
-                row_position = self.table.rowCount()
-                self.table.insertRow(row_position)
-                item = QTableWidgetItem(date_value.strftime("%d/%m/%Y"))
-                item.setData(Qt.UserRole, row_data[0])  # Store the id in the UserRole of the item
-                self.table.setItem(row_position, 0, item)
-                self.table.setItem(row_position, 1, QTableWidgetItem(row_data[2]))
-                if isinstance(row_data[3], (int, float)):
-                    self.table.setItem(row_position, 2, QTableWidgetItem(f"{row_data[3]:.2f}".replace(".", ",")))
-                else:
-                    self.table.setItem(row_position, 2, QTableWidgetItem(row_data[3]))
-                self.update_entry_type(row_position)
+        # Consultando somente as linhas do mês no banco de dados
+        self.model.open_month(year, month)
         
         # Salvar data atual da tabela
         self.current_date = selected_month_year.split(' - ', 1)[0]
 
-        self.sort_table_by_date()
-
-        # Atualizar gráfico
+        # Atualizar gráfico (as linhas já vêm ordenadas por data)
         self.update_graphs()
 
     def on_date_selected(self, item):
-        # Obtenha a data selecionada
-        selected_date = item.text()
-
-        # Limpar tabela
-        self.table.setRowCount(0)
-
-        # Linha adicionada para funcionar esta versão
-        self.current_date_navigate = datetime.now()
-        self.current_date_navigate = datetime.strftime(self.current_date_navigate, "%d/%m/%Y")
-
-        # Consultando banco de dados (Versão atual sem banco de dados)
-        data = [(1, self.current_date_navigate, "", 0.0)]
-
-        # Adicionar dados à tabela
-        for row_data in data:
-            row_position = self.table.rowCount()
-            self.table.insertRow(row_position)
-            item = QTableWidgetItem(row_data[1])
-            item.setData(Qt.UserRole, row_data[0])  # Armazene o id no UserRole do item
-            self.table.setItem(row_position, 0, item)
-            self.table.setItem(row_position, 1, QTableWidgetItem(row_data[2]))
-            if isinstance(row_data[3], (int, float)):
-                self.table.setItem(row_position, 2, QTableWidgetItem(f"{row_data[3]:.2f}".replace(".", ",")))
-            else:
-                self.table.setItem(row_position, 2, QTableWidgetItem(row_data[3]))
-            self.update_entry_type(row_position)
+        # Obtenha a data selecionada e carregue o mês correspondente
+        selected_date = datetime.strptime(item.text(), "%d/%m/%Y")
+        self.model.open_month(selected_date.year, selected_date.month)
 
         # Atualizar gráfico
         self.update_graphs()
 
+    @traced("load_data")
     def load_data(self):
         # Obtenha o mês e ano atuais
         current_month = datetime.now().month
         current_year = datetime.now().year
 
-        # Linha adicionada para funcionar esta versão
-        self.current_date_navigate = datetime.now()
-        self.current_date_navigate = datetime.strftime(self.current_date_navigate, "%d/%m/%Y")
-
-        # Consultando banco de dados (Versão atual sem banco de dados)
-        data = [(1, self.current_date_navigate, "", 0.0)]
-
-        # Adicionar dados à tabela
-        for row_data in data:
-            try:
-                date_value = datetime.strptime(row_data[1], "%d/%m/%Y")
-            except ValueError:
-                try:
-                    date_value = datetime.strptime(row_data[1], "%Y-%m-%d")
-                except ValueError:
-                    # Ignore esta linha se o formato da data não for reconhecido
-                    continue
-
-            if date_value.month == current_month and date_value.year == current_year:
-                row_position = self.table.rowCount()
-                self.table.insertRow(row_position)
-                item = QTableWidgetItem(date_value.strftime("%d/%m/%Y"))
-                item.setData(Qt.UserRole, row_data[0])  # Armazene o id no UserRole do item
-                self.table.setItem(row_position, 0, item)
-                self.table.setItem(row_position, 1, QTableWidgetItem(row_data[2]))
-                if isinstance(row_data[3], (int, float)):
-                    self.table.setItem(row_position, 2, QTableWidgetItem(f"{row_data[3]:.2f}".replace(".", ",")))
-                else:
-                    self.table.setItem(row_position, 2, QTableWidgetItem(row_data[3]))
-                self.update_entry_type(row_position)
-        self.sort_table_by_date()
+        # Consultando somente as linhas do mês atual no banco de dados (já vêm ordenadas por data)
+        self.model.open_month(current_year, current_month)
+        self.update_graphs()
 
+    @pyqtSlot()
+    @traced("sort_table_by_date")
     def sort_table_by_date(self):
-        # Obtenha o número de linhas da tabela
-        row_count = self.table.rowCount()
-        
-        # Crie uma lista para armazenar os dados da tabela junto com os IDs
-        table_data = []
-        for row in range(row_count):
-            date_item = self.table.item(row, 0)
-            what_date = date_item.text().rsplit('/', 1)[-1]
-            if what_date != self.current_date.split('/')[1]:
-                continue
-            description_item = self.table.item(row, 1)
-            value_item = self.table.item(row, 2)
-            type_item = self.table.item(row, 3)
-            
-            # Recuperar dados de itens de tabela
-            date = date_item.text()
-            description = description_item.text() if description_item is not None else ""
-            value = value_item.text() if value_item is not None else 0.0
-            entry_id = self.table.item(row, 0).data(Qt.UserRole)  # Recuperar ID de UserRole da primeira coluna
-            entry_type = type_item.text() if type_item is not None else ""
-            
-            # Armazene dados em uma tupla junto com o ID
-            table_data.append((entry_id, date, description, value, entry_type))
-        
-        # Classifique os dados da tabela por data
-        table_data.sort(key=lambda x: datetime.strptime(x[1], "%d/%m/%Y"))
-        
-        # Limpar a tabela
-        self.table.setRowCount(0)
-        
-        # Preencher a tabela com dados classificados
-        for row, (entry_id, date, description, value, entry_type) in enumerate(table_data):
-            self.table.insertRow(row)
-            self.table.setItem(row, 0, QTableWidgetItem(date))
-            self.table.setItem(row, 1, QTableWidgetItem(description))
-            if type(value) == float:
-                value = str(value).replace('.', ',')
-            self.table.setItem(row, 2, QTableWidgetItem(value))
-            self.table.setItem(row, 3, QTableWidgetItem(entry_type))
-            self.table.item(row, 0).setData(Qt.UserRole, entry_id)  # Definir o ID para o UserRole da primeira coluna
-
-        for row in range(self.table.rowCount()):
-            self.update_entry_type(row)
-        self.update_graphs()
+        # As linhas são mantidas ordenadas a cada inclusão/edição; aqui só reindexamos se preciso
+        if self.model.sort_by_date():
+            self.update_graphs()
+
+def report_startup(window, budget_ms):
+    # Mostra os tempos de abertura e encerra; retorna erro se a primeira pintura passar do orçamento
+    times = window.startup_times
+    for name in ('window', 'first_paint', 'first_chart'):
+        print(f"{name}: {times[name] * 1000:.0f} ms", file=sys.stderr)
+    QApplication.instance().exit(1 if times['first_paint'] * 1000 > budget_ms else 0)
+
 
 if __name__ == '__main__':
-    app = QApplication(sys.argv)
-    window = FinancialManager()
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--startup-time', action='store_true',
+                        help="mede o tempo até a primeira pintura e até o primeiro gráfico e encerra")
+    parser.add_argument('--startup-budget', type=float, default=1000,
+                        help="orçamento em ms para a primeira pintura (usado com --startup-time)")
+    parser.add_argument('--month-cache', type=int, default=MONTH_CACHE_SIZE, metavar='N',
+                        help="meses (tabela e imagem do gráfico) mantidos em memória para trocas rápidas; 0 desliga")
+    parser.add_argument('--trace', metavar='ARQUIVO', default=os.environ.get('FINANCIAL_TRACE'),
+                        help="registra os handlers e grava um trace do Chrome em ARQUIVO ao sair")
+    parser.add_argument('--trace-overlay', action='store_true',
+                        help="mostra sobre a janela os tempos do event loop e dos handlers")
+    args, qt_args = parser.parse_known_args()
+
+    if args.trace or args.trace_overlay:
+        tracer.enable()
+    app = QApplication(sys.argv[:1] + qt_args)
+    window = FinancialManager(month_cache_size=args.month_cache)
+    window.startup_times['window'] = time.perf_counter() - STARTUP_CLOCK
+    if args.trace_overlay:
+        from trace_overlay import TraceOverlay
+        window.trace_overlay = TraceOverlay(window)
+    if args.trace:
+        def export_trace():
+            tracer.export_chrome_trace(args.trace)
+            print(tracer.format_summary(), file=sys.stderr)
+        app.aboutToQuit.connect(export_trace)
+    if args.startup_time:
+        window.chart.rendered.connect(lambda: QTimer.singleShot(0, lambda: report_startup(window, args.startup_budget)))
     window.show()
-    app.exec_()
+    sys.exit(app.exec_())
@@ -0,0 +1,56 @@
+import re
+
+# Valores monetários são guardados como inteiros em centavos (int64).
+# Formato pt-BR: "." separa milhares e "," separa os centavos, ex.: "-1.500,50"
+
+money_pattern = re.compile(r"^[+-]?(\d{1,3}(\.\d{3})+|\d*)(,\d*)?$")
+
+
+def parse_brl(text):
+    # Converte "1.500,50" em 150050 centavos; lança ValueError se o formato for inválido
+    text = text.strip()
+    if not text:
+        return 0
+    if not money_pattern.match(text) or text.strip('+-') in ('', ','):
+        raise ValueError(f"valor inválido: {text!r}")
+    negative = text[0] == '-'
+    integer, _, fraction = text.lstrip('+-').replace('.', '').partition(',')
+    # Só aritmética inteira; com mais de duas casas decimais arredonda meio para cima (em valor absoluto)
+    cents = int(integer or 0) * 100 + int(fraction[:2].ljust(2, '0')) + (fraction[2:3] >= '5')
+    return -cents if negative else cents
+
+
+def format_brl(cents):
+    # Converte 150050 centavos em "1.500,50"
+    sign = '-' if cents < 0 else ''
+    integer, fraction = divmod(abs(int(cents)), 100)
+    return f"{sign}{integer:,}".replace(",", ".") + f",{fraction:02d}"
+
+
+def matches_money(text):
+    return money_pattern.match(text) is not None
+
+
+# As versões em lote importam o NumPy só quando usadas (abertura mais rápida da janela)
+
+def parse_brl_array(texts):
+    # Versão vetorizada de parse_brl para uma coluna inteira.
+    # Retorna (centavos int64, máscara de válidos); valores inválidos ficam com 0
+    import numpy as np
+    texts = np.char.strip(np.asarray(texts, dtype=str))
+    if texts.size == 0:
+        return np.zeros(0, dtype=np.int64), np.ones(0, dtype=bool)
+    valid = np.frompyfunc(matches_money, 1, 1)(texts).astype(bool) & ~np.isin(np.char.lstrip(texts, '+-'), ['', ','])
+    valid |= texts == ''
+    cleaned = np.char.replace(np.char.replace(texts, '.', ''), ',', '.')
+    cleaned = np.where(valid & (texts != ''), cleaned, '0')
+    cleaned = np.where(np.char.endswith(cleaned, '.'), np.char.add(cleaned, '0'), cleaned)
+    # Com até duas casas decimais o float é exato depois do arredondamento; com mais, o
+    # arredondamento poderia errar por um centavo e esses valores (raros) passam pelo parse_brl
+    precise = valid & (np.char.str_len(np.char.partition(texts, ',')[:, 2]) > 2)
+    cleaned = np.where(precise, '0', cleaned)
+    amounts = cleaned.astype(np.float64)
+    cents = (np.sign(amounts) * np.floor(np.abs(amounts) * 100 + 0.5)).astype(np.int64)
+    for index in np.flatnonzero(precise):
+        cents[index] = parse_brl(str(texts[index]))
+    return cents, valid
@@ -0,0 +1,112 @@
+from collections import OrderedDict
+from datetime import date
+from balances import month_key
+from buckets import MONTH, choose_bucket
+from database import month_bounds
+
+# Relatórios de vários anos servidos pelos resumos materializados no banco (months e
+# descriptions): nenhum relatório lê os lançamentos. Os resultados ficam num cache LRU e
+# cada um guarda o intervalo de meses de que depende; uma edição só descarta os resultados
+# que cobrem o mês editado. A série do gráfico de períodos curtos é a exceção: soma por dia
+# os lançamentos do intervalo, lidos pelo índice de ordinais
+
+CACHE_SIZE = 128
+
+
+class QueryCache:
+    def __init__(self, size=CACHE_SIZE):
+        self.size = size
+        self.results = OrderedDict()  # chave -> (primeiro mês, último mês, resultado)
+
+    def get(self, key, first, last, compute):
+        if key in self.results:
+            self.results.move_to_end(key)
+            return self.results[key][2]
+        result = compute()
+        self.results[key] = (first, last, result)
+        if len(self.results) > self.size:
+            self.results.popitem(last=False)
+        return result
+
+    def invalidate(self, year, month):
+        key = month_key(year, month)
+        for cached in [cached for cached, (first, last, _) in self.results.items() if first <= key <= last]:
+            del self.results[cached]
+
+    def clear(self):
+        self.results.clear()
+
+
+class Reports:
+    def __init__(self, store, cache_size=CACHE_SIZE):
+        self.store = store
+        self.cache = QueryCache(cache_size)
+
+    def invalidate(self, year, month):
+        self.cache.invalidate(year, month)
+
+    def clear(self):
+        self.cache.clear()
+
+    def years(self):
+        return [row[0] for row in self.store.conn.execute("SELECT DISTINCT year FROM months ORDER BY year")]
+
+    def monthly(self, year):
+        # Mês a mês: (mês, lançamentos, entradas, saídas, saldo), com os 12 meses presentes
+        def compute():
+            totals = {month: (entries, income, expenses) for month, entries, income, expenses in self.store.conn.execute(
+                "SELECT month, entries, income, expenses FROM months WHERE year = ?", (year,))}
+            rows = []
+            for month in range(1, 13):
+                entries, income, expenses = totals.get(month, (0, 0, 0))
+                rows.append((month, entries, income, expenses, income + expenses))
+            return rows
+        return self.cache.get(('monthly', year), month_key(year, 1), month_key(year, 12), compute)
+
+    def yearly(self, first_year, last_year):
+        # Ano a ano: (ano, lançamentos, entradas, saídas, saldo)
+        def compute():
+            return [tuple(row) + (row[2] + row[3],) for row in self.store.conn.execute(
+                "SELECT year, sum(entries), sum(income), sum(expenses) FROM months "
+                "WHERE year BETWEEN ? AND ? GROUP BY year ORDER BY year", (first_year, last_year))]
+        return self.cache.get(('yearly', first_year, last_year),
+                              month_key(first_year, 1), month_key(last_year, 12), compute)
+
+    def year_over_year(self, year):
+        # Comparação com o ano anterior: (mês, saldo anterior, saldo atual, diferença, variação % ou None)
+        def compute():
+            rows = []
+            for previous, current in zip(self.monthly(year - 1), self.monthly(year)):
+                before, now = previous[4], current[4]
+                change = (now - before) * 100 / abs(before) if before else None
+                rows.append((current[0], before, now, now - before, change))
+            return rows
+        return self.cache.get(('year_over_year', year), month_key(year - 1, 1), month_key(year, 12), compute)
+
+    def top_descriptions(self, first_year, last_year, limit=10):
+        # Maiores gastos por descrição no período: (descrição, lançamentos, saídas)
+        def compute():
+            return [tuple(row) for row in self.store.conn.execute(
+                "SELECT description, sum(entries), sum(expenses) AS spent FROM descriptions "
+                "WHERE year BETWEEN ? AND ? AND expenses < 0 GROUP BY description "
+                "ORDER BY spent LIMIT ?", (first_year, last_year, limit))]
+        return self.cache.get(('top_descriptions', first_year, last_year, limit),
+                              month_key(first_year, 1), month_key(last_year, 12), compute)
+
+    def chart_series(self, first_year, first_month, last_year, last_month):
+        # Série do gráfico de um período: ((primeiro, último ordinal), [(ordinal, centavos)]).
+        # Períodos que o gráfico agrupa por mês vêm do resumo months (um ponto por mês)
+        first, last = month_bounds(first_year, first_month)[0], month_bounds(last_year, last_month)[1]
+
+        def compute():
+            if choose_bucket(first, last) == MONTH:
+                return [(date(year, month, 1).toordinal(), income + expenses) for year, month, income, expenses
+                        in self.store.conn.execute(
+                            "SELECT year, month, income, expenses FROM months WHERE year * 12 + month BETWEEN ? AND ? "
+                            "ORDER BY year, month", (first_year * 12 + first_month, last_year * 12 + last_month))]
+            return self.store.conn.execute(
+                "SELECT ordinal, sum(cents) FROM entries WHERE ordinal BETWEEN ? AND ? "
+                "GROUP BY ordinal ORDER BY ordinal", (first, last)).fetchall()
+        series = self.cache.get(('chart_series', first_year, first_month, last_year, last_month),
+                                month_key(first_year, first_month), month_key(last_year, last_month), compute)
+        return (first, last), series
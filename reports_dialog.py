@@ -0,0 +1,86 @@
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QSpinBox, QTabWidget, QTableWidget, QTableWidgetItem, QHeaderView
+)
+from money import format_brl
+
+MONTH_NAMES = ('Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
+               'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro')
+
+
+class ReportsDialog(QDialog):
+    # Relatórios de vários anos; os números vêm do Ledger.reports (resumos + cache), não das linhas
+
+    def __init__(self, ledger, parent=None):
+        super().__init__(parent)
+        self.reports = ledger.reports
+        self.setWindowTitle("Relatórios")
+        self.resize(700, 450)
+
+        years = self.reports.years() or [ledger.year]
+        self.first_year = QSpinBox()
+        self.last_year = QSpinBox()
+        for spin in (self.first_year, self.last_year):
+            spin.setRange(years[0], years[-1])
+        self.first_year.setValue(max(years[0], years[-1] - 9))
+        self.last_year.setValue(years[-1])
+
+        period = QHBoxLayout()
+        period.addWidget(QLabel("De"))
+        period.addWidget(self.first_year)
+        period.addWidget(QLabel("até"))
+        period.addWidget(self.last_year)
+        period.addStretch()
+
+        self.tabs = QTabWidget()
+        self.monthly = self.add_table("Mês a mês", ["Mês", "Lançamentos", "Entradas", "Saídas", "Saldo"])
+        self.yearly = self.add_table("Por ano", ["Ano", "Lançamentos", "Entradas", "Saídas", "Saldo"])
+        self.comparison = self.add_table("Ano contra ano", ["Mês", "Saldo anterior", "Saldo", "Diferença", "Variação"])
+        self.top = self.add_table("Maiores gastos", ["Descrição", "Lançamentos", "Saídas"])
+
+        layout = QVBoxLayout()
+        layout.addLayout(period)
+        layout.addWidget(self.tabs)
+        self.setLayout(layout)
+        self.refresh()
+        self.first_year.valueChanged.connect(self.refresh)
+        self.last_year.valueChanged.connect(self.refresh)
+
+    def add_table(self, title, headers):
+        table = QTableWidget(0, len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.setEditTriggers(QTableWidget.NoEditTriggers)
+        table.verticalHeader().setVisible(False)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.tabs.addTab(table, title)
+        return table
+
+    def fill(self, table, rows):
+        table.setRowCount(len(rows))
+        for row, values in enumerate(rows):
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if column:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                table.setItem(row, column, item)
+
+    def refresh(self):
+        first, last = self.first_year.value(), self.last_year.value()
+        if first > last:
+            first, last = last, first
+        self.tabs.setTabText(0, f"Mês a mês ({last})")
+        self.tabs.setTabText(2, f"{last} contra {last - 1}")
+
+        self.fill(self.monthly, [
+            (MONTH_NAMES[month - 1], str(entries), format_brl(income), format_brl(expenses), format_brl(balance))
+            for month, entries, income, expenses, balance in self.reports.monthly(last)])
+        self.fill(self.yearly, [
+            (str(year), str(entries), format_brl(income), format_brl(expenses), format_brl(balance))
+            for year, entries, income, expenses, balance in self.reports.yearly(first, last)])
+        self.fill(self.comparison, [
+            (MONTH_NAMES[month - 1], format_brl(before), format_brl(now), format_brl(difference),
+             "-" if change is None else f"{change:+.1f}%".replace('.', ','))
+            for month, before, now, difference, change in self.reports.year_over_year(last)])
+        self.fill(self.top, [
+            (description, str(entries), format_brl(spent))
+            for description, entries, spent in self.reports.top_descriptions(first, last)])
@@ -0,0 +1,167 @@
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSignal
+from PyQt5.QtGui import QColor
+from ledger import LedgerError, entry_type, parse_entry_date, COLUMN_DATE
+from money import format_brl
+from dates import format_date
+
+HEADERS = ["Data", "Descrição", "Valor", "Tipo"]
+
+COLOR_INCOME = QColor(0, 255, 0)  # Verde para entrada
+COLOR_NEUTRAL = QColor(255, 255, 0)  # Amarelo para neutro
+COLOR_EXPENSE = QColor(255, 0, 0)  # Vermelho para saída
+
+
+class LedgerTableModel(QAbstractTableModel):
+    # Visão Qt sobre as colunas do mês aberto no Ledger: nenhum objeto Qt é criado por célula
+
+    # Emitido depois que uma célula foi editada e gravada (linha, coluna)
+    cellChanged = pyqtSignal(int, int)
+    # Emitido quando uma edição é rejeitada na validação
+    errorOccurred = pyqtSignal(str)
+
+    def __init__(self, ledger, parent=None):
+        super().__init__(parent)
+        self.ledger = ledger
+
+    @property
+    def entries(self):
+        return self.ledger.entries
+
+    def open_month(self, year, month):
+        self.beginResetModel()
+        self.ledger.open_month(year, month)
+        self.endResetModel()
+
+    def reload(self):
+        self.beginResetModel()
+        self.ledger.reload()
+        self.endResetModel()
+
+    def refresh(self):
+        self.beginResetModel()
+        self.ledger.refresh()
+        self.endResetModel()
+
+    def add_entry(self):
+        # Nova linha na data padrão do mês aberto, já na posição ordenada; retorna a linha inserida
+        ordinal = self.ledger.default_entry_date()
+        row = self.entries.position_for(ordinal)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.ledger.add_entry(ordinal)
+        self.endInsertRows()
+        return row
+
+    def remove_row(self, row):
+        self.beginRemoveRows(QModelIndex(), row, row)
+        self.ledger.delete_row(row)
+        self.endRemoveRows()
+
+    def import_statement(self, path, progress=None, cancelled=None):
+        self.beginResetModel()
+        result = self.ledger.import_statement(path, progress=progress, cancelled=cancelled)
+        self.endResetModel()
+        return result
+
+    # Operações em várias linhas: um único reset da tabela por operação, sem um sinal por célula
+
+    def remove_rows(self, rows):
+        self.beginResetModel()
+        result = self.ledger.delete_rows(rows)
+        self.endResetModel()
+        return result
+
+    def paste(self, top, left, block):
+        self.beginResetModel()
+        result = self.ledger.paste(top, left, block)
+        self.endResetModel()
+        return result
+
+    def fill_down(self, rows, column):
+        self.beginResetModel()
+        result = self.ledger.fill_down(rows, column)
+        self.endResetModel()
+        return result
+
+    def sort_by_date(self):
+        # As linhas já ficam ordenadas; só reindexa se algo quebrou a ordem
+        self.layoutAboutToBeChanged.emit()
+        changed = self.ledger.sort_month()
+        self.layoutChanged.emit()
+        return changed
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.entries)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole:
+            if orientation == Qt.Horizontal:
+                return HEADERS[section]
+            return str(section + 1)
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        if index.column() != 3:
+            flags |= Qt.ItemIsEditable  # A coluna "Tipo" não é editável
+        return flags
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row, column = index.row(), index.column()
+        entries = self.entries
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            if column == 0:
+                return format_date(entries.ordinals[row])
+            if column == 1:
+                return entries.description(row)
+            if column == 2:
+                return format_brl(entries.values[row])
+            return entry_type(entries.values[row])
+        if role == Qt.ForegroundRole and column == 3:
+            valor = entries.values[row]
+            return COLOR_INCOME if valor > 0 else COLOR_NEUTRAL if valor == 0 else COLOR_EXPENSE
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or role != Qt.EditRole:
+            return False
+        row, column = index.row(), index.column()
+        try:
+            if column == COLUMN_DATE:
+                return self.set_date(row, str(value))
+            changed = self.ledger.set_cell(row, column, str(value))
+        except LedgerError as error:
+            self.errorOccurred.emit(str(error))
+            return False
+        if changed:
+            # O tipo (coluna 3) depende do valor
+            self.dataChanged.emit(index, self.index(row, 3) if column == 2 else index)
+            self.cellChanged.emit(row, column)
+        return True
+
+    def set_date(self, row, text):
+        # A linha é movida para a posição da nova data (ou sai do mês aberto) sem recriar a tabela
+        target = self.ledger.date_target(row, parse_entry_date(text))
+        if target is None:
+            self.beginRemoveRows(QModelIndex(), row, row)
+            self.ledger.set_cell(row, COLUMN_DATE, text)
+            self.endRemoveRows()
+            self.cellChanged.emit(row, COLUMN_DATE)
+            return True
+        moving = target != row
+        if moving:
+            self.beginMoveRows(QModelIndex(), row, row, QModelIndex(), target + 1 if target > row else target)
+        changed = self.ledger.set_cell(row, COLUMN_DATE, text)
+        if moving:
+            self.endMoveRows()
+        if changed:
+            index = self.index(target, COLUMN_DATE)
+            self.dataChanged.emit(index, index)
+            self.cellChanged.emit(target, COLUMN_DATE)
+        return True
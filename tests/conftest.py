@@ -0,0 +1,4 @@
+import os, sys
+
+# Os módulos ficam na raiz do repositório
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
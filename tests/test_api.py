@@ -0,0 +1,112 @@
+import asyncio, json
+from api import ApiServer, MAX_BODY_SIZE, MAX_HEADERS
+
+
+def serve(tmp_path, scenario):
+    # Roda `scenario(api)` com o servidor escutando numa porta livre
+    async def main():
+        api = await ApiServer(str(tmp_path / "ledger.db"), port=0).start()
+        try:
+            return await scenario(api)
+        finally:
+            await api.stop()
+    return asyncio.run(main())
+
+
+async def send(api, raw):
+    # (status, cabeçalhos, corpo) da resposta a um pedido HTTP já montado
+    reader, writer = await asyncio.open_connection(api.host, api.port)
+    writer.write(raw)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode('latin-1').strip()
+        if not line:
+            break
+        name, _, value = line.partition(':')
+        headers[name.lower()] = value.strip()
+    body = await reader.readexactly(int(headers['content-length']))
+    writer.close()
+    return status, headers, json.loads(body) if body else None
+
+
+async def call(api, method, path, document=None, headers=None):
+    body = b'' if document is None else json.dumps(document).encode('utf-8')
+    lines = [f"{method} {path} HTTP/1.1", "Host: localhost", "Connection: close"]
+    if document is not None or method in ('POST', 'PATCH'):
+        lines.append(f"Content-Length: {len(body)}")
+    lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+    return await send(api, ("\r\n".join(lines) + "\r\n\r\n").encode('latin-1') + body)
+
+
+def test_entry_crud_status_codes(tmp_path):
+    async def scenario(api):
+        status, headers, entry = await call(api, 'POST', '/entries',
+                                            {'date': '03/05/2024', 'description': 'Aluguel', 'value': '-1.500,00'})
+        assert status == 201 and headers['location'] == f"/entries/{entry['id']}"
+        assert entry['cents'] == -150000 and entry['date'] == '2024-05-03' and entry['type'] == 'Saída'
+        path = f"/entries/{entry['id']}"
+        assert (await call(api, 'GET', path))[2] == entry
+        status, _, patched = await call(api, 'PATCH', path, {'cents': 2500})
+        assert status == 200 and patched['cents'] == 2500 and patched['description'] == 'Aluguel'
+        assert (await call(api, 'DELETE', path))[0] == 204
+        assert (await call(api, 'GET', path))[0] == 404
+        assert (await call(api, 'DELETE', path))[0] == 404
+        assert (await call(api, 'PATCH', path, {'cents': 1}))[0] == 404
+        assert (await call(api, 'GET', '/entries/abc'))[0] == 404
+        assert (await call(api, 'GET', '/nada'))[0] == 404
+        assert (await call(api, 'PUT', '/entries', {}))[0] == 405
+        assert (await call(api, 'POST', '/months'))[0] == 405
+    serve(tmp_path, scenario)
+
+
+def test_invalid_bodies_are_rejected_with_400(tmp_path):
+    async def scenario(api):
+        for document in ({'description': 'sem data'}, {'date': '31/02/2024'}, {'date': '2024-05-03', 'value': 'abc'},
+                         {'date': '2024-05-03', 'cents': '100'}, {'date': '2024-05-03', 'cents': True},
+                         {'date': '2024-05-03', 'cents': 10 ** 30}, {'date': '2024-05-03', 'cents': -2 ** 63 - 1},
+                         {'date': '2024-05-03', 'value': '9' * 30}, [1, 2]):
+            status, _, error = await call(api, 'POST', '/entries', document)
+            assert status == 400, document
+            assert error['error']
+        raw = b"POST /entries HTTP/1.1\r\nContent-Length: 5\r\nConnection: close\r\n\r\n{nop}"
+        assert (await send(api, raw))[0] == 400
+        status, _, entry = await call(api, 'POST', '/entries', {'date': '2024-05-03', 'cents': 2 ** 63 - 1})
+        assert status == 201 and entry['cents'] == 2 ** 63 - 1
+    serve(tmp_path, scenario)
+
+
+def test_month_etag_and_not_modified(tmp_path):
+    async def scenario(api):
+        await call(api, 'POST', '/entries', {'date': '2024-05-03', 'description': 'Salário', 'cents': 500000})
+        status, headers, month = await call(api, 'GET', '/months/2024/5')
+        etag = headers['etag']
+        assert status == 200 and month['totals']['closing_balance'] == 500000
+        status, headers, body = await call(api, 'GET', '/months/2024/5', headers={'If-None-Match': etag})
+        assert (status, headers['etag'], body) == (304, etag, None)
+        # Um lançamento num mês anterior muda o saldo de abertura, e com ele a ETag
+        await call(api, 'POST', '/entries', {'date': '2024-01-10', 'cents': 1000})
+        status, headers, month = await call(api, 'GET', '/months/2024/5', headers={'If-None-Match': etag})
+        assert status == 200 and headers['etag'] != etag and month['totals']['opening_balance'] == 1000
+        assert (await call(api, 'GET', '/months/2024/13'))[0] == 404
+        status, _, months = await call(api, 'GET', '/months')
+        assert [(row['year'], row['month']) for row in months] == [(2024, 1), (2024, 5)]
+    serve(tmp_path, scenario)
+
+
+def test_malformed_requests_get_4xx(tmp_path):
+    async def scenario(api):
+        assert (await send(api, b"POST /entries HTTP/1.1\r\nConnection: close\r\n\r\n"))[0] == 411
+        assert (await send(api, b"POST /entries HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n"))[0] == 411
+        assert (await send(api, b"POST /entries HTTP/1.1\r\nContent-Length: -1\r\n\r\n"))[0] == 400
+        too_big = f"POST /entries HTTP/1.1\r\nContent-Length: {MAX_BODY_SIZE + 1}\r\n\r\n".encode()
+        assert (await send(api, too_big))[0] == 413
+        assert (await send(api, b"LIXO\r\n\r\n"))[0] == 400
+        assert (await send(api, b"GET /" + b"a" * 70000 + b" HTTP/1.1\r\n\r\n"))[0] == 400
+        assert (await send(api, b"GET /months HTTP/1.1\r\nX-Long: " + b"a" * 70000 + b"\r\n\r\n"))[0] == 431
+        many = "".join(f"X-{index}: a\r\n" for index in range(MAX_HEADERS + 1))
+        assert (await send(api, f"GET /months HTTP/1.1\r\n{many}\r\n".encode()))[0] == 431
+        # O servidor continua atendendo
+        assert (await call(api, 'GET', '/months'))[0] == 200
+    serve(tmp_path, scenario)
@@ -0,0 +1,43 @@
+import random
+from datetime import date
+from balances import FenwickTree, MonthlyBalances
+from database import LedgerStore
+from ledger import Ledger
+
+
+def test_fenwick_prefix_sums_match_a_plain_sum():
+    rng = random.Random(0)
+    values = [rng.randint(-1000, 1000) for _ in range(100)]
+    tree = FenwickTree(values)
+    for _ in range(200):
+        index, delta = rng.randrange(len(values)), rng.randint(-50, 50)
+        values[index] += delta
+        tree.add(index, delta)
+        probe = rng.randrange(len(values))
+        assert tree.prefix(probe) == sum(values[:probe + 1])
+
+
+def test_monthly_balances_grow_past_the_reserved_range():
+    balances = MonthlyBalances([(2024, 1, 100), (2024, 3, -30)])
+    assert (balances.opening(2024, 3), balances.closing(2024, 3), balances.total()) == (100, 70, 70)
+    balances.add(2010, 6, 5)  # Muito antes do intervalo reservado: reconstrói
+    balances.add(2040, 1, 7)  # Muito depois
+    assert balances.opening(2024, 1) == 5
+    assert balances.closing(2039, 12) == 75
+    assert balances.total() == 82
+    assert balances.opening(2000, 1) == 0
+
+
+def test_ledger_balances_follow_edits_in_old_months(tmp_path):
+    ledger = Ledger(LedgerStore(str(tmp_path / "ledger.db")))
+    ledger.open_month(2024, 5)
+    ledger.add_entry(date(2024, 5, 3).toordinal(), "Aluguel", -150000)
+    ledger.add_entry(date(2019, 1, 10).toordinal(), "Saldo inicial", 1000000)
+    assert ledger.opening_balance() == 1000000
+    assert ledger.closing_balance() == ledger.total_balance() == 850000
+    ledger.set_cell(0, 2, "-1.600,00")
+    assert ledger.total_balance() == 840000
+    ledger.close()
+    reopened = Ledger(LedgerStore(str(tmp_path / "ledger.db")))
+    assert reopened.total_balance() == 840000  # Vem do resumo materializado no banco
+    reopened.close()
@@ -0,0 +1,43 @@
+import random
+from datetime import date
+from buckets import (DAY, WEEK, MONTH, MAX_BARS, bar_slots, bucket_series, choose_bucket, downsample, tick_label,
+                     tick_stride, value_labels_fit)
+
+
+def test_bucket_depends_on_the_visible_days():
+    first = date(2024, 1, 1).toordinal()
+    assert choose_bucket(first, first + 61) == DAY
+    assert choose_bucket(first, first + 62) == WEEK
+    assert choose_bucket(first, first + 365) == WEEK
+    assert choose_bucket(first, first + 366) == MONTH
+
+
+def test_series_are_summed_per_week_and_month():
+    series = [(date(2024, 1, 31).toordinal(), 10), (date(2024, 2, 4).toordinal(), 5),  # Quarta e domingo
+              (date(2024, 2, 5).toordinal(), -3)]  # Segunda-feira: outra semana
+    assert bucket_series(series, WEEK) == [(date(2024, 1, 29).toordinal(), 15), (date(2024, 2, 5).toordinal(), -3)]
+    assert bucket_series(series, MONTH) == [(date(2024, 1, 1).toordinal(), 10), (date(2024, 2, 1).toordinal(), 2)]
+    assert bucket_series(series, DAY) == series
+    assert bucket_series(list(reversed(series)), DAY) == series
+
+
+def test_downsample_keeps_the_peaks_in_order():
+    rng = random.Random(1)
+    series = [(ordinal, rng.randint(-100, 100)) for ordinal in range(1000)]
+    series[123] = (123, 10000)
+    series[777] = (777, -10000)
+    reduced = downsample(series, MAX_BARS)
+    assert len(reduced) <= MAX_BARS
+    assert (123, 10000) in reduced and (777, -10000) in reduced
+    assert [ordinal for ordinal, _ in reduced] == sorted(ordinal for ordinal, _ in reduced)
+    assert downsample(series[:10], MAX_BARS) == series[:10]
+
+
+def test_labels_and_slots_fit_the_width():
+    assert bar_slots(100) == 25 and bar_slots(10000) == MAX_BARS and bar_slots(0) == 1
+    assert tick_stride(30, 440) == 3
+    assert tick_stride(5, 440) == 1
+    assert value_labels_fit(10, 520) and not value_labels_fit(11, 520) and not value_labels_fit(0, 520)
+    ordinal = date(2024, 3, 7).toordinal()
+    assert (tick_label(ordinal, DAY), tick_label(ordinal, DAY, True)) == ("07", "07/03")
+    assert (tick_label(ordinal, MONTH), tick_label(ordinal, MONTH, True)) == ("mar", "mar/24")
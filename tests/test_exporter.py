@@ -0,0 +1,75 @@
+import csv, os
+from datetime import date
+import pytest
+from database import LedgerStore
+from ledger import Ledger
+from exporter import export_format, export_range, opening_balance
+
+
+def day(year, month, number):
+    return date(year, month, number).toordinal()
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    ledger = Ledger(LedgerStore(str(tmp_path / "ledger.db")))
+    ledger.open_month(2024, 3)
+    for ordinal, description, cents in [(day(2023, 12, 20), "Saldo inicial", 100000),
+                                        (day(2024, 3, 1), "Mercado", -2050),  # Antes do início, no mesmo mês
+                                        (day(2024, 3, 10), "Salário", 500000),
+                                        (day(2024, 3, 10), "Aluguel", -150000),
+                                        (day(2024, 4, 2), "Luz", -12345),
+                                        (day(2024, 5, 1), "Depois do fim", 1)]:
+        ledger.add_entry(ordinal, description, cents)
+    yield ledger
+    ledger.close()
+
+
+def read_csv(path):
+    with open(path, encoding='utf-8-sig', newline='') as file:
+        return list(csv.reader(file, delimiter=';'))
+
+
+def test_running_balance_starts_from_everything_before_the_range(ledger, tmp_path):
+    first, last = day(2024, 3, 5), day(2024, 4, 30)
+    assert opening_balance(ledger.store.conn, first) == 97950
+    path = str(tmp_path / "extrato.csv")
+    result = ledger.export(path, first, last)
+    assert result.exported == 3 and not result.cancelled
+    assert read_csv(path) == [["Data", "Descrição", "Valor", "Tipo", "Saldo"],
+                              ["10/03/2024", "Salário", "5.000,00", "Entrada", "5.979,50"],
+                              ["10/03/2024", "Aluguel", "-1.500,00", "Saída", "4.479,50"],
+                              ["02/04/2024", "Luz", "-123,45", "Saída", "4.356,05"]]
+
+
+def test_balances_do_not_depend_on_the_chunk_size(ledger, tmp_path):
+    first, last = day(2023, 1, 1), day(2024, 12, 31)
+    export_range(ledger.store.conn, str(tmp_path / "todo.csv"), first, last)
+    export_range(ledger.store.conn, str(tmp_path / "blocos.csv"), first, last, chunk_size=2)
+    assert read_csv(str(tmp_path / "todo.csv")) == read_csv(str(tmp_path / "blocos.csv"))
+
+
+def test_cancelled_export_removes_the_file(ledger, tmp_path):
+    path = str(tmp_path / "extrato.csv")
+    calls = []
+    result = export_range(ledger.store.conn, path, day(2023, 1, 1), day(2024, 12, 31), chunk_size=2,
+                          progress=lambda done, total: calls.append((done, total)), cancelled=lambda: bool(calls))
+    assert result.cancelled and result.exported == 0
+    assert calls == [(2, 6)]
+    assert not os.path.exists(path)
+
+
+def test_unknown_extension_is_rejected():
+    assert export_format("a.XLSX") == "xlsx"
+    with pytest.raises(ValueError):
+        export_format("a.txt")
+
+
+def test_parquet_keeps_cents_and_balances(ledger, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = str(tmp_path / "extrato.parquet")
+    ledger.export(path, day(2024, 3, 5), day(2024, 4, 30))
+    table = pq.read_table(path)
+    assert table.column('valor_centavos').to_pylist() == [500000, -150000, -12345]
+    assert table.column('saldo_centavos').to_pylist() == [597950, 447950, 435605]
+    assert pq.ParquetFile(path).num_row_groups == 2  # Um por mês
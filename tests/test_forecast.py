@@ -0,0 +1,116 @@
+import calendar, random, sqlite3
+from datetime import date, timedelta
+import pytest
+from database import LedgerStore
+from forecast import DAILY, WEEKLY, MONTHLY, YEARLY, Forecast, Rule
+from ledger import Ledger
+
+
+def brute_force(rule, first, last):
+    # Ocorrências gerando as datas uma a uma
+    result = []
+    start = date.fromordinal(rule.start)
+    if rule.frequency in (DAILY, WEEKLY):
+        step = timedelta(days=(1 if rule.frequency == DAILY else 7) * rule.interval)
+        day = start
+        while day.toordinal() <= last:
+            result.append(day.toordinal())
+            day += step
+    else:
+        step = (1 if rule.frequency == MONTHLY else 12) * rule.interval
+        index = start.year * 12 + start.month - 1
+        while True:
+            year, month = divmod(index, 12)
+            day = date(year, month + 1, min(rule.day, calendar.monthrange(year, month + 1)[1])).toordinal()
+            if day > last:
+                break
+            result.append(day)
+            index += step
+    end = rule.end if rule.end is not None else last
+    return [ordinal for ordinal in result if max(first, rule.start) <= ordinal <= min(last, end)]
+
+
+def random_rule(rng, rule_id=None):
+    start = date(2023, 1, 1).toordinal() + rng.randrange(800)
+    frequency = rng.choice([DAILY, WEEKLY, MONTHLY, YEARLY])
+    end = start + rng.randrange(2000) if rng.random() < 0.5 else None
+    return Rule("Regra", rng.randint(-100000, 100000), frequency, rng.randint(1, 4),
+                rng.choice([None, 28, 29, 30, 31]), start, end, rule_id=rule_id)
+
+
+def test_occurrences_match_brute_force():
+    rng = random.Random(7)
+    for _ in range(300):
+        rule = random_rule(rng)
+        first = date(2023, 1, 1).toordinal() + rng.randrange(1500)
+        last = first + rng.randrange(1500)
+        assert rule.occurrences(first, last).tolist() == brute_force(rule, first, last), rule.row()
+
+
+def test_month_end_days_are_clamped():
+    rule = Rule("Fim do mês", -100, MONTHLY, day=31, start=date(2024, 1, 31).toordinal())
+    days = [date.fromordinal(ordinal) for ordinal in rule.occurrences(rule.start, date(2024, 4, 30).toordinal())]
+    assert days == [date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30)]
+    leap = Rule("Bissexto", 1, YEARLY, day=29, start=date(2024, 2, 29).toordinal())
+    days = [date.fromordinal(ordinal) for ordinal in leap.occurrences(leap.start, date(2028, 3, 1).toordinal())]
+    assert days == [date(2024, 2, 29), date(2025, 2, 28), date(2026, 2, 28), date(2027, 2, 28), date(2028, 2, 29)]
+
+
+def test_incremental_updates_match_a_rebuild():
+    rng = random.Random(3)
+    today = date(2024, 6, 15)
+    rules = {rule_id: random_rule(rng, rule_id) for rule_id in range(20)}
+    forecast = Forecast(rules.values(), today, 24)
+    for _ in range(50):
+        rule_id = rng.randrange(30)
+        if rule_id in rules and rng.random() < 0.3:
+            del rules[rule_id]
+            forecast.remove_rule(rule_id)
+        else:
+            rules[rule_id] = random_rule(rng, rule_id)
+            forecast.set_rule(rules[rule_id])
+    rebuilt = Forecast(rules.values(), today, 24)
+    assert forecast.income.tolist() == rebuilt.income.tolist()
+    assert forecast.expenses.tolist() == rebuilt.expenses.tolist()
+
+
+def test_overdue_occurrences_count_in_the_first_month():
+    today = date(2024, 6, 15)
+    rule = Rule("Aluguel", -1000, MONTHLY, day=5, start=date(2024, 4, 5).toordinal())
+    forecast = Forecast([rule], today, 3)
+    assert forecast.expenses.tolist() == [-3000, -1000, -1000]  # Abril, maio e junho no primeiro mês
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    ledger = Ledger(LedgerStore(str(tmp_path / "ledger.db")))
+    ledger.open_month(2024, 6)
+    yield ledger
+    ledger.close()
+
+
+def test_post_recurring_writes_due_occurrences_once(ledger):
+    today = date(2024, 6, 15)
+    ledger.add_entry(date(2024, 5, 1).toordinal(), "Saldo", 1000000)
+    ledger.save_rule(Rule("Aluguel", -150000, MONTHLY, day=5, start=date(2024, 6, 5).toordinal()), date(2024, 6, 1))
+    ledger.save_rule(Rule("Salário", 500000, MONTHLY, day=20, start=date(2024, 6, 20).toordinal()), today)
+    # Regra nova com início no passado: as ocorrências anteriores a hoje não são gravadas
+    ledger.save_rule(Rule("Antiga", -1, MONTHLY, day=1, start=date(2024, 1, 1).toordinal()), today)
+    assert ledger.forecast(3, today)[0] == (2024, 6, 500000, -150000, 1350000)
+    assert ledger.post_recurring(today) == 1
+    assert ledger.post_recurring(today) == 0
+    assert ledger.forecast(3, today)[0] == (2024, 6, 500000, 0, 1350000)  # O aluguel já é um lançamento
+    assert [row[2:] for row in ledger.month_entries(2024, 6)] == [("Aluguel", -150000)]
+    assert ledger.rules()[0].posted == today.toordinal()
+
+
+def test_post_recurring_is_all_or_nothing(ledger):
+    today = date(2024, 6, 15)
+    ledger.save_rule(Rule("Aluguel", -150000, MONTHLY, day=5, start=date(2024, 6, 5).toordinal()), date(2024, 6, 1))
+    ledger.store.conn.execute("CREATE TRIGGER fail AFTER UPDATE ON rules BEGIN SELECT RAISE(ABORT, 'falha'); END")
+    with pytest.raises(sqlite3.IntegrityError):
+        ledger.post_recurring(today)
+    assert ledger.month_entries(2024, 6) == []
+    assert ledger.rules()[0].posted is None
+    ledger.store.conn.execute("DROP TRIGGER fail")
+    assert ledger.post_recurring(today) == 1
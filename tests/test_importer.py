@@ -0,0 +1,50 @@
+from datetime import date
+from database import LedgerStore
+from importer import import_statement
+
+OFX = """OFXHEADER:100
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20240503<TRNAMT>-1.500<MEMO>Tarifa</STMTTRN>
+<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20240504<TRNAMT>2500.75<MEMO>Pix recebido</STMTTRN>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20240505<TRNAMT>1.234,56<MEMO>Inválido</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+
+def test_ofx_amounts_use_decimal_point(tmp_path):
+    path = tmp_path / "extrato.ofx"
+    path.write_text(OFX, encoding='utf-8')
+    store = LedgerStore(str(tmp_path / "ledger.db"))
+    result = import_statement(store, str(path))
+    assert (result.imported, result.rejected) == (2, 1)
+    assert [(ordinal, description, cents) for _, ordinal, description, cents in store.month_entries(2024, 5)] == [
+        (date(2024, 5, 3).toordinal(), "Tarifa", -150),
+        (date(2024, 5, 4).toordinal(), "Pix recebido", 250075),
+    ]
+    store.close()
+
+
+def import_csv(tmp_path, text):
+    path = tmp_path / "extrato.csv"
+    path.write_text(text, encoding='utf-8')
+    store = LedgerStore(str(tmp_path / "ledger.db"))
+    result = import_statement(store, str(path))
+    rows = [(ordinal, description, cents) for _, ordinal, description, cents in store.month_entries(2024, 5)]
+    store.close()
+    return result, rows
+
+
+def test_headerless_semicolon_csv_with_decimal_commas(tmp_path):
+    result, rows = import_csv(tmp_path, "01/05/2024;Mercado;-1.234,56\n02/05/2024;Salário;5.000,00\n03/05/2024;Pix;10,5\n")
+    assert (result.imported, result.rejected) == (3, 0)
+    assert rows == [(date(2024, 5, 1).toordinal(), "Mercado", -123456),
+                    (date(2024, 5, 2).toordinal(), "Salário", 500000),
+                    (date(2024, 5, 3).toordinal(), "Pix", 1050)]
+
+
+def test_first_line_is_data_unless_it_names_the_columns(tmp_path):
+    # Uma primeira linha com data inválida é rejeitada (e informada), não tratada como cabeçalho
+    result, rows = import_csv(tmp_path, "32/05/2024;Mercado;-1,00\n02/05/2024;Pix;2,00\n")
+    assert (result.imported, result.errors) == (1, [(1, "data inválida")])
+    result, rows = import_csv(tmp_path, "Valor,Histórico,Data\n-12.50,Mercado,2024-05-04\n")
+    assert result.imported == 1 and rows[-1] == (date(2024, 5, 4).toordinal(), "Mercado", -1250)
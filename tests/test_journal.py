@@ -0,0 +1,168 @@
+import os, sqlite3
+import pytest
+from database import LedgerStore
+from journal import WriteBehindStore, journal_path, read_journal
+
+
+def open_store(tmp_path, **options):
+    return WriteBehindStore(LedgerStore(str(tmp_path / "ledger.db")), **options)
+
+
+def crash(store):
+    # Simula uma queda: nada de flush, diário e banco ficam como estão
+    os.close(store.fd)
+    store.store.conn.close()
+
+
+def rows(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT id, ordinal, description, cents FROM entries ORDER BY id").fetchall()
+    finally:
+        conn.close()
+
+
+def test_edits_are_journaled_and_flushed_in_one_batch(tmp_path):
+    store = open_store(tmp_path)
+    first = store.add_entry(739000, "Aluguel", -150000)
+    store.update_entry(first, 739001, "Aluguel", -160000)
+    second = store.add_entry(739002, "Mercado", -5000)
+    assert len(read_journal(store.path)) == 3
+    assert rows(store.store.path) == []
+    assert store.flush() == 2
+    assert os.path.getsize(store.path) == 0
+    assert rows(store.store.path) == [(first, 739001, "Aluguel", -160000), (second, 739002, "Mercado", -5000)]
+    store.close()
+    assert not os.path.exists(journal_path(store.store.path))
+
+
+def test_journal_is_replayed_after_a_crash(tmp_path):
+    store = open_store(tmp_path)
+    kept = store.add_entry(739000, "Gravado", 100)
+    store.flush()
+    store.update_entry(kept, 739000, "Editado", 200)
+    added = store.add_entry(739001, "Pendente", 300)
+    store.delete_entry(kept)
+    crash(store)
+    reopened = LedgerStore(store.store.path)
+    assert rows(reopened.path) == [(added, 739001, "Pendente", 300)]
+    assert not os.path.exists(journal_path(reopened.path))
+    reopened.close()
+
+
+def test_replaying_a_journal_that_was_already_applied_changes_nothing(tmp_path):
+    store = open_store(tmp_path)
+    store.add_entry(739000, "A", 1)
+    store.add_entry(739001, "B", 2)
+    with open(store.path, 'rb') as file:
+        journal = file.read()
+    store.flush()
+    crash(store)  # Queda entre o commit e o esvaziamento do diário
+    with open(store.path, 'wb') as file:
+        file.write(journal)
+    before = rows(store.store.path)
+    LedgerStore(store.store.path).close()
+    assert rows(store.store.path) == before
+
+
+def test_a_cut_last_line_is_ignored(tmp_path):
+    store = open_store(tmp_path)
+    store.add_entry(739000, "Inteira", 1)
+    os.write(store.fd, b'{"op": "add", "id": 99, "ordi')
+    crash(store)
+    assert [row[2] for row in rows(store.store.path)] == []
+    LedgerStore(store.store.path).close()
+    assert [row[2] for row in rows(store.store.path)] == ["Inteira"]
+
+
+def test_failed_flush_keeps_the_edits_pending(tmp_path):
+    store = open_store(tmp_path)
+    entry_id = store.add_entry(739000, "Minha", 1)
+    other = sqlite3.connect(store.store.path)
+    other.execute("INSERT INTO entries (id, ordinal, description, cents) VALUES (?, 739000, 'Outra', 2)", (entry_id,))
+    other.commit()
+    with pytest.raises(sqlite3.IntegrityError):
+        store.flush()
+    assert len(store.pending) == 1 and len(read_journal(store.path)) == 1
+    assert rows(store.store.path) == [(entry_id, 739000, "Outra", 2)]  # A linha do outro processo fica intacta
+    other.execute("DELETE FROM entries")
+    other.commit()
+    other.close()
+    assert store.flush() == 1
+    assert rows(store.store.path) == [(entry_id, 739000, "Minha", 1)]
+    store.close()
+
+
+def test_ids_are_unique_across_flushes_and_imports(tmp_path):
+    store = open_store(tmp_path, batch_size=3)
+    ids = [store.add_entry(739000, f"E{index}", index) for index in range(5)]  # O terceiro já dispara um flush
+    ids += store.add_entry_rows([(739001, "Colado", 1), (739001, "Colado", 2)])
+    store.add_entries([[(739002, "Importado", 3)] * 4])
+    ids += [store.add_entry(739003, "Depois", 4)]
+    store.flush()
+    stored = [row[0] for row in rows(store.store.path)]
+    assert len(ids) == len(set(ids)) == 8
+    assert len(stored) == len(set(stored)) == 12 and set(ids) <= set(stored)
+    store.close()
+
+
+def test_api_entries_never_collide_with_the_window_ids(tmp_path):
+    # Flush, inclusão pela API, colagem de 5000 linhas e flush: cada um com os seus ids
+    from api import Writer, add_entry
+    store = open_store(tmp_path)
+    store.add_entry(739000, "Antes", 1)
+    store.flush()
+    writer = Writer(store.store.path)
+    api_id = writer.executor.submit(add_entry, writer, 739001, "API", 2).result()[0]
+    pasted = store.add_entry_rows([(739002, f"Colado {index}", index) for index in range(5000)])
+    assert api_id not in pasted
+    store.flush()  # A colagem já passou de BATCH_SIZE e foi gravada
+    later_id = writer.executor.submit(add_entry, writer, 739003, "API depois", 3).result()[0]
+    assert later_id > max(pasted)
+    writer.close()
+    stored = dict((row[0], row[2]) for row in rows(store.store.path))
+    assert len(stored) == 5003 and stored[api_id] == "API" and stored[later_id] == "API depois"
+    store.close()
+
+
+def test_replay_never_overwrites_rows_the_journal_did_not_create(tmp_path):
+    store = open_store(tmp_path)
+    kept = store.add_entry(739000, "Gravado", 1)
+    store.flush()
+    store.update_entry(kept, 739000, "Editado na janela", 2)
+    added = store.add_entry(739001, "Da janela", 3)
+    crash(store)
+    other = sqlite3.connect(store.store.path)
+    with other:
+        other.execute("DELETE FROM entries WHERE id = ?", (kept,))  # Excluído pela API antes da reaplicação
+        other.execute("INSERT INTO entries (ordinal, description, cents) VALUES (739002, 'API', 4)")
+    other.close()
+    LedgerStore(store.store.path).close()
+    assert [row[1:] for row in rows(store.store.path)] == [(739001, "Da janela", 3), (739002, "API", 4)]
+    assert rows(store.store.path)[0][0] == added
+
+
+def test_old_databases_are_migrated_to_autoincrement(tmp_path):
+    path = str(tmp_path / "antigo.db")
+    store = LedgerStore(path)
+    store.add_entry(739000, "Aluguel", -150000)
+    store.add_entry(739031, "Salário", 500000)
+    store.close()
+    conn = sqlite3.connect(path)  # Volta para a tabela da versão 6, sem AUTOINCREMENT
+    with conn:
+        conn.execute("CREATE TABLE entries_v6 (id INTEGER PRIMARY KEY, ordinal INTEGER NOT NULL, "
+                     "description TEXT NOT NULL DEFAULT '', cents INTEGER NOT NULL DEFAULT 0)")
+        conn.execute("INSERT INTO entries_v6 SELECT * FROM entries")
+        conn.execute("DROP TABLE entries")
+        conn.execute("ALTER TABLE entries_v6 RENAME TO entries")
+        conn.execute("DELETE FROM sqlite_sequence")
+    conn.execute("PRAGMA user_version = 6")
+    conn.close()
+    store = LedgerStore(path)
+    sql = store.conn.execute("SELECT sql FROM sqlite_master WHERE name = 'entries'").fetchone()[0]
+    assert "AUTOINCREMENT" in sql
+    assert store.month_summaries() == [(2024, 4, 1, 0, -150000), (2024, 5, 1, 500000, 0)]
+    assert [row[2] for row in store.search("alug")] == ["Aluguel"]
+    first = store.reserve_ids(10)
+    assert first == 3 and store.add_entry(739040, "Novo") == 13
+    store.close()
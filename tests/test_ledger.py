@@ -0,0 +1,39 @@
+from datetime import date
+from database import LedgerStore
+from ledger import Ledger, PLACEHOLDER_DESCRIPTION
+
+
+def open_ledger(tmp_path):
+    ledger = Ledger(LedgerStore(str(tmp_path / "ledger.db")))
+    ledger.open_month(2024, 5)
+    ledger.add_entry(date(2024, 5, 3).toordinal(), "Aluguel", -150000)
+    return ledger
+
+
+def test_paste_adds_rows_past_the_end(tmp_path):
+    ledger = open_ledger(tmp_path)
+    result = ledger.paste(1, 0, [["10/05/2024", "Salário", "5.000,00"]])
+    assert (result.added, result.errors) == (1, [])
+    assert [entry[1:] for entry in ledger.entries.rows()] == [
+        (date(2024, 5, 3).toordinal(), "Aluguel", -150000),
+        (date(2024, 5, 10).toordinal(), "Salário", 500000),
+    ]
+    assert ledger.closing_balance() == 350000
+
+
+def test_paste_skips_new_rows_without_valid_cells(tmp_path):
+    ledger = open_ledger(tmp_path)
+    block = [["32/05/2024", "", "abc"], ["11/05/2024", "", "1,00"]]
+    result = ledger.paste(1, 0, block)
+    assert result.added == 1
+    assert [(row, column) for row, column, _ in result.errors] == [(1, 0), (1, 2)]
+    assert [entry[1:] for entry in ledger.entries.rows()][-1] == (date(2024, 5, 11).toordinal(), "", 100)
+    assert len(ledger.store.month_entries(2024, 5)) == 2
+
+
+def test_paste_into_type_column_adds_nothing(tmp_path):
+    ledger = open_ledger(tmp_path)
+    result = ledger.paste(0, 3, [["Entrada"], ["Saída"], ["Saída"]])
+    assert result.added == 0
+    assert [entry[2] for entry in ledger.entries.rows()] == ["Aluguel"]
+    assert PLACEHOLDER_DESCRIPTION not in [entry[2] for entry in ledger.store.month_entries(2024, 5)]
@@ -0,0 +1,24 @@
+import pytest
+from money import format_brl, parse_brl, parse_brl_array
+
+
+@pytest.mark.parametrize("text, cents", [
+    ("1.500,50", 150050), ("-1.500,50", -150050), ("1500,5", 150050), ("", 0), ("1,", 100),
+    # Mais de duas casas: meio para cima, sem erro de float (1,005 em float é 1,00499...)
+    ("1,005", 101), ("-1,005", -101), ("2,675", 268), ("12,344999", 1234), ("-0,004", 0),
+])
+def test_parse_brl(text, cents):
+    assert parse_brl(text) == cents
+    values, valid = parse_brl_array([text])
+    assert valid.all() and values.tolist() == [cents]
+
+
+def test_invalid_values():
+    for text in ("1.50,00", "abc", ",", "-"):
+        with pytest.raises(ValueError):
+            parse_brl(text)
+    assert parse_brl_array(["1.50,00", "abc", "2,00"])[1].tolist() == [False, False, True]
+
+
+def test_format_brl():
+    assert [format_brl(cents) for cents in (150050, -150050, 5, 0)] == ["1.500,50", "-1.500,50", "0,05", "0,00"]
@@ -0,0 +1,64 @@
+from datetime import date
+from database import LedgerStore
+from ledger import Ledger
+from reports import QueryCache
+
+
+def day(year, month, number=10):
+    return date(year, month, number).toordinal()
+
+
+def open_ledger(tmp_path):
+    ledger = Ledger(LedgerStore(str(tmp_path / "ledger.db")))
+    ledger.open_month(2024, 1)
+    for ordinal, description, cents in [(day(2023, 1), "Salário", 500000), (day(2023, 1), "Aluguel", -150000),
+                                        (day(2023, 2), "Mercado", -40000), (day(2024, 1), "Salário", 550000),
+                                        (day(2024, 1), "Aluguel", -160000), (day(2024, 1), "Mercado", -30000),
+                                        (day(2024, 3), "Aluguel", -160000)]:
+        ledger.add_entry(ordinal, description, cents)
+    return ledger
+
+
+def test_monthly_and_yearly_totals(tmp_path):
+    ledger = open_ledger(tmp_path)
+    reports = ledger.reports
+    monthly = reports.monthly(2024)
+    assert len(monthly) == 12
+    assert monthly[0] == (1, 3, 550000, -190000, 360000)
+    assert monthly[1] == (2, 0, 0, 0, 0)
+    assert monthly[2] == (3, 1, 0, -160000, -160000)
+    assert reports.yearly(2023, 2024) == [(2023, 3, 500000, -190000, 310000), (2024, 4, 550000, -350000, 200000)]
+    assert reports.years() == [2023, 2024]
+    ledger.close()
+
+
+def test_year_over_year_and_top_descriptions(tmp_path):
+    ledger = open_ledger(tmp_path)
+    rows = ledger.reports.year_over_year(2024)
+    assert rows[0] == (1, 350000, 360000, 10000, 10000 * 100 / 350000)
+    assert rows[1] == (2, -40000, 0, 40000, 100.0)
+    assert rows[2] == (3, 0, -160000, -160000, None)  # Sem saldo no ano anterior
+    assert ledger.reports.top_descriptions(2023, 2024, limit=2) == [("Aluguel", 3, -470000), ("Mercado", 2, -70000)]
+    ledger.close()
+
+
+def test_edits_discard_only_the_reports_of_the_edited_month(tmp_path):
+    ledger = open_ledger(tmp_path)
+    reports = ledger.reports
+    reports.monthly(2023)
+    reports.monthly(2024)
+    ledger.add_entry(day(2024, 1, 20), "Farmácia", -5000)
+    assert ('monthly', 2023) in reports.cache.results
+    assert ('monthly', 2024) not in reports.cache.results
+    assert reports.monthly(2024)[0] == (1, 4, 550000, -195000, 355000)
+    ledger.close()
+
+
+def test_query_cache_evicts_the_least_recently_used():
+    cache = QueryCache(size=2)
+    cache.get('a', 1, 1, lambda: 1)
+    cache.get('b', 2, 2, lambda: 2)
+    cache.get('a', 1, 1, lambda: 0)  # Acerto: 'a' passa a ser o mais recente
+    cache.get('c', 3, 3, lambda: 3)
+    assert list(cache.results) == ['a', 'c']
+    assert cache.get('a', 1, 1, lambda: 0) == 1
@@ -0,0 +1,52 @@
+import os
+from datetime import date
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+QtCore = pytest.importorskip("PyQt5.QtCore")
+Qt = QtCore.Qt
+
+from database import LedgerStore
+from ledger import Ledger
+from table_model import LedgerTableModel, COLOR_EXPENSE, COLOR_INCOME
+
+
+@pytest.fixture
+def model(tmp_path):
+    app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+    ledger = Ledger(LedgerStore(str(tmp_path / "ledger.db")))
+    ledger.open_month(2024, 5)
+    ledger.add_entry(date(2024, 5, 3).toordinal(), "Aluguel", -150000)
+    ledger.add_entry(date(2024, 5, 10).toordinal(), "Salário", 500000)
+    yield LedgerTableModel(ledger)
+    ledger.close()
+    del app
+
+
+def test_cells_come_from_the_month_columns(model):
+    assert (model.rowCount(), model.columnCount()) == (2, 4)
+    assert [model.data(model.index(0, column)) for column in range(4)] == ["03/05/2024", "Aluguel", "-1.500,00", "Saída"]
+    assert model.data(model.index(0, 3), Qt.ForegroundRole) == COLOR_EXPENSE
+    assert model.data(model.index(1, 3), Qt.ForegroundRole) == COLOR_INCOME
+    assert not model.flags(model.index(0, 3)) & Qt.ItemIsEditable
+
+
+def test_date_edit_moves_the_row_in_place(model):
+    moved = []
+    model.rowsMoved.connect(lambda *args: moved.append(args))
+    assert model.setData(model.index(0, 0), "20/05/2024")
+    assert len(moved) == 1
+    assert [model.data(model.index(row, 1)) for row in range(2)] == ["Salário", "Aluguel"]
+
+
+def test_invalid_value_is_rejected_with_a_message(model):
+    errors = []
+    model.errorOccurred.connect(errors.append)
+    assert not model.setData(model.index(0, 2), "abc")
+    assert errors and model.data(model.index(0, 2)) == "-1.500,00"
+
+
+def test_date_in_another_month_removes_the_row(model):
+    assert model.setData(model.index(0, 0), "03/06/2024")
+    assert model.rowCount() == 1
+    assert model.ledger.closing_balance(2024, 6) == 500000 - 150000
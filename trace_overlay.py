@@ -0,0 +1,53 @@
+import time
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtWidgets import QLabel
+from instrumentation import tracer
+
+# Quadro sobre a janela com o intervalo entre passadas do event loop e o tempo dos handlers.
+# Um timer de 16 ms mede o atraso do event loop; passadas acima de BLOCKED_MS também
+# viram spans "event_loop.blocked" no trace exportado
+
+FRAME_MS = 16
+BLOCKED_MS = 50
+REFRESH_MS = 250
+SHOWN_SPANS = 8
+
+
+class TraceOverlay(QLabel):
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.setAlignment(Qt.AlignLeft | Qt.AlignTop)
+        self.setStyleSheet("QLabel { background-color: rgba(0, 0, 0, 180); color: #90d4c4; "
+                           "font-family: monospace; font-size: 10px; padding: 4px; }")
+        self.last_tick = time.perf_counter_ns()
+        self.frame = 0.0
+        self.worst_frame = 0.0
+        self.heartbeat = QTimer(self)
+        self.heartbeat.timeout.connect(self.tick)
+        self.heartbeat.start(FRAME_MS)
+        self.refresher = QTimer(self)
+        self.refresher.timeout.connect(self.refresh)
+        self.refresher.start(REFRESH_MS)
+        self.raise_()
+
+    def tick(self):
+        now = time.perf_counter_ns()
+        self.frame = (now - self.last_tick) / 1e6
+        self.worst_frame = max(self.worst_frame, self.frame)
+        if self.frame > BLOCKED_MS:
+            tracer.record("event_loop.blocked", self.last_tick, now, 0)
+        self.last_tick = now
+
+    def refresh(self):
+        lines = [f"quadro {self.frame:6.1f} ms   pior {self.worst_frame:6.1f} ms"]
+        self.worst_frame = 0.0
+        stats = sorted(tracer.summary().items(), key=lambda item: item[1]['total_ms'], reverse=True)
+        for name, values in stats[:SHOWN_SPANS]:
+            lines.append(f"{name:<26} {values['count']:>5}x  média {values['mean_ms']:7.2f}  "
+                         f"p95 {values['p95_ms']:7.2f}  máx {values['max_ms']:7.2f}")
+        self.setText("\n".join(lines))
+        self.adjustSize()
+        parent = self.parentWidget()
+        self.move(parent.width() - self.width() - 8, 8)
+        self.raise_()